@@ -23,8 +23,14 @@ DISCORD_MSG_TIMEOUT = int(config['Discord']['Timeout'])
 WORLD_NAME = config['World']['Name']
 WORLD_WIDTH = int(config['World']['Width'])
 WORLD_HEIGHT = int(config['World']['Height'])
+WORLD_CHUNK_SIZE = int(config['World']['ChunkSize'])
+WORLD_REGION_SIZE = int(config['World']['RegionSize'])
+WORLD_WORKERS = int(config['World']['Workers'])
+WORLD_MAP_FILE = config['World']['MapFile'] or None
+WORLD_SIMULATION_THREAD = config['World'].getboolean('SimulationThread')
 
 # TODO: Allow user to specify display size, then scroll through tiles
 DISPLAY_WIDTH = int(config['Display']['Width'])
 DISPLAY_HEIGHT = int(config['Display']['Height'])
 DISPLAY_SCROLL_SPEED = int(config['Display']['ScrollSpeed'])
+DISPLAY_FPS = float(config['Display']['FPS'])
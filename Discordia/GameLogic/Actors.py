@@ -2,7 +2,7 @@ from __future__ import annotations
 
 import random
 from abc import ABC, abstractmethod
-from typing import Tuple, List, Type, Union
+from typing import Callable, Iterable, Tuple, List, Type, Union
 from enum import Enum, auto
 
 from Discordia import SPRITE_FOLDER
@@ -84,15 +84,61 @@ class AbstractActor(ABC):
 
 class Inventory(List[Items.Equipment]):
     """
-    A list of Equipment objects that can be used by an Actor.
+    A list of Equipment objects that can be used by an Actor. Calls on_change, if given, whenever its contents do.
     """
 
+    # Also a class attribute: unpickling appends the items before it puts the instance's attributes back
+    on_change: Callable[[], None] | None = None
+
+    def __init__(self, *items, on_change: Callable[[], None] | None = None):
+        super().__init__(*items)
+        self.on_change = on_change
+
+    def _changed(self):
+        if self.on_change is not None:
+            self.on_change()
+
     def add(self, item: Items.Equipment):
         self.append(item)
 
+    def append(self, item: Items.Equipment):
+        super().append(item)
+        self._changed()
+
+    def extend(self, items: Iterable[Items.Equipment]):
+        super().extend(items)
+        self._changed()
+
+    def insert(self, index, item: Items.Equipment):
+        super().insert(index, item)
+        self._changed()
+
     def remove(self, item: Items.Equipment):
         if item in self:
             super().remove(item)
+            self._changed()
+
+    def pop(self, index=-1) -> Items.Equipment:
+        item = super().pop(index)
+        self._changed()
+        return item
+
+    def clear(self):
+        super().clear()
+        self._changed()
+
+    def __setitem__(self, index, value):
+        super().__setitem__(index, value)
+        self._changed()
+
+    def __delitem__(self, index):
+        super().__delitem__(index)
+        self._changed()
+
+    def __iadd__(self, items):
+        result = super().__iadd__(items)
+        self._changed()
+        return result
 
     def has_item(self, item: Items.Equipment) -> bool:
         return item in self
@@ -114,7 +160,7 @@ class Actor(AbstractActor, ABC):
         self.body_type = body_type
         self.inventory: Inventory = Inventory()
         # None until the actor is spawned into the world; everything past that point assumes a Space
-        self.location: GameSpace.Space = None  # type: ignore[assignment]
+        self._location: GameSpace.Space = None  # type: ignore[assignment]
         self.fov_default = 2
         self.last_time_moved = 0.0
 
@@ -127,6 +173,17 @@ class Actor(AbstractActor, ABC):
             attrdict.append(f"{attr}: {getattr(self, attr)}")
         return f"{self.__class__.__name__}(" + ", ".join(attrdict) + ")"
 
+    @property
+    def location(self) -> GameSpace.Space:
+        return self._location
+
+    @location.setter
+    def location(self, space: GameSpace.Space):
+        # Every move goes through here, which is what keeps the world's occupancy index honest
+        if self.parent_world is not None:
+            self.parent_world.occupancy.move(self, self._location, space)
+        self._location = space
+
     def attempt_move(
         self, shift: Tuple[int, int]
     ) -> List[GameSpace.PlayerActionResponse]:
@@ -300,12 +357,14 @@ class PlayerCharacter(Actor):
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
 
+        # Bumped by every change to something that's saved, so a save can tell who needs writing; see Database
+        self.revision: int = 0
         self._player_class: PlayerClass = WandererClass()
         self._hit_points = self.hit_points_max = self._player_class.hit_points_max_base
         self.equipment_set: Items.EquipmentSet = Items.EquipmentSet()
         self.fov: int = self.fov_default
-        self.inventory: Inventory = Inventory()
-        self.currency: int = 1000
+        self.inventory: Inventory = Inventory(on_change=self._changed)
+        self._currency: int = 1000
 
         self.equipment_set.equip(Weapons.Fist(), MainHandEquipment)
         self.equipment_set.equip(Weapons.Fist(), OffHandEquipment)
@@ -323,6 +382,34 @@ class PlayerCharacter(Actor):
         self._player_class = class_
         self.hit_points_max = class_.hit_points_max_base
         self._hit_points = class_.hit_points_max_base
+        self._changed()
+        if self.parent_world is not None:
+            # Each class has a sprite of its own
+            self.parent_world.occupancy.touch(self)
+
+    def _changed(self):
+        self.revision += 1
+
+    def _set_location(self, space: GameSpace.Space):
+        Actor.location.fset(self, space)
+        self._changed()
+
+    def _set_hit_points(self, value):
+        Actor.hit_points.fset(self, value)
+        self._changed()
+
+    # Actor's, plus a revision bump: NPCs move in their thousands every tick, and aren't saved
+    location = property(Actor.location.fget, _set_location)
+    hit_points = property(Actor.hit_points.fget, _set_hit_points)
+
+    @property
+    def currency(self) -> int:
+        return self._currency
+
+    @currency.setter
+    def currency(self, value: int):
+        self._currency = value
+        self._changed()
 
     @property
     def weapon(self) -> Union[Weapons.Weapon, None]:
@@ -340,10 +427,12 @@ class PlayerCharacter(Actor):
     ):
         self.equipment_set.equip(equipment, equipment_type)
         equipment.on_equip(self)
+        self._changed()
 
     def unequip(self, equipment: Equipment):
         self.equipment_set.unequip(equipment)
         equipment.on_unequip(self)
+        self._changed()
 
     def take_damage(self, damage: float):
         damage -= self.equipment_set.armor_count
@@ -2,22 +2,42 @@ from __future__ import annotations
 
 import random
 from abc import ABC
-from typing import List, Iterator, Type
+from typing import Callable, List, Iterator, Type
 
 from Discordia.GameLogic import Actors, GameSpace, Items
 from Discordia.GameLogic.Procedural import normal
 
 
+def _nothing_happens(
+    player_character: Actors.PlayerCharacter,
+) -> Iterator[GameSpace.PlayerActionResponse]:
+    return iter([])
+
+
 class Event(ABC):
+    """Something that can happen in a wilds. Calls on_change, if given, whenever its probability does."""
+
+    # Set by the wilds the event goes in; one that's in none has nothing to tell
+    on_change: Callable[[], None] | None = None
 
     def __init__(self, probability: float, flavor_text: str):
-        self.probability: float = probability
+        self._probability: float = probability
         self.flavor_text: str = flavor_text
 
+    @property
+    def probability(self) -> float:
+        return self._probability
+
+    @probability.setter
+    def probability(self, value: float):
+        self._probability = value
+        if self.on_change is not None:
+            self.on_change()
+
     @classmethod
     def null_event(cls):
         evt = cls(1.0, "<Null Event>")
-        evt.run = lambda player_character: iter([])
+        evt.run = _nothing_happens  # not a lambda, so wilds can be pickled over to a worker process and back
         return evt
 
     def run(
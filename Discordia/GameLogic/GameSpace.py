@@ -1,28 +1,53 @@
 from __future__ import annotations
 
 import logging
+import multiprocessing
 import random
 import sys
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import nullcontext
 from abc import ABC
 from dataclasses import dataclass, field
-from itertools import product
+from itertools import chain, product, repeat
 from pathlib import Path
-from typing import List, Tuple, Dict, Iterator, Union
+from typing import (
+    Callable,
+    List,
+    Tuple,
+    Dict,
+    Iterable,
+    Iterator,
+    Sequence,
+    TypeVar,
+    Union,
+)
 
 import math
+import time
 import numpy as np
 from astar import AStar
 from math import sqrt
-from noise import pnoise3
 
 from Discordia import SPRITE_FOLDER
 from Discordia.GameLogic import Events, Actors, Items, Weapons
 from Discordia.GameLogic.Items import Equipment
-from Discordia.GameLogic.Procedural import normal, WorldGenerationParameters
+from Discordia.GameLogic.Procedural import (
+    normal,
+    pnoise3_grid,
+    replaying,
+    restored,
+    seeded,
+    RNGState,
+    TickStreams,
+    WorldGenerationParameters,
+)
 from Discordia.GameLogic.StringGenerator import TownNameGenerator, WildsNameGenerator
 
 LOG = logging.getLogger("Discordia.GameLogic.GameSpace")
 
+T = TypeVar("T")
+
 Direction = Tuple[int, int]
 
 DIRECTION_VECTORS: Dict[str | None, Direction] = {
@@ -37,6 +62,13 @@ DIRECTION_VECTORS: Dict[str | None, Direction] = {
     "center": (0, 0),
     None: (0, 0),
 }
+# What an idle NPC picks from each tick; standing still is among the choices
+WANDER_DIRECTIONS: List[Direction] = list(DIRECTION_VECTORS.values())
+# NPCs World.tick_in_steps gets through between pauses: a few milliseconds' worth
+TICK_BATCH_SIZE = 500
+
+# Orientation by code, for the per-tile orientation array. "center" is 0 so a fresh map needs no fill.
+ORIENTATIONS: List[str] = ["center", "n", "s", "e", "w", "ne", "se", "sw", "nw"]
 
 MAX_POPULATION_TOWN = 1000  # Maximum population of a town
 
@@ -65,7 +97,44 @@ def bitmask_to_orientation(value: int) -> str:
 
 
 class Terrain(ABC):
-    _orientation: str = "center"
+    """
+    A kind of ground, facing one way. Immutable and shared: there is one instance per type and orientation, so
+    `SandTerrain("n") is SandTerrain("n")`, and a map stores codes that index TERRAIN_TILES instead of objects.
+    """
+
+    _flyweights: Dict[str, Terrain] = {}
+    code: int  # index into TERRAIN_TYPES
+    orientation_code: int  # index into ORIENTATIONS
+    has_orientations: bool = (
+        True  # False for ground drawn with a single tile, whichever way it faces
+    )
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        cls._flyweights = {}
+
+    def __new__(cls, orientation: str = "center") -> Terrain:
+        orientation = orientation.lower()
+        if orientation not in ORIENTATIONS:
+            raise ValueError("Invalid direction given: ", orientation)
+        if not cls.has_orientations:
+            orientation = "center"
+        try:
+            return cls._flyweights[orientation]
+        except KeyError:
+            pass
+        # Everything derived from the type and orientation is worked out once, here, instead of on every lookup
+        terrain = super().__new__(cls)
+        terrain._orientation = orientation
+        terrain.code = TERRAIN_TYPES.index(cls)
+        terrain.orientation_code = ORIENTATIONS.index(orientation)
+        terrain._hash = hash(str(terrain)) + hash(terrain.walkable)
+        terrain._sprite_path = (
+            SPRITE_FOLDER / "Terrain" / f"{terrain.name}_{orientation}.png"
+        )
+        terrain._sprite_path_string = str(terrain._sprite_path)
+        cls._flyweights[orientation] = terrain
+        return terrain
 
     def __str__(self) -> str:
         return self.__class__.__name__
@@ -74,7 +143,15 @@ class Terrain(ABC):
         return str(self)
 
     def __hash__(self):
-        return hash(str(self)) + hash(self.walkable)
+        return self._hash
+
+    def __reduce__(self):
+        # Unpickles back to the shared instance, rather than a copy the map's `is` checks wouldn't recognise
+        return type(self), (self._orientation,)
+
+    def oriented(self, orientation: str) -> Terrain:
+        """The same ground facing another way."""
+        return type(self)(orientation)
 
     @property
     def walkable(self) -> bool:
@@ -88,20 +165,13 @@ class Terrain(ABC):
     def orientation(self) -> str:
         return self._orientation
 
-    @orientation.setter
-    def orientation(self, value: str):
-        value = value.lower()
-        if value not in DIRECTION_VECTORS.keys():
-            raise ValueError("Invalid direction given: ", value)
-        self._orientation = value
-
     @property
     def sprite_path(self) -> Path:
-        return SPRITE_FOLDER / "Terrain" / f"{self.name}_{self.orientation}.png"
+        return self._sprite_path
 
     @property
     def sprite_path_string(self) -> str:
-        return str(self.sprite_path)
+        return self._sprite_path_string
 
     @property
     def cost(self) -> int:
@@ -185,6 +255,8 @@ class GrassTerrain(Terrain):
 
 
 class WaterTerrain(Terrain):
+    has_orientations = False
+
     @property
     def walkable(self) -> bool:
         return True
@@ -205,14 +277,6 @@ class WaterTerrain(Terrain):
     def layer(self) -> int:
         return 0
 
-    @property
-    def orientation(self) -> str:
-        return "center"
-
-    @orientation.setter
-    def orientation(self, value):
-        pass
-
 
 class MountainTerrain(Terrain):
     @property
@@ -236,6 +300,66 @@ class MountainTerrain(Terrain):
         return 2
 
 
+# Terrain by code: the order generation hands codes out in, and the order arrays of codes index into
+TERRAIN_TYPES: List[type[Terrain]] = [
+    NullTerrain,
+    WaterTerrain,
+    SandTerrain,
+    GrassTerrain,
+    MountainTerrain,
+]
+# Every terrain there can be, by terrain code then orientation code: TERRAIN_TILES[code][orientation]
+TERRAIN_TILES: List[List[Terrain]] = [
+    [terrain_type(orientation) for orientation in ORIENTATIONS]
+    for terrain_type in TERRAIN_TYPES
+]
+WALKABLE: np.ndarray = np.array(
+    [terrain_type().walkable for terrain_type in TERRAIN_TYPES]
+)
+BUILDABLE_CODES: List[int] = [
+    code for code, terrain_type in enumerate(TERRAIN_TYPES) if terrain_type().buildable
+]
+
+
+# bitmask_to_orientation for every bitmask there is, as orientation codes
+ORIENTATION_LUT: np.ndarray = np.array(
+    [ORIENTATIONS.index(bitmask_to_orientation(value)) for value in range(256)],
+    dtype=np.uint8,
+)
+# Bit order of the neighbours in a tile's bitmask
+BITMASK_NEIGHBORS: List[str] = ["nw", "n", "ne", "w", "e", "sw", "s", "se"]
+
+_LAYERS = np.array([terrain_type().layer for terrain_type in TERRAIN_TYPES])
+_HAS_ORIENTATIONS = np.array(
+    [terrain_type.has_orientations for terrain_type in TERRAIN_TYPES]
+)
+
+
+def autotile(terrain_codes: np.ndarray) -> np.ndarray:
+    """
+    Orientation codes for a grid of terrain codes: which sprite each tile takes, given which of its eight neighbours
+    share its layer. Tiles on the grid's border don't have all eight, and stay "center".
+
+    The whole grid at once: each neighbour's comparison is the layer array shifted one step, the eight of them sum
+    into bitmasks, and the bitmasks index ORIENTATION_LUT.
+    https://gamedevelopment.tutsplus.com/tutorials/how-to-use-tile-bitmasking-to-auto-tile-your-level-layouts--cms-25673
+    """
+    height, width = terrain_codes.shape
+    orientation = np.zeros((height, width), dtype=np.uint8)
+    if height < 3 or width < 3:
+        return orientation
+    layers = _LAYERS[terrain_codes]
+    inner = layers[1:-1, 1:-1]
+    bitmasks = np.zeros(inner.shape, dtype=np.uint8)
+    for bit, key in enumerate(BITMASK_NEIGHBORS):
+        dx, dy = DIRECTION_VECTORS[key]
+        neighbor = layers[1 + dy : height - 1 + dy, 1 + dx : width - 1 + dx]
+        bitmasks |= (neighbor == inner).astype(np.uint8) << bit
+    orientation[1:-1, 1:-1] = ORIENTATION_LUT[bitmasks]
+    orientation[~_HAS_ORIENTATIONS[terrain_codes]] = ORIENTATIONS.index("center")
+    return orientation
+
+
 class IndustryType(ABC):
     @property
     def name(self) -> str:
@@ -305,7 +429,9 @@ class Space(ABC):
             raise ValueError(f"Negative coordinate given: {min(x, y)}")
         self.x: int = x
         self.y: int = y
-        self.terrain: Terrain = terrain
+        # Set once the space is placed on a WorldMap; from then on the map's arrays hold its terrain
+        self._map: WorldMap | None = None
+        self._terrain: Terrain = terrain
         self.name = str(self)
 
     def __str__(self):
@@ -355,6 +481,19 @@ class Space(ABC):
     def __hash__(self):
         return hash(self.x) + (10 * hash(self.y)) + (100 * hash(self.terrain))
 
+    @property
+    def terrain(self) -> Terrain:
+        if self._map is None:
+            return self._terrain
+        return self._map.terrain_at(self.x, self.y)
+
+    @terrain.setter
+    def terrain(self, value: Terrain):
+        if self._map is None:
+            self._terrain = value
+        else:
+            self._map.set_terrain(self.x, self.y, value)
+
     @property
     def sprite_path(self):
         return self.terrain.sprite_path
@@ -390,6 +529,11 @@ class Town(Space):
         self.store: Store = store if store is not None else Store()
         self.is_underwater: bool = isinstance(self.terrain, WaterTerrain)
 
+    @property
+    def revision(self) -> int:
+        """Moves on when the town changes from what the seed made. Only its store can."""
+        return self.store.revision
+
     @classmethod
     def generate_town(cls, x, y, terrain):
         name = TownNameGenerator.generate_name()
@@ -486,16 +630,34 @@ class Wilds(Space):
     def __init__(self, x, y, name, terrain: Terrain = NullTerrain()):
         super().__init__(x, y, terrain)
         self.name: str = name
+        # Bumped by every change to the events after generate() made them, so a save can tell which wilds the
+        # seed no longer accounts for; see Database. The events bump it themselves when their odds change.
+        self.revision: int = 0
         self.null_event: Events.Event = Events.Event.null_event()
+        self.null_event.on_change = self._changed
         self.events: List[Events.Event] = []
         self.events.append(self.null_event)
 
+    def _changed(self):
+        self.revision += 1
+
     def add_event(self, event: Events.Event):
+        event.on_change = self._changed
         if event.probability > self.null_event.probability:
             event.probability = self.null_event.probability
         self.events.append(event)
         self.null_event.probability -= event.probability
         assert self.null_event.probability >= 0
+        self._changed()
+
+    def reweigh(self, probabilities: Sequence[float]):
+        """Give the events new probabilities, in the order they're in."""
+        if len(probabilities) != len(self.events):
+            raise ValueError(
+                f"{len(probabilities)} probabilities for {len(self.events)} events"
+            )
+        for event, probability in zip(self.events, probabilities):
+            event.probability = probability
 
     def run_event(self, player) -> List[PlayerActionResponse]:
         chosen_event = random.choices(
@@ -513,8 +675,36 @@ class Wilds(Space):
         for _ in range(level):
             event = Events.generate_event(level)
             wilds.add_event(event)
+        wilds.revision = 0  # as the seed made it
+        return wilds
+
+    @classmethod
+    def regenerate(cls, x, y, terrain: Terrain, level, seed: int) -> Wilds:
+        """
+        The wilds generate() made on RNGs seeded with `seed`, except that its events -- nearly all of the cost, in
+        NPCs -- are left until something first looks for them.
+        """
+        with seeded(seed):
+            name = WildsNameGenerator.generate_name()
+        wilds = cls(x, y, name, terrain)
+        del wilds.events, wilds.null_event
+        wilds._ungenerated = (level, seed)
         return wilds
 
+    def __getattr__(self, name):
+        # Only reached for attributes that aren't there, which for a wilds means regenerate() left its events
+        ungenerated = self.__dict__.get("_ungenerated")
+        if ungenerated is None or name not in ("events", "null_event"):
+            raise AttributeError(name)
+        del self._ungenerated
+        level, seed = ungenerated
+        with seeded(seed):
+            generated = Wilds.generate(self.x, self.y, NullTerrain(), level)
+        self.events, self.null_event = generated.events, generated.null_event
+        for event in self.events:
+            event.on_change = self._changed
+        return getattr(self, name)
+
     @property
     def sprite_path(self):
         return SPRITE_FOLDER / "Structures" / "wilds_default.png"
@@ -535,6 +725,591 @@ class PlayerActionResponse:
         return not self.is_successful
 
 
+# Bump whenever a change to generation means a seed no longer makes the map it used to: cached maps are keyed on it.
+MAP_GENERATOR_VERSION = 1
+
+# The level a Feature records for a town; wilds are never below 0
+TOWN_LEVEL = -1
+
+# A town or wilds as MapGenerator.features records it: x, y, level, and what it was generated from -- its feature_seed
+# on a map made in regions or chunks, else the RNG state generation was in when it got there
+Feature = Tuple[int, int, int, Union[int, RNGState]]
+
+
+@dataclass
+class MapRecord:
+    """
+    Everything generate_map decided, and what it made each town and wilds from: enough to put the same world back
+    together without generating it again. See World's replay argument.
+    """
+
+    terrain: np.ndarray
+    orientation: np.ndarray
+    features: List[Feature]
+    starting_town: int  # index into the towns, in the order the features make them
+    final_state: RNGState  # where the RNGs were left when generation finished
+
+
+class MapGenerator:
+    """
+    Makes any rectangle of a map on its own: terrain from noise sampled at the tiles' own coordinates, then towns and
+    wilds on the buildable tiles. Rectangles made separately agree with the map made whole, seam for seam.
+    """
+
+    def __init__(
+        self,
+        width: int,
+        height: int,
+        gen_params: WorldGenerationParameters,
+        slices: Tuple[float, float, float],
+    ):
+        self.width: int = width
+        self.height: int = height
+        self.gen_params: WorldGenerationParameters = gen_params
+        self.resolution: float = gen_params.resolution_constant * (
+            (width + height) / 2
+        )  # I pulled this out of my butt. Gives us decently scaled noise.
+        # Where in the 3D noise each layer is sliced from: the sand, mountain and grass noise
+        self.slices: Tuple[float, float, float] = slices
+
+    def terrain(self, x0: int, y0: int, x1: int, y1: int) -> np.ndarray:
+        """Terrain codes for the tiles x0 <= x < x1, y0 <= y < y1, one noise field at a time."""
+        # Every layer is drawn over the whole rectangle and thresholded into a mask; later layers paint over
+        # earlier ones, as the per-tile passes used to.
+        xs = np.arange(x0, x1) / self.resolution
+        ys = np.arange(y0, y1) / self.resolution
+
+        def exceeds(noise_slice: float, threshold: float) -> np.ndarray:
+            # Compared in double precision, like the float pnoise3 returned, or tiles near a threshold flip
+            return (
+                np.abs(pnoise3_grid(xs, ys, noise_slice).astype(np.float64)) > threshold
+            )
+
+        sand_slice, mountain_slice, grass_slice = self.slices
+        # Higher water factor -> more Spaces on the map
+        land = exceeds(sand_slice, self.gen_params.water)  # Land and water pass
+        mountains = exceeds(mountain_slice, self.gen_params.mountains)
+        grass = exceeds(grass_slice, self.gen_params.grass)
+        # Mountains only rise from walkable terrain, and sand and water both are, so the mask needs no check
+        return np.select(
+            [grass, mountains, land],
+            [
+                TERRAIN_TYPES.index(GrassTerrain),
+                TERRAIN_TYPES.index(MountainTerrain),
+                TERRAIN_TYPES.index(SandTerrain),
+            ],
+            TERRAIN_TYPES.index(WaterTerrain),
+        ).astype(np.uint8)
+
+    def features(
+        self,
+        terrain_codes: np.ndarray,
+        x0: int,
+        y0: int,
+        seed: int | None = None,
+        record: List[Feature] | None = None,
+    ) -> Tuple[List[Town], List[Wilds]]:
+        """
+        The towns and wilds on a rectangle of terrain whose top-left tile is (x0, y0), drawn from the global RNGs.
+        Given the world's seed, each is then made on RNGs of its own, seeded from it and where it is, so that
+        regions and chunks don't depend on what their features drew. Without, they're made on the global RNGs too,
+        as a map generated whole always has been: the world a seed makes, saves included, depends on it. Given a
+        record, appends to it where each one went and what it was made from.
+
+        Column by column, as the generator always went: the RNG has to hand each buildable tile the same draws,
+        or a seed stops meaning the same world.
+        """
+
+        def origin_of(x: int, y: int) -> int | RNGState | None:
+            if seed is not None:
+                return feature_seed(seed, x, y)
+            # The global RNGs are where it's made from; only worth the 5KB to capture for a record
+            return RNGState.capture() if record is not None else None
+
+        def making(made_from: int | RNGState | None):
+            return nullcontext() if seed is None else seeded(made_from)
+
+        towns: List[Town] = []
+        wilds: List[Wilds] = []
+        buildable = np.isin(terrain_codes, BUILDABLE_CODES)
+        origin = Space(0, 0)  # wilds get tougher the further they are from it
+        for x, y in np.argwhere(buildable.T).tolist():
+            terrain = TERRAIN_TILES[terrain_codes[y, x]][0]
+            x, y = x + x0, y + y0
+            if random.random() <= self.gen_params.towns:
+                made_from = origin_of(x, y)
+                if record is not None:
+                    record.append((x, y, TOWN_LEVEL, made_from))
+                # Just puts town in first valid spot. Not very interesting.
+                with making(made_from):
+                    towns.append(Town.generate_town(x, y, terrain=terrain))
+            elif random.random() <= self.gen_params.wilds:
+                level = normal(
+                    sqrt(origin.distance((x, y))), integer=True, positive=True
+                )
+                made_from = origin_of(x, y)
+                if record is not None:
+                    record.append((x, y, level, made_from))
+                with making(made_from):
+                    wilds.append(Wilds.generate(x, y, terrain, level))
+        return towns, wilds
+
+    def chunk(
+        self, seed: int, chunk_x: int, chunk_y: int, size: int, record: bool = False
+    ) -> Chunk:
+        """The size x size chunk at (chunk_x, chunk_y), which depends on nothing but the world seed and its position."""
+        x0, y0 = chunk_x * size, chunk_y * size
+        x1, y1 = min(x0 + size, self.width), min(y0 + size, self.height)
+        # With a one-tile border from the neighbouring chunks, so tiles along the seams orient as they would on a
+        # map generated whole. At the edge of the map there's no border to add, and edge tiles stay "center".
+        bx0, by0 = max(x0 - 1, 0), max(y0 - 1, 0)
+        bx1, by1 = min(x1 + 1, self.width), min(y1 + 1, self.height)
+        bordered = self.terrain(bx0, by0, bx1, by1)
+        inside = (slice(y0 - by0, y1 - by0), slice(x0 - bx0, x1 - bx0))
+        terrain = bordered[inside].copy()
+        orientation = autotile(bordered)[inside].copy()
+        features: List[Feature] | None = [] if record else None
+        with seeded(chunk_seed(seed, chunk_x, chunk_y)):
+            towns, wilds = self.features(terrain, x0, y0, seed, features)
+        return Chunk(x0, y0, terrain, orientation, towns, wilds, features=features)
+
+
+def chunk_seed(seed: int, chunk_x: int, chunk_y: int) -> int:
+    """A seed for one chunk's RNG, derived from the world's: neighbouring chunks get unrelated streams."""
+    return int(
+        np.random.SeedSequence(seed, spawn_key=(chunk_x, chunk_y)).generate_state(1)[0]
+    )
+
+
+# Tells feature_seed's seed sequences apart from chunk_seed's and the tick streams', all spawned from the world seed
+FEATURE_STREAM_KEY = 2
+
+
+def feature_seed(seed: int, x: int, y: int) -> int:
+    """
+    A seed for the RNGs the town or wilds at (x, y) on a map made in regions or chunks is made on. All a MapRecord
+    needs to keep to make it again.
+    """
+    return int(
+        np.random.SeedSequence(
+            seed, spawn_key=(FEATURE_STREAM_KEY, x, y)
+        ).generate_state(1)[0]
+    )
+
+
+class WorldMap:
+    """
+    The world's tiles, as two uint8 arrays: a TERRAIN_TYPES code and an ORIENTATIONS code per tile.
+
+    Only spaces with state of their own -- towns, wilds, bases -- are kept as objects. Every other tile is a plain
+    Space made on demand, whose terrain reads and writes straight through to the arrays. Indexes like the list of
+    lists it replaced: `world_map[y][x]`.
+
+    Given a path, the arrays live in a memory-mapped .npy file there instead of in memory, for other processes to
+    open() and read without generating or copying anything.
+
+    Changes to the tiles and to `spaces` take `lock`, for the renderer, which reads them from a thread of its own;
+    see Occupancy.
+    """
+
+    def __init__(self, width: int, height: int, path: Path | str | None = None):
+        if path is None:
+            layers = np.zeros((2, height, width), dtype=np.uint8)
+        else:
+            layers = np.lib.format.open_memmap(
+                path, mode="w+", dtype=np.uint8, shape=(2, height, width)
+            )
+        self._use(layers)
+
+    @classmethod
+    def open(cls, path: Path | str, writable: bool = False) -> WorldMap:
+        """
+        The map another process is keeping at path, mapped straight from the file: pages are only read in as
+        they're looked at, and every process mapping it shares the one copy. Read-only unless writable.
+
+        Only the terrain is in the file. Towns and wilds aren't, so here every tile is a plain Space.
+        """
+        world_map = cls.__new__(cls)
+        world_map._use(np.load(path, mmap_mode="r+" if writable else "r"))
+        return world_map
+
+    def _use(self, layers: np.ndarray):
+        self._layers: np.ndarray = layers
+        self.height: int = layers.shape[1]
+        self.width: int = layers.shape[2]
+        self.terrain: np.ndarray = layers[0]
+        self.orientation: np.ndarray = layers[1]
+        self.spaces: Dict[Tuple[int, int], Space] = {}
+        self.lock = threading.RLock()
+        self._changed: set[Tuple[int, int]] | None = None
+
+    def watch(self):
+        """Start noting which tiles change what they look like, for take_changed. One watcher per map."""
+        if self._changed is None:
+            self._changed = set()
+
+    def take_changed(self) -> set[Tuple[int, int]]:
+        """The tiles noted since the last call, swapped out whole; see Occupancy.take_changed."""
+        with self.lock:
+            if self._changed is None:
+                return set()
+            changed, self._changed = self._changed, set()
+            return changed
+
+    def flush(self):
+        """Write a file-backed map's changes through to the file; a no-op for one in memory."""
+        if isinstance(self._layers, np.memmap):
+            self._layers.flush()
+
+    def __len__(self) -> int:
+        return self.height
+
+    def __getitem__(self, y: int) -> _MapRow:
+        return _MapRow(self, _index(y, self.height))
+
+    def __iter__(self) -> Iterator[_MapRow]:
+        for y in range(self.height):
+            yield _MapRow(self, y)
+
+    @property
+    def nbytes(self) -> int:
+        """Bytes held by the tile arrays; the stateful spaces are extra."""
+        return self.terrain.nbytes + self.orientation.nbytes
+
+    def is_loaded(self, x: int, y: int) -> bool:
+        """Whether looking at (x, y) is free. It always is here; see ChunkedMap."""
+        return True
+
+    def loaded_blocks(self) -> Iterator[Tuple[int, int, np.ndarray, np.ndarray]]:
+        """(x0, y0, terrain, orientation) for each block of loaded tiles: here, the whole map in one."""
+        yield 0, 0, self.terrain, self.orientation
+
+    def space_at(self, x: int, y: int) -> Space:
+        space = self.spaces.get((x, y))
+        if space is None:
+            space = Space(x, y)
+            space._map = self
+        return space
+
+    def place(self, space: Space):
+        """Put a space on the map. A plain Space only sets the terrain; anything else is kept as it is."""
+        with self.lock:
+            self.set_terrain(space.x, space.y, space.terrain)
+            if type(space) is Space:
+                self.spaces.pop((space.x, space.y), None)
+            else:
+                space._map = self
+                self.spaces[(space.x, space.y)] = space
+
+    def terrain_at(self, x: int, y: int) -> Terrain:
+        return TERRAIN_TILES[self.terrain[y, x]][self.orientation[y, x]]
+
+    def set_terrain(self, x: int, y: int, terrain: Terrain):
+        with self.lock:
+            self.terrain[y, x] = terrain.code
+            self.orientation[y, x] = terrain.orientation_code
+            if self._changed is not None:
+                self._changed.add((x, y))
+
+
+class _MapRow:
+    """One row of a WorldMap, so `world_map[y][x]` reads and writes like the list of lists did."""
+
+    def __init__(self, world_map: WorldMap, y: int):
+        self.world_map = world_map
+        self.y = y
+
+    def __len__(self) -> int:
+        return self.world_map.width
+
+    def __getitem__(self, x: int | slice) -> Space | List[Space]:
+        if isinstance(x, slice):
+            return [self[i] for i in range(*x.indices(self.world_map.width))]
+        return self.world_map.space_at(_index(x, self.world_map.width), self.y)
+
+    def __setitem__(self, x: int, space: Space):
+        x = _index(x, self.world_map.width)
+        if (space.x, space.y) != (x, self.y):
+            raise ValueError(f"{space!r} placed at {(x, self.y)}")
+        self.world_map.place(space)
+
+    def __iter__(self) -> Iterator[Space]:
+        for x in range(self.world_map.width):
+            yield self.world_map.space_at(x, self.y)
+
+
+def _index(i: int, length: int) -> int:
+    """List-style index checking: negatives count from the end, anything else out of range is an IndexError."""
+    if i < 0:
+        i += length
+    if not 0 <= i < length:
+        raise IndexError("map index out of range")
+    return i
+
+
+@dataclass
+class Chunk:
+    """One generated square of a ChunkedMap: its tiles and the towns and wilds on them."""
+
+    x0: int
+    y0: int
+    terrain: np.ndarray
+    orientation: np.ndarray
+    towns: List[Town]
+    wilds: List[Wilds]
+    # What MapGenerator.features recorded generating them, if it was asked to
+    features: List[Feature] | None = None
+    last_touched: float = 0.0
+    # Changed since it was generated, so evicting it would lose something the seed can't give back
+    modified: bool = False
+
+
+class ChunkedMap(WorldMap):
+    """
+    A WorldMap generated chunk_size squares at a time, each the first time anything touches a tile in it: a player
+    or NPC stepping on it, the renderer or the pathfinder looking at it. Nothing is generated up front, so a world
+    can be far bigger than would fit in memory or in a start-up.
+
+    Each chunk comes from (seed, chunk_x, chunk_y) alone, so one that's gone idle can be evicted back to nothing
+    and regenerated identically later. Chunks that someone has changed, stood in, or that are pinned, are kept.
+    """
+
+    IDLE_SECONDS = 300.0
+
+    def __init__(self, world: World, chunk_size: int):
+        # No whole-map arrays: that's the point. Every tile lookup goes through a chunk instead.
+        self.width: int = world.width
+        self.height: int = world.height
+        self.spaces: Dict[Tuple[int, int], Space] = {}
+        self.world: World = world
+        self.chunk_size: int = chunk_size
+        self.chunks: Dict[Tuple[int, int], Chunk] = {}
+        self.pinned: set[Tuple[int, int]] = set()
+        self._generator: MapGenerator | None = None
+        self.lock = threading.RLock()
+        self._changed: set[Tuple[int, int]] | None = None
+
+    @property
+    def generator(self) -> MapGenerator:
+        if self._generator is None:
+            # The same slices a whole-map generator would draw first thing after seeding, so the terrain matches
+            slices = random.Random(self.world.seed)
+            self._generator = MapGenerator(
+                self.width,
+                self.height,
+                self.world.gen_params,
+                (slices.random(), slices.random(), slices.random()),
+            )
+        return self._generator
+
+    @property
+    def nbytes(self) -> int:
+        return sum(
+            chunk.terrain.nbytes + chunk.orientation.nbytes
+            for chunk in self.chunks.values()
+        )
+
+    def flush(self):
+        pass  # nothing of a chunked map lives in a file
+
+    def chunk_key(self, x: int, y: int) -> Tuple[int, int]:
+        return x // self.chunk_size, y // self.chunk_size
+
+    def is_loaded(self, x: int, y: int) -> bool:
+        return self.chunk_key(x, y) in self.chunks
+
+    def loaded_blocks(self) -> Iterator[Tuple[int, int, np.ndarray, np.ndarray]]:
+        for chunk in list(self.chunks.values()):
+            yield chunk.x0, chunk.y0, chunk.terrain, chunk.orientation
+
+    def chunk_at(self, x: int, y: int) -> Chunk:
+        """The chunk holding tile (x, y), generated first if it has to be."""
+        key = self.chunk_key(x, y)
+        chunk = self.chunks.get(key)
+        if chunk is None:
+            chunk = self.load(key)
+        chunk.last_touched = time.monotonic()
+        return chunk
+
+    def load(self, key: Tuple[int, int]) -> Chunk:
+        chunk = self.generator.chunk(self.world.seed, *key, self.chunk_size)
+        with self.lock:
+            self.chunks[key] = chunk
+            for space in chain(chunk.towns, chunk.wilds):
+                space._map = self
+                self.spaces[(space.x, space.y)] = space
+            if self._changed is not None:
+                height, width = chunk.terrain.shape
+                self._changed.update(
+                    (chunk.x0 + dx, chunk.y0 + dy)
+                    for dy in range(height)
+                    for dx in range(width)
+                )
+        self.world.towns.extend(chunk.towns)
+        self.world.wilds.extend(chunk.wilds)
+        return chunk
+
+    def evict(self, keys: Iterable[Tuple[int, int]]):
+        """Forget chunks, down to their seed. Batched, because the world's town and wilds lists get rebuilt."""
+        gone: set[int] = set()
+        with self.lock:
+            for key in keys:
+                chunk = self.chunks.pop(key)
+                for space in chain(chunk.towns, chunk.wilds):
+                    del self.spaces[(space.x, space.y)]
+                    gone.add(id(space))
+        if gone:
+            self.world.towns = [t for t in self.world.towns if id(t) not in gone]
+            self.world.wilds = [w for w in self.world.wilds if id(w) not in gone]
+
+    def pin(self, space: Space):
+        """Never evict the chunk this space is in."""
+        self.pinned.add(self.chunk_key(space.x, space.y))
+
+    def collect(
+        self,
+        players: Iterable[Actors.PlayerCharacter],
+        npcs: Iterable[Actors.NPC],
+        idle_seconds: float | None = None,
+    ) -> int:
+        """
+        Evict every chunk nobody has touched in idle_seconds, unless it's pinned, modified or occupied, and return
+        how many went. Besides its terrain being edited, a chunk counts as modified once a town or wilds in it has
+        moved on from its first revision: a store bought from, a wilds' odds changed, or saved state put back by a
+        load. None of that is in the seed. Anywhere players have only walked through comes back the same.
+        """
+        idle_seconds = self.IDLE_SECONDS if idle_seconds is None else idle_seconds
+        keep = set(self.pinned)
+        for actor in chain(players, npcs):
+            if actor.location is not None:
+                keep.add(self.chunk_key(actor.location.x, actor.location.y))
+        cutoff = time.monotonic() - idle_seconds
+        idle = [
+            key
+            for key, chunk in self.chunks.items()
+            if key not in keep and not chunk.modified and chunk.last_touched < cutoff
+        ]
+        # Only worth looking inside the chunks that would otherwise go
+        for key in idle:
+            chunk = self.chunks[key]
+            if any(space.revision for space in chain(chunk.towns, chunk.wilds)):
+                chunk.modified = True
+        idle = [key for key in idle if not self.chunks[key].modified]
+        self.evict(idle)
+        return len(idle)
+
+    def find_starting_town(self) -> Town:
+        """The first town in chunk order, working outwards from the origin ring by ring."""
+        chunks_x = -(-self.width // self.chunk_size)
+        chunks_y = -(-self.height // self.chunk_size)
+        for ring in range(max(chunks_x, chunks_y)):
+            for chunk_y in range(min(ring + 1, chunks_y)):
+                for chunk_x in range(min(ring + 1, chunks_x)):
+                    if max(chunk_x, chunk_y) != ring:
+                        continue
+                    chunk = self.chunk_at(
+                        chunk_x * self.chunk_size, chunk_y * self.chunk_size
+                    )
+                    if chunk.towns:
+                        return chunk.towns[0]
+        raise ValueError("No town anywhere on the map to start in")
+
+    def space_at(self, x: int, y: int) -> Space:
+        self.chunk_at(
+            x, y
+        )  # its towns and wilds have to be in self.spaces before looking there
+        return super().space_at(x, y)
+
+    def terrain_at(self, x: int, y: int) -> Terrain:
+        chunk = self.chunk_at(x, y)
+        dx, dy = x - chunk.x0, y - chunk.y0
+        return TERRAIN_TILES[chunk.terrain[dy, dx]][chunk.orientation[dy, dx]]
+
+    def set_terrain(self, x: int, y: int, terrain: Terrain):
+        chunk = self.chunk_at(x, y)
+        dx, dy = x - chunk.x0, y - chunk.y0
+        with self.lock:
+            chunk.terrain[dy, dx] = terrain.code
+            chunk.orientation[dy, dx] = terrain.orientation_code
+            chunk.modified = True
+            if self._changed is not None:
+                self._changed.add((x, y))
+
+
+class Occupancy:
+    """
+    Which actors are on which tile. Kept up to date by the actors themselves, whenever their location changes, so
+    finding who's on a tile or in a region costs only as many tiles as are asked about, not a pass over everyone.
+
+    The renderer reads it from a thread of its own. Everything here takes `lock`, and a reader that wants what it
+    reads to agree with take_changed holds it across both.
+    """
+
+    def __init__(self):
+        # Reentrant, so a reader holding it can still call at()
+        self.lock = threading.RLock()
+        # Dicts as insertion-ordered sets: each tile lists its actors in the order they arrived
+        self._tiles: Dict[Tuple[int, int], Dict[Actors.Actor, None]] = {}
+        # Tiles whose watched actors have come, gone or changed since take_changed, if anyone's watching
+        self._watched: type | None = None
+        self._changed: set[Tuple[int, int]] = set()
+
+    def __len__(self) -> int:
+        return sum(len(actors) for actors in self._tiles.values())
+
+    def watch(self, kind: type):
+        """Start noting which tiles actors of kind come and go from, for take_changed. One watcher per world."""
+        self._watched = kind
+
+    def take_changed(self) -> set[Tuple[int, int]]:
+        """
+        The tiles noted since the last call, swapped out whole. With `lock` held from here until they've been read,
+        a move either lands before, and is in them, or after, and is noted for the next call.
+        """
+        with self.lock:
+            changed, self._changed = self._changed, set()
+            return changed
+
+    def touch(self, actor: Actors.Actor):
+        """Note actor's tile as changed without it moving, say because it looks different now."""
+        if self._watched is not None and isinstance(actor, self._watched):
+            location = actor.location
+            if location is not None:
+                with self.lock:
+                    self._changed.add((location.x, location.y))
+
+    def move(self, actor: Actors.Actor, old: Space | None, new: Space | None):
+        """Moves actor from old to new. Either can be None, for arriving in the world or leaving it."""
+        with self.lock:
+            if self._watched is not None and isinstance(actor, self._watched):
+                if old is not None:
+                    self._changed.add((old.x, old.y))
+                if new is not None:
+                    self._changed.add((new.x, new.y))
+            if old is not None:
+                tile = self._tiles.get((old.x, old.y))
+                if tile is not None:
+                    tile.pop(actor, None)
+                    if not tile:
+                        del self._tiles[(old.x, old.y)]
+            if new is not None:
+                self._tiles.setdefault((new.x, new.y), {})[actor] = None
+
+    def at(self, x: int, y: int, kind: type | None = None) -> List[Actors.Actor]:
+        """The actors standing on (x, y), only those of kind if given."""
+        with self.lock:
+            actors = self._tiles.get((x, y), ())
+            return [
+                actor for actor in actors if kind is None or isinstance(actor, kind)
+            ]
+
+    def in_region(
+        self, spaces: Iterable[Space], kind: type | None = None
+    ) -> List[Actors.Actor]:
+        """The actors standing on any of spaces, tile by tile in the order given."""
+        return [actor for space in spaces for actor in self.at(space.x, space.y, kind)]
+
+
 class World:
 
     def __init__(
@@ -544,118 +1319,172 @@ class World:
         height: int,
         generation_parameters: WorldGenerationParameters = WorldGenerationParameters(),
         seed=None,
+        workers: int = 1,
+        record: bool = False,
+        replay: MapRecord | None = None,
+        map_path: Path | str | None = None,
     ):
         super().__init__()
         self.name: str = name
         self.width: int = width
         self.height: int = height
         self.gen_params: WorldGenerationParameters = generation_parameters
-        self.map: List[List[Space]] = [
-            [Space(x, y, NullTerrain()) for x in range(width)] for y in range(height)
-        ]
+        if generation_parameters.chunk_size and map_path is not None:
+            raise ValueError("A chunked map has no whole-map arrays to keep in a file")
+        self.map: WorldMap = (
+            ChunkedMap(self, generation_parameters.chunk_size)
+            if generation_parameters.chunk_size
+            else WorldMap(width, height, map_path)
+        )
         self.towns: List[Town] = []
         self.wilds: List[Wilds] = []
         self.players: List[Actors.PlayerCharacter] = []
         self.npcs: List[Actors.NPC] = []
+        # Actors keep this up to date as they move; see Actor.location
+        self.occupancy: Occupancy = Occupancy()
         self.starting_town: Town = Town.generate_town(0, 0, NullTerrain())
+        # Processes to generate regions in. Not saved with the world: the map comes out the same for any number.
+        self.workers: int = workers
+        # What generation decided, if asked to record it, for replaying the same map later without generating it
+        self.map_record: MapRecord | None = None
+        # Ticks so far. With the seed, it's all a tick's random draws depend on; see TickStreams.
+        self.tick_number: int = 0
+        self._streams: TickStreams | None = None
+        self._streams_tick: int = -1
 
         # Always seeded, and always remembers its seed: that's what lets a save file be just the seed.
         self.seed: int = random.randrange(2**32) if seed is None else seed
         random.seed(self.seed)
         np.random.seed(self.seed)
-        self.generate_map()
+        if replay is not None:
+            self.replay_map(replay)
+        else:
+            self.generate_map(record)
+        self.map.flush()
 
-    def generate_map(self):
+    def generate_map(self, record: bool = False):
         LOG.info("Generating Map...")
+        if isinstance(self.map, ChunkedMap):
+            # Nothing up front; chunks generate as they're touched. The first one with a town in it, working
+            # outwards from the origin, supplies the starting town.
+            self.starting_town = self.map.find_starting_town()
+            # Dead players get sent here: it must stay the same Town
+            self.map.pin(self.starting_town)
+            LOG.info("Generation deferred to first touch")
+            return
+
+        generator = MapGenerator(
+            self.width,
+            self.height,
+            self.gen_params,
+            (random.random(), random.random(), random.random()),
+        )
+        features: List[Feature] | None = [] if record else None
+        if self.gen_params.region_size:
+            self.generate_regions(generator, features)
+        else:
+            # First pass: terrain, a whole noise field at a time
+            self.map.terrain[:] = generator.terrain(0, 0, self.width, self.height)
 
-        # Get parameters
-        resolution = self.gen_params.resolution_constant * (
-            (self.width + self.height) / 2
-        )  # I pulled this out of my butt. Gives us decently scaled noise.
-        sand_slice = random.random()
-        mountain_slice = random.random()
-        grass_slice = random.random()
-        water_threshold = (
-            self.gen_params.water
-        )  # Higher factor -> more Spaces on the map
-        mountain_threshold = self.gen_params.mountains
-        grass_threshold = self.gen_params.grass
-
-        # First pass
-        for x in range(self.width):
-            for y in range(self.height):
-                # Land and water pass
-                self.map[y][x] = Space(
-                    x,
-                    y,
-                    (
-                        SandTerrain()
-                        if abs(pnoise3(x / resolution, y / resolution, sand_slice))
-                        > water_threshold
-                        else WaterTerrain()
-                    ),
-                )
-
-                # Mountains pass
-                if (
-                    abs(pnoise3(x / resolution, y / resolution, mountain_slice))
-                    > mountain_threshold
-                    and self.map[y][x].terrain.walkable
-                ):
-                    self.map[y][x] = Space(x, y, MountainTerrain())
-
-                # Grass pass
-                if (
-                    abs(pnoise3(x / resolution, y / resolution, grass_slice))
-                    > grass_threshold
-                ):
-                    self.map[y][x] = Space(x, y, GrassTerrain())
-
-                # Town and Wilds pass
-                if self.map[y][x].terrain.buildable:
-                    if random.random() <= self.gen_params.towns:
-                        # Just puts town in first valid spot. Not very interesting.
-                        self.add_town(
-                            Town.generate_town(x, y, terrain=self.map[y][x].terrain)
-                        )
-                    elif random.random() <= self.gen_params.wilds:
-                        self.add_wilds(
-                            Wilds.generate(
-                                x,
-                                y,
-                                self.map[y][x].terrain,
-                                normal(
-                                    sqrt(self.starting_town.distance((x, y))),
-                                    integer=True,
-                                    positive=True,
-                                ),
-                            )
-                        )
-
-        # Second (orientation) pass
-        # https://gamedevelopment.tutsplus.com/tutorials/how-to-use-tile-bitmasking-to-auto-tile-your-level-layouts--cms-25673
-        for x in range(1, self.width - 1):
-            for y in range(1, self.height - 1):
-                space: Space = self.map[y][x]
-
-                # Bitmask
-                value = 0
-                for bit, neighbor in enumerate(
-                    [
-                        DIRECTION_VECTORS.get(key)
-                        for key in ["nw", "n", "ne", "w", "e", "sw", "s", "se"]
-                    ]
-                ):
-                    ix, iy = space + neighbor
-                    if self.map[iy][ix].terrain.layer == space.terrain.layer:
-                        value += pow(2, bit)
+            # Town and Wilds pass
+            towns, wilds = generator.features(self.map.terrain, 0, 0, record=features)
+            for town in towns:
+                self.add_town(town)
+            for wild in wilds:
+                self.add_wilds(wild)
 
-                if value != 0:
-                    space.terrain.orientation = bitmask_to_orientation(value)
+            # Second (orientation) pass
+            self.map.orientation[:] = autotile(self.map.terrain)
 
         self.starting_town = random.choice(self.towns)
+        if features is not None:
+            self.map_record = MapRecord(
+                self.map.terrain.copy(),
+                self.map.orientation.copy(),
+                features,
+                self.towns.index(self.starting_town),
+                RNGState.capture(),
+            )
         LOG.info("Generation finished")
 
+    def replay_map(self, record: MapRecord):
+        """
+        Put back the map a MapRecord was made from, without generating it again. Towns are regenerated from the
+        seeds or RNG states they were first made from. Wilds made from a seed only get their events when something
+        first looks for them; those made from an RNG state get them now, so that nothing holds on to the state.
+        The RNGs end up where generation would have left them, so the world carries on exactly as it would have.
+        """
+        LOG.info("Replaying Map...")
+        self.map.terrain[:] = record.terrain
+        for x, y, level, origin in record.features:
+            terrain = TERRAIN_TILES[record.terrain[y, x]][0]
+            if level == TOWN_LEVEL:
+                with replaying(origin):
+                    self.add_town(Town.generate_town(x, y, terrain=terrain))
+            elif isinstance(origin, RNGState):
+                with restored(origin):
+                    self.add_wilds(Wilds.generate(x, y, terrain, level))
+            else:
+                self.add_wilds(Wilds.regenerate(x, y, terrain, level, origin))
+        self.map.orientation[:] = record.orientation
+        self.starting_town = self.towns[record.starting_town]
+        record.final_state.restore()
+        LOG.info("Replay finished")
+
+    def generate_regions(
+        self, generator: MapGenerator, features: List[Feature] | None = None
+    ):
+        """
+        Generate the map region_size squares at a time, spread over self.workers processes, and stitch them in.
+
+        Each region is a chunk, with its own RNG stream seeded from (seed, region_x, region_y), so it comes out the
+        same whichever process makes it and whenever. Stitched in a fixed order, so the world doesn't depend on how
+        many workers there were. A map made this way matches a ChunkedMap with the same seed and chunk size.
+        """
+        size = self.gen_params.region_size
+        regions = list(
+            product(range(-(-self.width // size)), range(-(-self.height // size)))
+        )
+        region_xs, region_ys = [r[0] for r in regions], [r[1] for r in regions]
+        args = (
+            repeat(self.seed),
+            region_xs,
+            region_ys,
+            repeat(size),
+            repeat(features is not None),
+        )
+        if self.workers > 1:
+            # Not forked: a server's database thread is already running by now, and a fork copies whatever
+            # locks it holds
+            with ProcessPoolExecutor(
+                self.workers, mp_context=multiprocessing.get_context("forkserver")
+            ) as pool:
+                chunks = list(
+                    pool.map(
+                        generator.chunk,
+                        *args,
+                        chunksize=max(len(regions) // (4 * self.workers), 1),
+                    )
+                )
+        else:
+            chunks = list(map(generator.chunk, *args))
+
+        for chunk in chunks:
+            height, width = chunk.terrain.shape
+            inside = (
+                slice(chunk.y0, chunk.y0 + height),
+                slice(chunk.x0, chunk.x0 + width),
+            )
+            self.map.terrain[inside] = chunk.terrain
+            self.map.orientation[inside] = chunk.orientation
+        for chunk in chunks:
+            for town in chunk.towns:
+                self.add_town(town)
+            for wild in chunk.wilds:
+                self.add_wilds(wild)
+            if features is not None:
+                features.extend(chunk.features)
+
     def is_space_valid(self, space: Space) -> bool:
         return (
             (0 <= space.x <= self.width - 1)
@@ -712,30 +1541,12 @@ class World:
             self.npcs.append(actor)
 
     def get_npcs_in_region(self, spaces: List[Space]) -> List[Actors.NPC]:
-        npc_locations: Dict[Actors.NPC, Space] = {
-            npc: npc.location for npc in self.npcs
-        }
-        common_locations: List[Space] = list(
-            set(npc_locations.values()).intersection(spaces)
-        )
-        npcs: List[Actors.NPC] = [
-            npc for npc in self.npcs if npc.location in common_locations
-        ]
-        return npcs
+        return self.occupancy.in_region(spaces, Actors.NPC)
 
     def get_players_in_region(
         self, spaces: List[Space]
     ) -> List[Actors.PlayerCharacter]:
-        player_locations: Dict[Actors.PlayerCharacter, Space] = {
-            player: player.location for player in self.players
-        }
-        common_locations: List[Space] = list(
-            set(player_locations.values()).intersection(spaces)
-        )
-        players: List[Actors.PlayerCharacter] = [
-            player for player in self.players if player.location in common_locations
-        ]
-        return players
+        return self.occupancy.in_region(spaces, Actors.PlayerCharacter)
 
     def pvp_attack(
         self, player_character: Actors.PlayerCharacter, direction: Direction = (0, 0)
@@ -755,8 +1566,8 @@ class World:
                 break
             targets = [
                 player
-                for player in self.players
-                if player != player_character and player.location == loc
+                for player in self.occupancy.at(loc.x, loc.y, Actors.PlayerCharacter)
+                if player != player_character
             ]
             if len(targets):
                 target: Actors.PlayerCharacter = random.choice(targets)
@@ -788,31 +1599,151 @@ class World:
         the world when a tick lands on them.
         """
         events: List[PlayerActionResponse] = []
+        for _ in self.tick_in_steps(events):
+            pass
+        return events
+
+    def tick_in_steps(
+        self, events: List[PlayerActionResponse], batch_size: int = TICK_BATCH_SIZE
+    ) -> Iterator[None]:
+        """World.tick, pausing every `batch_size` NPCs or so. Events are appended to `events` as they happen.
+
+        Between two steps the caller is free to do something else, like answer a command, and pick the tick up
+        where it left off: everything it has still to do lives in the generator. Run it to the end before the
+        next tick, and before any order resolves; the orders are what the steps don't expect to change.
+
+        Plays out as NPCs taking turns in self.npcs order, each fighting a player it shares a tile with or else
+        wandering off. Only tiles with a player on them can have a fight, and there are far fewer players than
+        NPCs, so the fighters are found from the players' side. Everyone else wanders, on directions drawn for all
+        of them at once.
+        """
+        streams = self.streams
         self.npcs = [npc for npc in self.npcs if not npc.is_dead]
         if self.wilds and len(self.npcs) < len(self.wilds):
-            self.add_actor(Actors.Raider.generate(1), random.choice(self.wilds))
-        for npc in self.npcs:
-            targets = [p for p in self.players if p.location == npc.location]
-            if not targets:
-                npc.attempt_move(random.choice(list(DIRECTION_VECTORS.values())))
-                continue
-            target = random.choice(targets)
-            damage = npc.brain.update(target)
-            if damage is None:  # disengaged; not worth waking the player up for
-                continue
-            text = f"{npc.name} hits you for {damage} damage."
-            if target.is_dead:  # handle_player_death already sent them home
-                text += f" You black out, and come to in {self.starting_town.name}."
-            events.append(
-                PlayerActionResponse(
-                    is_successful=True,
-                    damage=damage,
-                    target=target,
-                    source=npc,
-                    text=text,
-                )
-            )
-        return events
+            with seeded(TickStreams.seed_from(streams.spawn)):
+                raider = Actors.Raider.generate(1)
+            self.add_actor(raider, self.wilds[streams.spawn.integers(len(self.wilds))])
+
+        # NPCs take their turns in self.npcs order, each fighting a player on its tile if there is one when its
+        # turn comes. Players only move mid-tick when they're knocked out and sent home, so only NPCs that start
+        # on a player's tile or in the starting town can get a fight; the rest are found from the players' side.
+        tiles = {
+            (player.location.x, player.location.y)
+            for player in self.players
+            if player.location is not None
+        }
+        tiles.add((self.starting_town.x, self.starting_town.y))
+        turn = {id(npc): i for i, npc in enumerate(self.npcs)}
+        contenders = sorted(
+            (
+                npc
+                for tile in tiles
+                for npc in self.occupancy.at(*tile, Actors.NPC)
+                if id(npc) in turn  # not dead and dropped
+            ),
+            key=lambda npc: turn[id(npc)],
+        )
+        seat = {id(player): i for i, player in enumerate(self.players)}
+        fighting: set[int] = set()
+        for start in range(0, len(contenders), batch_size):
+            # Damage rolls still come from random; seeded a batch at a time, so nothing leaks out between steps
+            with seeded(TickStreams.seed_from(streams.combat)):
+                for npc in contenders[start : start + batch_size]:
+                    targets = sorted(
+                        self.occupancy.at(
+                            npc.location.x, npc.location.y, Actors.PlayerCharacter
+                        ),
+                        # Anyone who registered between steps comes last, as they do in self.players
+                        key=lambda player: seat.get(id(player), len(seat)),
+                    )
+                    if not targets:  # everyone here has been knocked out and sent home
+                        continue
+                    fighting.add(id(npc))
+                    target = targets[streams.combat.integers(len(targets))]
+                    event = self._attack(npc, target)
+                    if event is not None:
+                        events.append(event)
+            yield
+
+        wanderers = [npc for npc in self.npcs if id(npc) not in fighting]
+        # Drawn up front, so how the tick is sliced can't change where anyone goes
+        directions = streams.wander.integers(
+            len(WANDER_DIRECTIONS), size=len(wanderers)
+        )
+        for start in range(0, len(wanderers), batch_size):
+            batch = wanderers[start : start + batch_size]
+            if isinstance(self.map, ChunkedMap):
+                # No whole-map arrays to check moves against in bulk; chunks load as NPCs walk into them
+                for npc, direction in zip(
+                    batch, directions[start : start + batch_size]
+                ):
+                    npc.attempt_move(WANDER_DIRECTIONS[direction])
+            else:
+                self._wander(batch, directions[start : start + batch_size])
+            yield
+
+        if isinstance(self.map, ChunkedMap):
+            self.map.collect(self.players, self.npcs)
+        self.tick_number += 1
+
+    @property
+    def streams(self) -> TickStreams:
+        """This tick's random streams. See TickStreams: the map is still generated from random and np.random."""
+        if self._streams is None or self._streams_tick != self.tick_number:
+            self._streams = TickStreams.for_tick(self.seed, self.tick_number)
+            self._streams_tick = self.tick_number
+        return self._streams
+
+    def order_turns(self, count: int) -> List[Tuple[int, int]]:
+        """
+        Which of `count` same-tick orders resolves when, as (index, seed) pairs in turn order. Pass each order
+        its seed through run_order. The seeds are all drawn up front, so an order that's skipped because its
+        command went away doesn't change what happens in the ones after it.
+        """
+        orders = self.streams.orders
+        turns = orders.permutation(count).tolist()
+        seeds = orders.integers(2**32, size=count).tolist()
+        return list(zip(turns, seeds))
+
+    @staticmethod
+    def run_order(action: Callable[[], T], seed: int) -> T:
+        """Resolve an order, with whatever it rolls (events, damage) coming from its own seed."""
+        with seeded(seed):
+            return action()
+
+    def _wander(self, npcs: List[Actors.NPC], directions: np.ndarray):
+        """Actor.attempt_move for a crowd of NPCs at once: the moves are checked in arrays, not Space by Space."""
+        if not npcs:
+            return
+        xs = np.array([npc.location.x for npc in npcs])
+        ys = np.array([npc.location.y for npc in npcs])
+        steps = np.array(WANDER_DIRECTIONS)[directions]
+        # Clamped at 0 like Space addition, so walking off the top or left is a step in place
+        new_xs = np.maximum(xs + steps[:, 0], 0)
+        new_ys = np.maximum(ys + steps[:, 1], 0)
+        inside = (new_xs < self.width) & (new_ys < self.height)
+        walkable = np.zeros(len(npcs), dtype=bool)
+        walkable[inside] = WALKABLE[self.map.terrain[new_ys[inside], new_xs[inside]]]
+        moved = walkable & ((new_xs != xs) | (new_ys != ys))
+        for i in np.flatnonzero(moved).tolist():
+            npcs[i].location = self.map.space_at(int(new_xs[i]), int(new_ys[i]))
+
+    def _attack(
+        self, npc: Actors.NPC, target: Actors.PlayerCharacter
+    ) -> PlayerActionResponse | None:
+        damage = npc.brain.update(target)
+        if damage is None:  # disengaged; not worth waking the player up for
+            return None
+        text = f"{npc.name} hits you for {damage} damage."
+        if target.is_dead:  # handle_player_death already sent them home
+            text += f" You black out, and come to in {self.starting_town.name}."
+        return PlayerActionResponse(
+            is_successful=True,
+            damage=damage,
+            target=target,
+            source=npc,
+            text=text,
+        )
 
     def handle_player_death(self, player: Actors.PlayerCharacter):
         LOG.info(f"Player {player.name} has died")
@@ -825,11 +1756,28 @@ class Store:
 
     def __init__(self, inventory=None):
         super().__init__()
-        self.inventory: List[Equipment] = inventory if inventory is not None else []
-        self.price_ratio: float = (
+        # Bumped by every change to what it stocks or charges, so a save can tell which stores the seed no longer
+        # accounts for; see Database
+        self.revision: int = 0
+        self.inventory: Actors.Inventory = Actors.Inventory(
+            inventory if inventory is not None else [], on_change=self._changed
+        )
+        self._price_ratio: float = (
             1.0  # Lower means better buy/sell prices, higher means worse
         )
 
+    @property
+    def price_ratio(self) -> float:
+        return self._price_ratio
+
+    @price_ratio.setter
+    def price_ratio(self, ratio: float):
+        self._price_ratio = ratio
+        self._changed()
+
+    def _changed(self):
+        self.revision += 1
+
     @classmethod
     def generate_store(cls):
         inventory: List[Equipment] = []
@@ -1,7 +1,41 @@
-from dataclasses import dataclass
+from __future__ import annotations
+
+import random
+from contextlib import contextmanager
+from dataclasses import dataclass, fields
 
 import numpy as np
 
+# The permutation table from the `noise` library's _noise.h, so pnoise3_grid lands on the same lattice as pnoise3
+# fmt: off
+_PERM = [
+    151, 160, 137, 91, 90, 15, 131, 13, 201, 95, 96, 53, 194, 233, 7, 225, 140, 36, 103, 30, 69, 142, 8, 99, 37,
+    240, 21, 10, 23, 190, 6, 148, 247, 120, 234, 75, 0, 26, 197, 62, 94, 252, 219, 203, 117, 35, 11, 32, 57, 177,
+    33, 88, 237, 149, 56, 87, 174, 20, 125, 136, 171, 168, 68, 175, 74, 165, 71, 134, 139, 48, 27, 166, 77, 146,
+    158, 231, 83, 111, 229, 122, 60, 211, 133, 230, 220, 105, 92, 41, 55, 46, 245, 40, 244, 102, 143, 54, 65, 25,
+    63, 161, 1, 216, 80, 73, 209, 76, 132, 187, 208, 89, 18, 169, 200, 196, 135, 130, 116, 188, 159, 86, 164, 100,
+    109, 198, 173, 186, 3, 64, 52, 217, 226, 250, 124, 123, 5, 202, 38, 147, 118, 126, 255, 82, 85, 212, 207, 206,
+    59, 227, 47, 16, 58, 17, 182, 189, 28, 42, 223, 183, 170, 213, 119, 248, 152, 2, 44, 154, 163, 70, 221, 153,
+    101, 155, 167, 43, 172, 9, 129, 22, 39, 253, 19, 98, 108, 110, 79, 113, 224, 232, 178, 185, 112, 104, 218, 246,
+    97, 228, 251, 34, 242, 193, 238, 210, 144, 12, 191, 179, 162, 241, 81, 51, 145, 235, 249, 14, 239, 107, 49, 192,
+    214, 31, 181, 199, 106, 157, 184, 84, 204, 176, 115, 121, 50, 45, 127, 4, 150, 254, 138, 236, 205, 93, 222, 114,
+    67, 29, 24, 72, 243, 141, 128, 195, 78, 66, 215, 61, 156, 180,
+]
+# fmt: on
+PERM = np.array(_PERM * 2, dtype=np.intp)
+
+# fmt: off
+GRAD3 = np.array(
+    [
+        [1, 1, 0], [-1, 1, 0], [1, -1, 0], [-1, -1, 0],
+        [1, 0, 1], [-1, 0, 1], [1, 0, -1], [-1, 0, -1],
+        [0, 1, 1], [0, -1, 1], [0, 1, -1], [0, -1, -1],
+        [1, 0, -1], [-1, 0, -1], [0, -1, 1], [0, 1, 1],
+    ],
+    dtype=np.float32,
+)
+# fmt: on
+
 
 def normal(avg, positive=False, integer=False, spread=1.0):
     ans = np.random.normal(avg, scale=spread)
@@ -14,6 +48,182 @@ def normal(avg, positive=False, integer=False, spread=1.0):
     return ans
 
 
+@contextmanager
+def seeded(seed: int):
+    """Runs the block on RNGs seeded with seed, then puts back whatever state random and np.random were in."""
+    state, np_state = random.getstate(), np.random.get_state()
+    random.seed(seed)
+    np.random.seed(seed)
+    try:
+        yield
+    finally:
+        random.setstate(state)
+        np.random.set_state(np_state)
+
+
+@dataclass
+class RNGState:
+    """
+    Where random and np.random both are in their streams, packed into arrays: about 5KB a snapshot, where
+    random.getstate()'s tuple of Python ints is four times that.
+    """
+
+    mt: np.ndarray  # random's Mersenne Twister: 624 words, then the position in them
+    gauss: float | None
+    np_mt: np.ndarray
+    np_pos: int
+    np_gauss: float | None
+
+    @classmethod
+    def capture(cls) -> RNGState:
+        version, mt, gauss = random.getstate()
+        _, np_mt, np_pos, has_gauss, np_gauss = np.random.get_state()
+        return cls(
+            np.array(mt, dtype=np.uint32),
+            gauss,
+            np_mt.copy(),
+            np_pos,
+            np_gauss if has_gauss else None,
+        )
+
+    def restore(self, numpy: bool = True):
+        random.setstate((3, tuple(self.mt.tolist()), self.gauss))
+        if numpy:  # the slow half, so it can be skipped for code that only uses random
+            np.random.set_state(
+                (
+                    "MT19937",
+                    self.np_mt,
+                    self.np_pos,
+                    int(self.np_gauss is not None),
+                    self.np_gauss or 0.0,
+                )
+            )
+
+
+@contextmanager
+def restored(state: RNGState, numpy: bool = True):
+    """
+    Runs the block from RNG state `state`, then puts back whatever state random and np.random were in. With numpy
+    False, np.random is left alone, which is much cheaper if the block doesn't use it.
+    """
+    current = random.getstate()
+    np_current = np.random.get_state() if numpy else None
+    state.restore(numpy)
+    try:
+        yield
+    finally:
+        random.setstate(current)
+        if numpy:
+            np.random.set_state(np_current)
+
+
+def replaying(origin: int | RNGState, numpy: bool = True):
+    """Runs the block from where something was first generated from: a seed, or an RNG state. See restored."""
+    return seeded(origin) if isinstance(origin, int) else restored(origin, numpy)
+
+
+# Tells tick streams' seed sequences apart from chunk_seed's and feature_seed's, spawned from the same world seed
+TICK_STREAM_KEY = 1
+
+
+@dataclass
+class TickStreams:
+    """
+    The random streams one tick of a world draws from, one per subsystem. Each comes from the world's seed, the
+    tick number and the subsystem alone, so a tick can be replayed bit-for-bit from those and what players
+    ordered, and one subsystem drawing more or less never shifts another's draws.
+    """
+
+    # Only ever add fields at the end: a field's position is part of its stream's seed
+    orders: (
+        np.random.Generator
+    )  # the order same-tick orders resolve in, and what happens when they do
+    spawn: np.random.Generator
+    combat: np.random.Generator
+    wander: np.random.Generator
+
+    @classmethod
+    def for_tick(cls, seed: int, tick: int) -> TickStreams:
+        return cls(
+            *(
+                np.random.default_rng(
+                    np.random.SeedSequence(
+                        seed, spawn_key=(TICK_STREAM_KEY, tick, subsystem)
+                    )
+                )
+                for subsystem in range(len(fields(cls)))
+            )
+        )
+
+    @staticmethod
+    def seed_from(stream: np.random.Generator) -> int:
+        """A seed for `seeded`, for code that still draws from random and np.random: names, events, damage."""
+        return int(stream.integers(2**32))
+
+
+def _lattice(coords: np.ndarray, repeat: int):
+    """Per-axis half of noise3: the cell corner, the next corner, the offset into the cell and its fade curve."""
+    cell = np.floor(np.fmod(coords, np.float32(repeat))).astype(np.intp)
+    following = np.fmod((cell + 1).astype(np.float32), np.float32(repeat)).astype(
+        np.intp
+    )
+    offset = coords - np.floor(coords)
+    fade = offset * offset * offset * (offset * (offset * 6 - 15) + 10)
+    return cell & 255, following & 255, offset, fade
+
+
+def _grad3(hashes: np.ndarray, x, y, z) -> np.ndarray:
+    gradient = GRAD3[hashes & 15]
+    return x * gradient[..., 0] + y * gradient[..., 1] + z * gradient[..., 2]
+
+
+def _lerp(t, a, b):
+    return a + t * (b - a)
+
+
+def pnoise3_grid(
+    xs: np.ndarray, ys: np.ndarray, z: float, repeat: int = 1024
+) -> np.ndarray:
+    """
+    noise.pnoise3(x, y, z) for every x in xs and y in ys at once, as a (len(ys), len(xs)) float32 array.
+
+    A port of the library's single-octave C, float32 arithmetic and all, so each value is bit-identical to the
+    scalar call -- maps generated either way must agree tile for tile, or old saves load a different world.
+    """
+    i, ii, x, fx = _lattice(np.asarray(xs, dtype=np.float32)[np.newaxis, :], repeat)
+    j, jj, y, fy = _lattice(np.asarray(ys, dtype=np.float32)[:, np.newaxis], repeat)
+    k, kk, z, fz = _lattice(np.float32(z), repeat)
+
+    a, b = PERM[i], PERM[ii]
+    aa, ab, ba, bb = PERM[a + j], PERM[a + jj], PERM[b + j], PERM[b + jj]
+
+    return _lerp(
+        fz,
+        _lerp(
+            fy,
+            _lerp(fx, _grad3(PERM[aa + k], x, y, z), _grad3(PERM[ba + k], x - 1, y, z)),
+            _lerp(
+                fx,
+                _grad3(PERM[ab + k], x, y - 1, z),
+                _grad3(PERM[bb + k], x - 1, y - 1, z),
+            ),
+        ),
+        _lerp(
+            fy,
+            _lerp(
+                fx,
+                _grad3(PERM[aa + kk], x, y, z - 1),
+                _grad3(PERM[ba + kk], x - 1, y, z - 1),
+            ),
+            _lerp(
+                fx,
+                _grad3(PERM[ab + kk], x, y - 1, z - 1),
+                _grad3(PERM[bb + kk], x - 1, y - 1, z - 1),
+            ),
+        ),
+    )
+
+
 @dataclass
 class WorldGenerationParameters:
     resolution_constant: float = 0.2
@@ -22,3 +232,8 @@ class WorldGenerationParameters:
     mountains: float = 0.4
     wilds: float = 0.1
     towns: float = 0.003
+    # Generate the map this many tiles square at a time, as it's explored, rather than all at once. 0 for all at once.
+    chunk_size: int = 0
+    # Generate the map in independent regions this many tiles square, which can go to separate processes. 0 to
+    # generate it whole, on one RNG stream.
+    region_size: int = 0
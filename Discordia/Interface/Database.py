@@ -2,24 +2,47 @@
 SQLite persistence for a Discordia server.
 
 The map is *not* stored: a World is fully reproducible from its seed, so the world table holds the seed and the
-generation parameters and `load()` re-generates an identical map. Only the state that can't be re-derived --
+generation parameters and `load()` re-generates an identical map (or replays it from a MapCache, which is only ever
+a copy of what the seed makes). Only the state that can't be re-derived --
 characters, where they're standing, what they're carrying -- gets rows.
 
+Nor are towns and wilds, except where play has changed them from what the seed made: a store that's been bought
+from, a wilds whose odds have moved. Each of those gets a row in the space table, keyed by where it is, with what it
+is now; load() regenerates the map and puts them back on top. Every other town and wilds is its revision 0, which the
+seed makes as well as any row would.
+
 NPCs are deliberately not persisted; they're spawned by Events and despawn on death.
+
+With a Journal, save() is a snapshot taken now and then, and record_tick() appends what each tick changed in
+between; load() applies whatever the journal has on top of the snapshot.
+
+With `background=True`, neither of them touches the disk: they take what needs writing off the world there and then,
+and hand it to a writer thread with a connection of its own, which commits in the order it was handed things. The
+file is in WAL mode with synchronous=NORMAL, so a commit is an append to the log, not an fsync; a power cut can lose
+the last few, a crash can't. close() writes whatever is still queued before it returns.
 """
 
 from __future__ import annotations
 
+import functools
 import json
+from itertools import chain
+from collections import defaultdict
 import logging
 import pydoc
+import queue
 import sqlite3
-from dataclasses import asdict
+import threading
+from dataclasses import asdict, dataclass
 from pathlib import Path
+from typing import Any, Dict, List, Sequence, Tuple
 
 from Discordia.GameLogic import Actors, GameSpace
 from Discordia.GameLogic.Items import Equipment, EquipmentSet
+from Discordia.GameLogic.GameSpace import PlayerActionResponse
 from Discordia.GameLogic.Procedural import WorldGenerationParameters
+from Discordia.Interface.Journal import Journal
+from Discordia.Interface.MapCache import MapCache
 from Discordia.Interface.WorldAdapter import WorldAdapter
 
 LOG = logging.getLogger("Discordia.Interface.Database")
@@ -33,7 +56,8 @@ CREATE TABLE IF NOT EXISTS world (
     width       INTEGER NOT NULL,
     height      INTEGER NOT NULL,
     seed        INTEGER NOT NULL,
-    gen_params  TEXT    NOT NULL  -- JSON dump of WorldGenerationParameters
+    gen_params  TEXT    NOT NULL,  -- JSON dump of WorldGenerationParameters
+    tick        INTEGER NOT NULL DEFAULT 0  -- World.tick_number, which with the seed picks the tick's RNG streams
 );
 
 CREATE TABLE IF NOT EXISTS character (
@@ -50,11 +74,44 @@ CREATE TABLE IF NOT EXISTS character (
 CREATE TABLE IF NOT EXISTS item (
     id          INTEGER PRIMARY KEY,
     discord_id  INTEGER NOT NULL REFERENCES character (discord_id) ON DELETE CASCADE,
+    position    INTEGER NOT NULL DEFAULT 0,  -- where it comes in the character's items: the inventory's order
     class_path  TEXT    NOT NULL,
     slot        TEXT  -- an EquipmentSet slot name, or NULL for "in the backpack"
 );
+
+CREATE TABLE IF NOT EXISTS space (
+    x       INTEGER NOT NULL,
+    y       INTEGER NOT NULL,
+    state   TEXT    NOT NULL,  -- JSON: a town's store, or a wilds' event probabilities; see _space_record
+    PRIMARY KEY (x, y)
+);
+"""
+
+# Made after _migrate, which may have just added a column they cover
+INDEXES = """
+-- Without it, finding one character's items (every save that changes them) scans every item in the game. Unique,
+-- so a save can overwrite an item in place by where it comes.
+CREATE UNIQUE INDEX IF NOT EXISTS item_position ON item (discord_id, position);
 """
 
+# The character table's columns, in order. A record (see _character_record) has these, and its items.
+CHARACTER_COLUMNS = (
+    "discord_id",
+    "name",
+    "class_path",
+    "hit_points",
+    "hit_points_max",
+    "currency",
+    "x",
+    "y",
+)
+UPSERT_CHARACTER = (
+    f"INSERT INTO character VALUES ({', '.join('?' for _ in CHARACTER_COLUMNS)}) "
+    f"ON CONFLICT (discord_id) DO UPDATE SET "
+    + ", ".join(f"{column} = excluded.{column}" for column in CHARACTER_COLUMNS[1:])
+)
+
+
 # Classes may only be restored from these modules. The database is ours, but `pydoc.locate` imports whatever it's
 # handed, and a corrupted or hand-edited file shouldn't get to pick the module.
 _ALLOWED_MODULES = frozenset(
@@ -71,6 +128,8 @@ def _class_path(obj) -> str:
     return f"{type(obj).__module__}.{type(obj).__name__}"
 
 
+# Cached: a save has a handful of distinct classes, on thousands of rows
+@functools.lru_cache(maxsize=None)
 def _resolve(class_path: str, expected: type) -> type:
     module, _, _ = class_path.rpartition(".")
     if module not in _ALLOWED_MODULES:
@@ -86,103 +145,455 @@ def _resolve(class_path: str, expected: type) -> type:
 class Database:
     """Loads and saves the whole server. Cheap enough to call save() on a timer; see main.py."""
 
-    def __init__(self, path: Path | str = DEFAULT_PATH):
-        # check_same_thread=False: the periodic autosave runs on the bot's event loop and the shutdown save
-        # doesn't, so the same connection gets used from more than one thread. sqlite serializes them for us.
-        self.connection = sqlite3.connect(path, check_same_thread=False)
-        self.connection.row_factory = sqlite3.Row
-        self.connection.execute("PRAGMA foreign_keys = ON")
+    def __init__(
+        self,
+        path: Path | str = DEFAULT_PATH,
+        journal_path: Path | str | None = None,
+        background: bool = False,
+    ):
+        self.connection = _connect(path)
         self.connection.executescript(SCHEMA)
+        self._migrate()
+        self.connection.executescript(INDEXES)
+        self.journal: Journal | None = (
+            Journal(journal_path) if journal_path is not None else None
+        )
+        # What's in the database for each character, as (PlayerCharacter.revision, items) when it was written.
+        # None until this Database has loaded or saved: rows it didn't write can't be trusted to be current.
+        self._saved: Dict[int, Tuple[int, Sequence[Tuple[str, str | None]]]] | None = (
+            None
+        )
+        # The revision each character was last journaled at
+        self._journaled: Dict[int, int] = {}
+        # The same for towns and wilds, by (x, y). Ones that aren't here are still as the seed made them: revision 0.
+        self._saved_spaces: Dict[Tuple[int, int], int] = {}
+        self._journaled_spaces: Dict[Tuple[int, int], int] = {}
+        # Set when a write fails. _saved was updated when it was queued, so the next save rewrites everything.
+        self._write_failed = threading.Event()
+        # What's waiting for the writer thread, oldest first; None tells it to stop
+        self._queue: queue.Queue[_Snapshot | _TickEntry | None] | None = None
+        self._writer: threading.Thread | None = None
+        if background:
+            self._queue = queue.Queue()
+            self._writer = threading.Thread(
+                target=self._write_queued, args=(path,), name="Database", daemon=True
+            )
+            self._writer.start()
+
+    def _migrate(self):
+        """Bring a save from before a column was added up to date. CREATE TABLE IF NOT EXISTS won't."""
+        columns = {
+            row["name"] for row in self.connection.execute("PRAGMA table_info(world)")
+        }
+        if "tick" not in columns:
+            self.connection.execute(
+                "ALTER TABLE world ADD COLUMN tick INTEGER NOT NULL DEFAULT 0"
+            )
+        columns = {
+            row["name"] for row in self.connection.execute("PRAGMA table_info(item)")
+        }
+        if "position" not in columns:
+            # Items used to come back in the order their rows were made
+            with self.connection:
+                self.connection.execute(
+                    "ALTER TABLE item ADD COLUMN position INTEGER NOT NULL DEFAULT 0"
+                )
+                self.connection.execute(
+                    "UPDATE item SET position = (SELECT COUNT(*) FROM item AS earlier "
+                    "WHERE earlier.discord_id = item.discord_id AND earlier.id < item.id)"
+                )
 
     def close(self):
+        """Write everything that's been saved or recorded so far, then close."""
+        if self._writer is not None:
+            assert self._queue is not None
+            self._queue.put(None)
+            self._writer.join()
         self.connection.close()
+        if self.journal is not None:
+            self.journal.close()
 
-    def load(self) -> WorldAdapter | None:
-        """Rebuild the server from disk, or None if this database has never been saved to."""
+    def load(self, map_cache: MapCache | None = None, **options) -> WorldAdapter | None:
+        """
+        Rebuild the server from disk, or None if this database has never been saved to. Regenerating the map is
+        most of a restart; a map_cache can skip most of it. Options are passed on to World: `workers`, say, for a
+        world saved with a region_size, or `map_path` to keep its terrain in a file other processes can map.
+        """
         row = self.connection.execute("SELECT * FROM world WHERE id = 0").fetchone()
         if row is None:
             return None
 
-        world = GameSpace.World(
+        args = (
             row["name"],
             row["width"],
             row["height"],
             WorldGenerationParameters(**json.loads(row["gen_params"])),
-            seed=row["seed"],
+            row["seed"],
+        )
+        world = (
+            map_cache.world(*args, **options)
+            if map_cache
+            else GameSpace.World(*args, **options)
         )
+        world.tick_number = row["tick"]
         adapter = WorldAdapter(world)
+        # Every item in one query, rather than one per character
+        items = defaultdict(list)
+        for discord_id, class_path, slot in self.connection.execute(
+            "SELECT discord_id, class_path, slot FROM item ORDER BY discord_id, position"
+        ):
+            items[discord_id].append([class_path, slot])
+        saved = {}
         for character_row in self.connection.execute("SELECT * FROM character"):
-            self._load_character(adapter, character_row)
+            record = dict(character_row)
+            record["items"] = items[record["discord_id"]]
+            character = _restore_character(adapter, record)
+            saved[record["discord_id"]] = (
+                character.revision,
+                [tuple(item) for item in record["items"]],
+            )
+        self._saved = saved
+        for space_row in self.connection.execute("SELECT * FROM space"):
+            _restore_space(world, dict(space_row, state=json.loads(space_row["state"])))
+        self._saved_spaces = _space_revisions(world)
+        if self.journal is not None:
+            self._replay(
+                adapter
+            )  # changes revisions, so the next save writes what the journal had
+        self._journaled = {
+            discord_id: character.revision
+            for discord_id, character in adapter.iter_registered()
+        }
+        self._journaled_spaces = _space_revisions(world)
         LOG.info(
             f"Loaded world '{world.name}' (seed {world.seed}) with {len(world.players)} characters"
         )
         return adapter
 
-    def _load_character(self, adapter: WorldAdapter, row: sqlite3.Row):
-        discord_id = row["discord_id"]
-        adapter.register_player(discord_id, row["name"])
-        character = adapter.get_player(discord_id)
-
-        character.player_class = _resolve(
-            row["class_path"], Actors.PlayerClass
-        )()  # resets hit points to the max
-        character.hit_points_max = row["hit_points_max"]
-        character.hit_points = row["hit_points"]
-        character.currency = row["currency"]
-        character.location = adapter.world.map[row["y"]][row["x"]]
+    def _replay(self, adapter: WorldAdapter):
+        assert self.journal is not None
+        replayed = 0
+        for entry in self.journal.entries(after_tick=adapter.world.tick_number):
+            for record in entry["characters"]:
+                _restore_character(adapter, record)
+            for record in entry.get(
+                "spaces", ()
+            ):  # not in journals from before spaces were saved
+                _restore_space(adapter.world, record)
+            adapter.world.tick_number = entry["tick"]
+            replayed += 1
+        if replayed:
+            LOG.info(
+                f"Replayed {replayed} ticks from {self.journal.path}, up to tick {adapter.world.tick_number}"
+            )
 
-        for item_row in self.connection.execute(
-            "SELECT * FROM item WHERE discord_id = ?", (discord_id,)
-        ):
-            item = _resolve(item_row["class_path"], Equipment)()
-            if item_row["slot"] is None:
-                character.inventory.append(item)
-            else:
-                character.equip(item, EquipmentSet.SLOTS[item_row["slot"]])
+    def record_tick(
+        self,
+        adapter: WorldAdapter,
+        orders: Sequence[Tuple[Actors.PlayerCharacter, Sequence[str]]],
+        events: Sequence[PlayerActionResponse],
+    ):
+        """
+        Journal a tick: the orders it resolved, what happened to players, and every character, town and wilds
+        that changed since the last one. Without a journal, this does nothing; the next save() picks the changes
+        up.
+        """
+        if self.journal is None:
+            return
+        changed = [
+            (discord_id, character)
+            for discord_id, character in adapter.iter_registered()
+            if self._journaled.get(discord_id) != character.revision
+        ]
+        spaces = _changed_spaces(adapter.world, self._journaled_spaces)
+        entry = _TickEntry(
+            adapter.world.tick_number,
+            [[adapter.get_member_id(character), *what] for character, what in orders],
+            [
+                [adapter.get_member_id(event.target), event.text]
+                for event in events
+                if event.target is not None
+            ],
+            [
+                _character_record(discord_id, character)
+                for discord_id, character in changed
+            ],
+            [_space_record(space) for space in spaces],
+        )
+        for discord_id, character in changed:
+            self._journaled[discord_id] = character.revision
+        self._submit(entry)
 
     def save(self, adapter: WorldAdapter):
-        """Full rewrite of the mutable state, in one transaction."""
-        # ponytail: rewrites every character each time. Fine for a Discord server's worth of players; if that ever
-        # stops being true, save only the character whose command just ran.
+        """
+        Write whatever changed since the last save, in one transaction: the world row, the characters whose
+        revision moved on, with only their items that aren't where they were, and the towns and wilds whose revision
+        did.
+        The first save to a database this one hasn't loaded rewrites it.
+        """
         world = adapter.world
-        with self.connection:
-            self.connection.execute(
-                "INSERT OR REPLACE INTO world VALUES (0, ?, ?, ?, ?, ?)",
+        rewrite = self._saved is None or self._write_failed.is_set()
+        self._write_failed.clear()
+        saved = {} if rewrite or self._saved is None else self._saved
+        if rewrite:
+            self._saved_spaces = {}
+        characters = []
+        for discord_id, character in adapter.iter_registered():
+            revision, items = saved.get(discord_id, (None, ()))
+            if revision == character.revision:
+                continue
+            record = _character_record(discord_id, character)
+            characters.append((record, items))
+            saved[discord_id] = (
+                character.revision,
+                [tuple(item) for item in record["items"]],
+            )
+        self._saved = saved
+        spaces = _changed_spaces(world, self._saved_spaces)
+        LOG.debug(
+            f"Saving {len(characters)} changed characters and {len(spaces)} changed towns and wilds"
+        )
+        self._submit(
+            _Snapshot(
                 (
                     world.name,
                     world.width,
                     world.height,
                     world.seed,
                     json.dumps(asdict(world.gen_params)),
+                    world.tick_number,
                 ),
+                rewrite,
+                tuple(characters),
+                tuple(_space_record(space) for space in spaces),
+            )
+        )
+
+    def flush(self):
+        """Wait until everything saved or recorded so far has been written."""
+        if self._queue is not None:
+            self._queue.join()
+
+    def _submit(self, payload: _Snapshot | _TickEntry):
+        if self._queue is not None:
+            self._queue.put(payload)
+            return
+        try:
+            payload.write(self.connection, self.journal)
+        except Exception:
+            self._write_failed.set()
+            raise
+
+    def _write_queued(self, path: Path | str):
+        """The writer thread: write payloads as they come, until the None that close() sends."""
+        assert self._queue is not None
+        connection = _connect(path)
+        while True:
+            payload = self._queue.get()
+            try:
+                if payload is None:
+                    break
+                payload.write(connection, self.journal)
+            except Exception:
+                # Nobody's waiting on this to raise to; log it, and make the next save start over
+                LOG.exception("Failed to write to the database")
+                self._write_failed.set()
+            finally:
+                self._queue.task_done()
+        connection.close()
+
+
+@dataclass(frozen=True)
+class _Snapshot:
+    """What save() writes. Taken from the world up front, so writing it never has to look at the world."""
+
+    world: Tuple[Any, ...]  # the world row, after its id
+    rewrite: bool  # clear out every character first
+    characters: Tuple[
+        Tuple[Dict[str, Any], Sequence[Tuple[str, str | None]]], ...
+    ]  # (record, the items the database has for them now)
+    spaces: Tuple[Dict[str, Any], ...]  # _space_record of each
+
+    def write(self, connection: sqlite3.Connection, journal: Journal | None):
+        with connection:
+            connection.execute(
+                "INSERT OR REPLACE INTO world VALUES (0, ?, ?, ?, ?, ?, ?)", self.world
+            )
+            if self.rewrite:
+                connection.execute("DELETE FROM character")  # cascades to item
+                connection.execute("DELETE FROM space")
+            for record, saved_items in self.characters:
+                _write_character(connection, record, saved_items)
+            connection.executemany(
+                "INSERT OR REPLACE INTO space VALUES (?, ?, ?)",
+                [
+                    (record["x"], record["y"], json.dumps(record["state"]))
+                    for record in self.spaces
+                ],
             )
-            self.connection.execute("DELETE FROM character")  # cascades to item
-            for discord_id, character in adapter.iter_registered():
-                self._save_character(discord_id, character)
-
-    def _save_character(self, discord_id: int, character: Actors.PlayerCharacter):
-        self.connection.execute(
-            "INSERT INTO character VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
-            (
-                discord_id,
-                character.name,
-                _class_path(character.player_class),
-                character.hit_points,
-                character.hit_points_max,
-                character.currency,
-                character.location.x,
-                character.location.y,
-            ),
+        if journal is not None:
+            journal.truncate()  # the snapshot has everything up to now
+
+
+@dataclass(frozen=True)
+class _TickEntry:
+    """What record_tick() writes: one Journal line."""
+
+    tick: int
+    orders: List[List[Any]]
+    events: List[List[Any]]
+    characters: List[Dict[str, Any]]
+    spaces: List[Dict[str, Any]]
+
+    def write(self, connection: sqlite3.Connection, journal: Journal | None):
+        assert journal is not None
+        journal.append(
+            self.tick, self.orders, self.events, self.characters, self.spaces
+        )
+
+
+def _connect(path: Path | str) -> sqlite3.Connection:
+    connection = sqlite3.connect(path)
+    connection.row_factory = sqlite3.Row
+    connection.execute("PRAGMA foreign_keys = ON")
+    # A commit appends to the write-ahead log instead of syncing the database file. NORMAL is only unsafe
+    # without WAL; with it, the worst a power cut does is lose the last few commits.
+    connection.execute("PRAGMA journal_mode = WAL")
+    connection.execute("PRAGMA synchronous = NORMAL")
+    return connection
+
+
+def _write_character(
+    connection: sqlite3.Connection,
+    record: Dict[str, Any],
+    saved_items: Sequence[Tuple[str, str | None]],
+):
+    """
+    Upsert a character row, and bring its item rows from `saved_items` to the record's, position by position: an
+    item added at the end is one row, one taken from the middle moves up every item after it.
+    """
+    connection.execute(
+        UPSERT_CHARACTER, tuple(record[column] for column in CHARACTER_COLUMNS)
+    )
+    items = [tuple(item) for item in record["items"]]
+    discord_id = record["discord_id"]
+    connection.executemany(
+        "INSERT INTO item (discord_id, position, class_path, slot) VALUES (?, ?, ?, ?) "
+        "ON CONFLICT (discord_id, position) DO UPDATE SET class_path = excluded.class_path, slot = excluded.slot",
+        [
+            (discord_id, position, class_path, slot)
+            for position, (class_path, slot) in enumerate(items)
+            if position >= len(saved_items)
+            or tuple(saved_items[position]) != (class_path, slot)
+        ],
+    )
+    if len(saved_items) > len(items):
+        connection.execute(
+            "DELETE FROM item WHERE discord_id = ? AND position >= ?",
+            (discord_id, len(items)),
+        )
+
+
+def _character_record(
+    discord_id: int, character: Actors.PlayerCharacter
+) -> Dict[str, Any]:
+    """A character as it's saved: a character row, plus [class_path, slot] for each item (slot None if carried)."""
+    equipped = [
+        [_class_path(item), slot]
+        for slot in EquipmentSet.SLOTS
+        for item in [getattr(character.equipment_set, slot)]
+        if type(item) not in EquipmentSet.SLOTS.values()
+    ]  # the bare base classes are empty slots
+    return dict(
+        discord_id=discord_id,
+        name=character.name,
+        class_path=_class_path(character.player_class),
+        hit_points=character.hit_points,
+        hit_points_max=character.hit_points_max,
+        currency=character.currency,
+        x=character.location.x,
+        y=character.location.y,
+        items=equipped + [[_class_path(item), None] for item in character.inventory],
+    )
+
+
+def _restore_character(
+    adapter: WorldAdapter, record: Dict[str, Any]
+) -> Actors.PlayerCharacter:
+    """Put a saved character back: registering them if they're new, overwriting them if not."""
+    discord_id = record["discord_id"]
+    if adapter.is_registered(discord_id):
+        character = adapter.get_player(discord_id)
+        character.equipment_set = EquipmentSet()
+        character.inventory.clear()
+    else:
+        adapter.register_player(discord_id, record["name"])
+        character = adapter.get_player(discord_id)
+
+    character.player_class = _resolve(
+        record["class_path"], Actors.PlayerClass
+    )()  # resets hit points to the max
+    character.hit_points_max = record["hit_points_max"]
+    character.hit_points = record["hit_points"]
+    character.currency = record["currency"]
+    character.location = adapter.world.map[record["y"]][record["x"]]
+
+    for class_path, slot in record["items"]:
+        item = _resolve(class_path, Equipment)()
+        if slot is None:
+            character.inventory.append(item)
+        else:
+            character.equip(item, EquipmentSet.SLOTS[slot])
+    return character
+
+
+def _space_revisions(world: GameSpace.World) -> Dict[Tuple[int, int], int]:
+    """Where every town and wilds that isn't as the seed made it is, and its revision."""
+    return {
+        (space.x, space.y): space.revision
+        for space in chain(world.towns, world.wilds)
+        if space.revision
+    }
+
+
+def _changed_spaces(
+    world: GameSpace.World, revisions: Dict[Tuple[int, int], int]
+) -> List[GameSpace.Town | GameSpace.Wilds]:
+    """The towns and wilds whose revision isn't the one in `revisions`, which is brought up to date."""
+    changed = [
+        space
+        for space in chain(world.towns, world.wilds)
+        if revisions.get((space.x, space.y), 0) != space.revision
+    ]
+    for space in changed:
+        revisions[(space.x, space.y)] = space.revision
+    return changed
+
+
+def _space_record(space: GameSpace.Town | GameSpace.Wilds) -> Dict[str, Any]:
+    """A town or wilds as it's saved: where it is, and its state -- all of what play can change about it."""
+    if isinstance(space, GameSpace.Town):
+        state = dict(
+            store=[_class_path(item) for item in space.store.inventory],
+            price_ratio=space.store.price_ratio,
         )
+    else:
+        state = dict(probabilities=[event.probability for event in space.events])
+    return dict(x=space.x, y=space.y, state=state)
+
 
-        equipped = [
-            (_class_path(item), slot)
-            for slot in EquipmentSet.SLOTS
-            for item in [getattr(character.equipment_set, slot)]
-            if type(item) not in EquipmentSet.SLOTS.values()
-        ]  # the bare base classes are empty slots
-        self.connection.executemany(
-            "INSERT INTO item (discord_id, class_path, slot) VALUES (?, ?, ?)",
-            [(discord_id, class_path, slot) for class_path, slot in equipped]
-            + [(discord_id, _class_path(item), None) for item in character.inventory],
+def _restore_space(world: GameSpace.World, record: Dict[str, Any]):
+    """Put a saved town's or wilds' state back onto the one the seed made there."""
+    space, state = world.map[record["y"]][record["x"]], record["state"]
+    if isinstance(space, GameSpace.Town) and "store" in state:
+        space.store.inventory[:] = [
+            _resolve(class_path, Equipment)() for class_path in state["store"]
+        ]
+        space.store.price_ratio = state["price_ratio"]
+    elif isinstance(space, GameSpace.Wilds) and "probabilities" in state:
+        space.reweigh(state["probabilities"])
+    else:
+        LOG.warning(
+            f"Saved state for {(space.x, space.y)} doesn't fit the {type(space).__name__} the seed made there; "
+            f"dropping it"
         )
@@ -1,11 +1,23 @@
 from __future__ import annotations
 
 import asyncio
+import contextlib
 import inspect
+import io
 import logging
-import random
 import time
-from typing import Any, Callable, Dict, Iterator, List, Sequence, Tuple, cast
+from dataclasses import dataclass
+from typing import (
+    Any,
+    Callable,
+    ContextManager,
+    Dict,
+    Iterator,
+    List,
+    Sequence,
+    Tuple,
+    cast,
+)
 
 import discord
 from discord import app_commands
@@ -16,6 +28,8 @@ from ConfigParser import DISCORD_PREFIX
 from Discordia.GameLogic import GameSpace
 from Discordia.GameLogic.GameSpace import PlayerActionResponse, DIRECTION_VECTORS
 from Discordia.GameLogic.Items import Equipment
+from Discordia.Interface.Mailbox import Mailbox
+from Discordia.Interface.Simulation import Simulation
 from Discordia.Interface.WorldAdapter import (
     WorldAdapter,
     AlreadyRegisteredException,
@@ -50,6 +64,39 @@ SUPERSEDED = (
 )  # what an order resolves to when the player replaces it before the tick
 
 
+class TimeSlice:
+    """A budget of time on the event loop, for long work that has to share it with the commands.
+
+    Call checkpoint() between units of work: once the slice is used up it yields to whatever else is waiting,
+    and starts a fresh one.
+    """
+
+    def __init__(self, seconds: float):
+        self.seconds = seconds
+        self._started = time.perf_counter()
+
+    async def checkpoint(self):
+        if time.perf_counter() - self._started < self.seconds:
+            return
+        await asyncio.sleep(0)
+        self._started = time.perf_counter()
+
+
+# An order as after_tick sees it: who gave it, and the command and arguments they gave
+OrderRecord = Tuple[Actors.PlayerCharacter, Sequence[str]]
+
+
+@dataclass
+class _Order:
+    """An order waiting for the tick. The seed is World.order_turns', filled in when the tick comes."""
+
+    character: Actors.PlayerCharacter
+    action: Callable[[], Any]
+    future: asyncio.Future
+    description: Sequence[str]
+    seed: int = 0
+
+
 def _character(interaction: discord.Interaction) -> Actors.PlayerCharacter:
     """The character behind an interaction. Checks only get the interaction, so dig the cog out of the command."""
     cog = getattr(interaction.command, "binding", None)
@@ -86,8 +133,13 @@ def requires_space(space_type: type[GameSpace.Space]):
 
 
 def _town_of(character: Actors.PlayerCharacter) -> GameSpace.Town:
-    """The town the character is standing in. Only valid under @requires_space(GameSpace.Town)."""
-    return cast(GameSpace.Town, character.location)
+    """
+    The town the character is standing in. Call it holding the world: with a Simulation ticking, the character
+    can have moved on since @requires_space(GameSpace.Town) looked.
+    """
+    if not isinstance(character.location, GameSpace.Town):
+        raise InvalidSpaceException("You need to be in a town to do that.")
+    return character.location
 
 
 def _chunks(text: str, size: int = 2000) -> Iterator[str]:
@@ -120,8 +172,18 @@ class DiscordInterface(commands.Cog):
         world_adapter: WorldAdapter,
         jobs: Sequence[Tuple[float, Callable[[], None], str]] = (),
         tick_seconds: float = 5.0,
+        slice_seconds: float = 0.05,
+        simulation: Simulation | None = None,
+        after_tick: (
+            Callable[[List[OrderRecord], List[PlayerActionResponse]], Any] | None
+        ) = None,
     ):
-        """`jobs` are (seconds, action, name) triples run periodically alongside the commands."""
+        """
+        `jobs` are (seconds, action, name) triples run periodically alongside the commands. `slice_seconds` is the
+        longest the tick holds the event loop before letting a command in. A `simulation` runs the tick on its
+        own thread instead; commands then take its lock to touch the world. `after_tick` is handed the orders
+        each tick resolved, in the order they resolved in, and what the world did to players: a journal, say.
+        """
         self.bot: commands.Bot = commands.Bot(
             command_prefix=str(DISCORD_PREFIX), intents=discord.Intents.default()
         )
@@ -130,18 +192,24 @@ class DiscordInterface(commands.Cog):
         self.world_adapter: WorldAdapter = world_adapter
         self.jobs = jobs
         self.tick_seconds = tick_seconds
+        self.slice_seconds = slice_seconds
+        self.overruns = 0  # ticks that took longer than tick_seconds
+        self.simulation = simulation
         self._job_loops: List[tasks.Loop] = (
             []
         )  # kept alive; a Loop nobody holds gets collected
-        self._orders: Dict[
-            Actors.PlayerCharacter, Tuple[Callable[[], Any], asyncio.Future]
-        ] = {}
+        self.after_tick = after_tick
+        self._orders: Dict[Actors.PlayerCharacter, _Order] = {}
+        self.mailbox = Mailbox(self._dm)
+        # Users fetched from the API, which discord.py doesn't keep: fetching is a request, and rate-limited
+        self._users: Dict[int, discord.abc.Messageable] = {}
 
     def _start_job(self, seconds: float, action: Callable[[], Any], name: str):
-        """Run `action` every `seconds` on the bot's event loop: same thread as the commands, so no locking.
+        """Run `action` every `seconds` on the bot's event loop: same thread as the commands, so no locking
+        unless there's a Simulation ticking on a thread of its own.
 
-        Each job blocks command handling while it runs, which is why they're all short. A job may be
-        a coroutine function; the tick is one, because it sends DMs.
+        Each job blocks command handling while it runs, which is why they're all short, or cut into slices like
+        the tick. A job may be a coroutine function; the tick is one, because it yields and sends DMs.
         """
 
         @tasks.loop(seconds=seconds)
@@ -157,45 +225,114 @@ class DiscordInterface(commands.Cog):
         self._job_loops.append(job)
 
     def order(
-        self, character: Actors.PlayerCharacter, action: Callable[[], Any]
+        self,
+        character: Actors.PlayerCharacter,
+        action: Callable[[], Any],
+        description: Sequence[str] = (),
     ) -> asyncio.Future:
         """Hold a world-changing action until the next tick, and hand back its eventual result.
 
         One order per character: typing a second one before the tick replaces the first, whose command
-        gets SUPERSEDED back. Spamming a command therefore buys nothing but a change of mind.
+        gets SUPERSEDED back. Spamming a command therefore buys nothing but a change of mind. `description`
+        is the command and its arguments, for after_tick to log: the action itself is just a closure.
         """
-        _, previous = self._orders.pop(character, (None, None))
-        if previous is not None and not previous.done():
-            previous.set_result(SUPERSEDED)
+        previous = self._orders.pop(character, None)
+        if previous is not None and not previous.future.done():
+            previous.future.set_result(SUPERSEDED)
         future = asyncio.get_running_loop().create_future()
-        self._orders[character] = (action, future)
+        self._orders[character] = _Order(character, action, future, description)
         return future
 
     async def tick(self):
-        """Resolve everyone's orders, then let the world act. Same-tick orders resolve in random order."""
-        orders, self._orders = self._orders, {}
-        for action, future in random.sample(list(orders.values()), len(orders)):
-            if future.done():  # the command that asked for it went away
-                continue
-            try:
-                future.set_result(action())
-            except Exception as exc:
-                future.set_exception(exc)
-        # One DM per player per tick, however many NPCs piled on: Discord rate-limits, players tilt.
+        """Resolve everyone's orders, then let the world act. Same-tick orders resolve in an order drawn from
+        the world's order stream, so a tick can be replayed.
+
+        With a Simulation, all of that happens on its thread while the event loop carries on. Without one it
+        happens here, in slices of at most `slice_seconds`, handing the event loop back to the commands in
+        between: a crowded world makes the tick slower rather than the bot unresponsive. Either way, a tick
+        that doesn't fit in `tick_seconds` is logged and counted in `overruns`.
+        """
+        started = time.perf_counter()
+        orders, self._orders = list(self._orders.values()), {}
+        world = self.world_adapter.world
+        with self._world():
+            turns = world.order_turns(len(orders))
+        orders_in_turn = []
+        for index, seed in turns:
+            orders[index].seed = seed
+            orders_in_turn.append(orders[index])
+        if self.simulation is None:
+            resolved, events = await self._tick_here(orders_in_turn)
+        else:
+            resolved, events = await self._tick_in_simulation(orders_in_turn)
+        if self.after_tick is not None:
+            self.after_tick(
+                [(order.character, order.description) for order in resolved], events
+            )
+
+        elapsed = time.perf_counter() - started
+        if elapsed > self.tick_seconds:
+            self.overruns += 1
+            LOG.warning(
+                f"World tick took {elapsed:.2f}s, longer than the {self.tick_seconds}s between ticks "
+                f"({self.overruns} overruns so far)"
+            )
+
+        # One DM per player per tick, however many NPCs piled on: Discord rate-limits, players tilt. The
+        # mailbox sends them after the tick's done, and folds in later ticks' if they're still waiting.
         news: Dict[Actors.Actor, List[str]] = {}
-        for event in self.world_adapter.world.tick():
+        for event in events:
             if event.target is not None:
                 news.setdefault(event.target, []).append(event.text)
+        member_ids = self.world_adapter.get_member_ids(news)
         for character, lines in news.items():
-            await self._dm(character, "\n".join(lines))
+            if character in member_ids:
+                self.mailbox.post(member_ids[character], lines)
+
+    async def _tick_here(
+        self, orders: List[_Order]
+    ) -> Tuple[List[_Order], List[PlayerActionResponse]]:
+        world = self.world_adapter.world
+        time_slice = TimeSlice(self.slice_seconds)
+        resolved = []
+        for order in orders:
+            if order.future.done():  # the command that asked for it went away
+                continue
+            try:
+                order.future.set_result(world.run_order(order.action, order.seed))
+            except Exception as exc:
+                order.future.set_exception(exc)
+            resolved.append(order)
+            await time_slice.checkpoint()
+        events: List[PlayerActionResponse] = []
+        for _ in self.world_adapter.world.tick_in_steps(events):
+            await time_slice.checkpoint()
+        return resolved, events
+
+    async def _tick_in_simulation(
+        self, orders: List[_Order]
+    ) -> Tuple[List[_Order], List[PlayerActionResponse]]:
+        assert self.simulation is not None
+        resolved = [order for order in orders if not order.future.done()]
+        outcomes, events = await asyncio.wrap_future(
+            self.simulation.tick([(order.action, order.seed) for order in resolved])
+        )
+        # Futures belong to the event loop, so they're settled here rather than on the simulation's thread
+        for order, (result, exc) in zip(resolved, outcomes):
+            if order.future.done():
+                continue
+            if exc is None:
+                order.future.set_result(result)
+            else:
+                order.future.set_exception(exc)
+        return resolved, events
 
-    async def _dm(self, character: Actors.Actor, text: str):
+    async def _dm(self, member_id: int, text: str):
         """Tell a player something that happened while they weren't looking. Best effort: DMs can be closed."""
-        member_id = self.world_adapter.get_member_id(character)
-        if member_id is None:
-            return
         try:
-            user = self.bot.get_user(member_id) or await self.bot.fetch_user(member_id)
+            user = self._users.get(member_id) or self.bot.get_user(member_id)
+            if user is None:
+                user = self._users[member_id] = await self.bot.fetch_user(member_id)
             for chunk in _chunks(text):
                 await user.send(chunk)
         except discord.HTTPException:  # closed DMs, blocked bot, deleted account
@@ -249,6 +386,14 @@ class DiscordInterface(commands.Cog):
     def _player(self, interaction: discord.Interaction) -> Actors.PlayerCharacter:
         return self.world_adapter.get_player(interaction.user.id)
 
+    def _world(self) -> ContextManager:
+        """Hold the world still while a command reads or changes it. Only needed with a Simulation ticking it."""
+        return (
+            contextlib.nullcontext()
+            if self.simulation is None
+            else self.simulation.lock
+        )
+
     @app_commands.command()
     async def register(
         self, interaction: discord.Interaction, name: app_commands.Range[str, 1, 32]
@@ -257,7 +402,8 @@ class DiscordInterface(commands.Cog):
         LOG.info(
             f"/register called by {interaction.user.display_name}: <{interaction.user.id}>"
         )
-        self.world_adapter.register_player(interaction.user.id, player_name=name)
+        with self._world():
+            self.world_adapter.register_player(interaction.user.id, player_name=name)
         await _send(interaction, f"Welcome, {name}! Good luck out there, comrade!")
 
     @app_commands.command()
@@ -265,37 +411,42 @@ class DiscordInterface(commands.Cog):
     async def equipment(self, interaction: discord.Interaction):
         """List all equipped items on character"""
         character = self._player(interaction)
-        await _send(
-            interaction, f"Equipment: \n" f"---------- \n" f"{character.equipment_set}"
-        )
+        with self._world():
+            msg = f"Equipment: \n" f"---------- \n" f"{character.equipment_set}"
+        await _send(interaction, msg)
 
     @app_commands.command()
     @requires_character()
     async def look(self, interaction: discord.Interaction):
         """Describes your character's surroundings"""
         await interaction.response.defer()
-        character = self._player(interaction)
-        msg = f"Your coordinates are {character.location}. The terrain is {character.location.terrain.name}-y. "
-        if self.world_adapter.is_town(character.location):
-            msg += f"You are also in a town, {character.location.name}. "
-        if self.world_adapter.is_wilds(character.location):
-            msg += f"You are also in the wilds, {character.location.name}. "
-        nearby_npcs = self.world_adapter.get_nearby_npcs(character)
-        if nearby_npcs:
-            msg += "There are some NPCs nearby: \n" + ", ".join(
-                [str(npc) for npc in nearby_npcs]
-            )
-        nearby_players = self.world_adapter.get_nearby_players(character)
-        if len(nearby_players) > 1:
-            msg += "\nThere are also some Players nearby: \n" + ", ".join(
-                [
-                    player.name
-                    for player in nearby_players
-                    if player.name != character.name
-                ]
-            )
-        screenshot_path = self.world_adapter.get_player_screenshot(character)
-        files = [discord.File(screenshot_path)] if screenshot_path else []
+        with self._world():
+            character = self._player(interaction)
+            msg = f"Your coordinates are {character.location}. The terrain is {character.location.terrain.name}-y. "
+            if self.world_adapter.is_town(character.location):
+                msg += f"You are also in a town, {character.location.name}. "
+            if self.world_adapter.is_wilds(character.location):
+                msg += f"You are also in the wilds, {character.location.name}. "
+            nearby_npcs = self.world_adapter.get_nearby_npcs(character)
+            if nearby_npcs:
+                msg += "There are some NPCs nearby: \n" + ", ".join(
+                    [str(npc) for npc in nearby_npcs]
+                )
+            nearby_players = self.world_adapter.get_nearby_players(character)
+            if len(nearby_players) > 1:
+                msg += "\nThere are also some Players nearby: \n" + ", ".join(
+                    [
+                        player.name
+                        for player in nearby_players
+                        if player.name != character.name
+                    ]
+                )
+            screenshot = self.world_adapter.get_player_screenshot(character)
+        files = []
+        if screenshot is not None:
+            # Drawn on a render thread; all that's left for the event loop is the upload
+            png = await asyncio.wrap_future(screenshot)
+            files.append(discord.File(io.BytesIO(png), filename="view.png"))
         await interaction.followup.send(msg, files=files)
 
     @app_commands.command()
@@ -312,6 +463,7 @@ class DiscordInterface(commands.Cog):
             lambda: self.world_adapter.move_player(
                 character, DIRECTION_VECTORS[direction.value]
             ),
+            ("move", direction.value),
         )
         if results is SUPERSEDED:
             await interaction.followup.send("You change your mind before setting off.")
@@ -346,6 +498,7 @@ class DiscordInterface(commands.Cog):
             lambda: self.world_adapter.attack(
                 character, DIRECTION_VECTORS[direction.value]
             ),
+            ("attack", direction.value),
         )
         if response is SUPERSEDED:
             await interaction.followup.send("You hold your fire.")
@@ -364,12 +517,13 @@ class DiscordInterface(commands.Cog):
     async def inventory_list(self, interaction: discord.Interaction):
         """Lists all the items in your inventory with ID #"""
         character = self._player(interaction)
-        msg = f"{character.name}'s inventory:\n"
-        if not character.inventory:
-            msg += "\t(Empty)"
-        else:
-            for index, item in enumerate(character.inventory):
-                msg += f"\t#{index}\t{item}\n"
+        with self._world():
+            msg = f"{character.name}'s inventory:\n"
+            if not character.inventory:
+                msg += "\t(Empty)"
+            else:
+                for index, item in enumerate(character.inventory):
+                    msg += f"\t#{index}\t{item}\n"
         await _send(interaction, msg)
 
     @inventory.command()
@@ -377,12 +531,16 @@ class DiscordInterface(commands.Cog):
     async def equip(self, interaction: discord.Interaction, index: int):
         """Equip the item at the given index"""
         character = self._player(interaction)
-        try:
-            item: Equipment = character.inventory[index]
-        except IndexError:
+        with self._world():
+            try:
+                item: Equipment | None = character.inventory[index]
+            except IndexError:
+                item = None
+            else:
+                character.equip(item)
+        if item is None:
             await _send(interaction, f"Given index {index} is invalid.", ephemeral=True)
             return
-        character.equip(item)
         await _send(interaction, f"Equipped {item.name}.")
 
     @inventory.command()
@@ -390,12 +548,16 @@ class DiscordInterface(commands.Cog):
     async def unequip(self, interaction: discord.Interaction, index: int):
         """Unequip the item at the given index"""
         character = self._player(interaction)
-        try:
-            item: Equipment = character.inventory[index]
-        except IndexError:
+        with self._world():
+            try:
+                item: Equipment | None = character.inventory[index]
+            except IndexError:
+                item = None
+            else:
+                character.unequip(item)
+        if item is None:
             await _send(interaction, f"Given index {index} is invalid.", ephemeral=True)
             return
-        character.unequip(item)
         await _send(interaction, f"Unequipped {item.name}.")
 
     @town.command(name="status")
@@ -403,8 +565,10 @@ class DiscordInterface(commands.Cog):
     async def town_status(self, interaction: discord.Interaction):
         """Check if you're in a town."""
         character = self._player(interaction)
-        if self.world_adapter.is_town(character.location):
-            await _send(interaction, f"You're currently in {character.location.name}.")
+        with self._world():
+            location = character.location
+        if self.world_adapter.is_town(location):
+            await _send(interaction, f"You're currently in {location.name}.")
         else:
             await _send(interaction, "You're currently not in a town...")
 
@@ -414,7 +578,8 @@ class DiscordInterface(commands.Cog):
     async def inn(self, interaction: discord.Interaction):
         """Rest to restore hitpoints."""
         character = self._player(interaction)
-        resp: PlayerActionResponse = _town_of(character).inn_event(character)
+        with self._world():
+            resp: PlayerActionResponse = _town_of(character).inn_event(character)
         await _send(interaction, resp.text)
 
     @town.command()
@@ -423,7 +588,8 @@ class DiscordInterface(commands.Cog):
     async def recruit(self, interaction: discord.Interaction):
         """Change your player class to the one offered by the town."""
         character = self._player(interaction)
-        resp: PlayerActionResponse = _town_of(character).recruit(character)
+        with self._world():
+            resp: PlayerActionResponse = _town_of(character).recruit(character)
         await _send(interaction, resp.text)
 
     @store.command(name="list")
@@ -432,19 +598,17 @@ class DiscordInterface(commands.Cog):
     async def store_list(self, interaction: discord.Interaction):
         """List what this town's store has for sale"""
         character = self._player(interaction)
-        store = _town_of(character).store
-        if store is None:
-            await _send(interaction, NO_STORE)
-        elif not store.inventory:
-            await _send(
-                interaction,
-                "There are no items in the store at the moment. Please try again later.",
-            )
-        else:
-            msg = "Index\tName\tPrice\tCount\n"
-            for idx, item in enumerate(store.inventory):
-                msg += f"#{idx}\t{item.name}\t${store.get_price(item)}\t{store.inventory.count(item)}\n"
-            await _send(interaction, msg)
+        with self._world():
+            store = _town_of(character).store
+            if store is None:
+                msg = NO_STORE
+            elif not store.inventory:
+                msg = "There are no items in the store at the moment. Please try again later."
+            else:
+                msg = "Index\tName\tPrice\tCount\n"
+                for idx, item in enumerate(store.inventory):
+                    msg += f"#{idx}\t{item.name}\t${store.get_price(item)}\t{store.inventory.count(item)}\n"
+        await _send(interaction, msg)
 
     @store.command()
     @requires_character()
@@ -452,13 +616,16 @@ class DiscordInterface(commands.Cog):
     async def buy(self, interaction: discord.Interaction, index: int):
         """Buy the store item at the given index"""
         character = self._player(interaction)
-        store = _town_of(character).store
+        with self._world():
+            store = _town_of(character).store
+            bought = store is not None and store.sell_item(index, character)
         if store is None:
             await _send(interaction, NO_STORE)
-        elif store.sell_item(index, character):
-            await _send(interaction, "Item successfully bought.")
         else:
-            await _send(interaction, "Not enough money.")
+            await _send(
+                interaction,
+                "Item successfully bought." if bought else "Not enough money.",
+            )
 
     @store.command()
     @requires_character()
@@ -466,14 +633,17 @@ class DiscordInterface(commands.Cog):
     async def sell(self, interaction: discord.Interaction, index: int):
         """Sell the inventory item at the given index"""
         character = self._player(interaction)
-        store = _town_of(character).store
+        with self._world():
+            store = _town_of(character).store
+            try:
+                item: Equipment | None = character.inventory[index]
+            except IndexError:
+                item = None
+            if store is not None and item is not None:
+                price = store.buy_item(item, character)
         if store is None:
             await _send(interaction, NO_STORE)
-            return
-        try:
-            item: Equipment = character.inventory[index]
-        except IndexError:
+        elif item is None:
             await _send(interaction, f"Invalid index {index} given.", ephemeral=True)
-            return
-        price = store.buy_item(item, character)
-        await _send(interaction, f"Successfully sold {item.name} for ${price}.")
+        else:
+            await _send(interaction, f"Successfully sold {item.name} for ${price}.")
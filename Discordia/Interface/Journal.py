@@ -0,0 +1,72 @@
+"""
+An append-only log of what each tick changed, so a crash costs a tick's worth of play rather than everything since
+the last save.
+
+Database.save still writes whole snapshots, just less often. Between them, every tick appends one JSON line: the
+tick number, the orders it resolved, what the world did to players, and the saved form of each character, town and
+wilds that changed since the line before. Recovering is loading the snapshot, then applying every line after it in
+order. Each line holds whole characters and spaces, not differences, so applying one twice does no harm.
+
+Lines are flushed to the OS as they're written, which survives the server crashing, though not the machine.
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+from pathlib import Path
+from typing import Any, Dict, Iterator, List
+
+LOG = logging.getLogger("Discordia.Interface.Journal")
+
+
+class Journal:
+    def __init__(self, path: Path | str):
+        self.path = Path(path)
+        self._drop_torn_line()
+        self._file = open(self.path, "a", encoding="utf-8")
+
+    def _drop_torn_line(self):
+        """A crash mid-append leaves half a line; the next append would be glued onto it."""
+        if not self.path.exists():
+            return
+        with open(self.path, "rb+") as file:
+            contents = file.read()
+            if contents and not contents.endswith(b"\n"):
+                LOG.warning(f"Dropping a half-written line from the end of {self.path}")
+                file.truncate(contents.rfind(b"\n") + 1)
+
+    def append(
+        self,
+        tick: int,
+        orders: List[List[Any]],
+        events: List[List[Any]],
+        characters: List[Dict[str, Any]],
+        spaces: List[Dict[str, Any]],
+    ):
+        entry = dict(
+            tick=tick,
+            orders=orders,
+            events=events,
+            characters=characters,
+            spaces=spaces,
+        )
+        self._file.write(json.dumps(entry) + "\n")
+        self._file.flush()
+
+    def entries(self, after_tick: int) -> Iterator[Dict[str, Any]]:
+        """Every entry for a tick after `after_tick`, oldest first."""
+        self._file.flush()
+        with open(self.path, encoding="utf-8") as file:
+            for line in file:
+                entry = json.loads(line)
+                if entry["tick"] > after_tick:
+                    yield entry
+
+    def truncate(self):
+        """Forget every entry: a snapshot now has all of them."""
+        self._file.flush()
+        self._file.truncate(0)
+
+    def close(self):
+        self._file.close()
@@ -0,0 +1,63 @@
+"""
+DMs to players, sent without holding up the tick.
+
+The tick posts what happened to each player and carries on; the Mailbox does the sending, to up to `concurrency`
+players at once. Each player's DMs go out one at a time and in order. News posted for a player whose last DM hasn't
+gone yet is folded into it, so a player being hit every tick while Discord is slow gets one longer DM rather than a
+backlog.
+
+Rate limits are discord.py's job: it keeps a bucket per route, waits out one that's run dry and retries a 429. A DM
+channel is a route of its own, so DMing many players at once doesn't drain any one bucket. The semaphore keeps
+the requests in flight well under the global limit.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+from typing import Awaitable, Callable, Dict, Iterable, List
+
+LOG = logging.getLogger("Discordia.Interface.Mailbox")
+
+DM_CONCURRENCY = 8
+
+
+class Mailbox:
+    def __init__(
+        self,
+        send: Callable[[int, str], Awaitable[None]],
+        concurrency: int = DM_CONCURRENCY,
+    ):
+        """`send` DMs one member one message; DiscordInterface._dm, or a fake in the tests."""
+        self._send = send
+        self._semaphore = asyncio.Semaphore(concurrency)
+        # Lines posted for each member that haven't gone out yet
+        self._pending: Dict[int, List[str]] = {}
+        # The task sending to each member who has anything pending or in flight
+        self._senders: Dict[int, asyncio.Task] = {}
+
+    def post(self, member_id: int, lines: Iterable[str]):
+        """Queue lines for a member. Must be called on the event loop the DMs go out on."""
+        self._pending.setdefault(member_id, []).extend(lines)
+        if member_id not in self._senders:
+            self._senders[member_id] = asyncio.get_running_loop().create_task(
+                self._deliver(member_id)
+            )
+
+    async def drain(self):
+        """Wait until everything posted so far, and anything posted meanwhile, has been sent."""
+        while self._senders:
+            await asyncio.gather(*self._senders.values())
+
+    async def _deliver(self, member_id: int):
+        try:
+            while member_id in self._pending:
+                async with self._semaphore:
+                    # Taken only now, so whatever arrived while this waited for its turn goes in the same DM
+                    lines = self._pending.pop(member_id)
+                    try:
+                        await self._send(member_id, "\n".join(lines))
+                    except Exception:
+                        LOG.exception("Failed to DM %s", member_id)
+        finally:
+            del self._senders[member_id]
@@ -0,0 +1,155 @@
+"""
+An on-disk cache of generated maps, so a restart can load its map instead of generating it all over again.
+
+The database stays the single source of truth. It holds the seed, and the cache only holds what generating that
+seed came to: the terrain, where the towns and wilds went, and the seed or RNG state each was generated from (see
+GameSpace.MapRecord). It's keyed on everything that goes into a map, generator version included. A file that's
+missing, stale or unreadable just means generating the map again, and rewriting the file.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import os
+import zipfile
+from dataclasses import asdict
+from pathlib import Path
+
+import numpy as np
+
+from Discordia.GameLogic import GameSpace
+from Discordia.GameLogic.Procedural import RNGState, WorldGenerationParameters
+
+LOG = logging.getLogger("Discordia.Interface.MapCache")
+
+
+def cache_key(
+    seed: int, width: int, height: int, gen_params: WorldGenerationParameters
+) -> str:
+    """Everything a map depends on, hashed. Any of it changing makes a different map, and a different key."""
+    ingredients = [
+        GameSpace.MAP_GENERATOR_VERSION,
+        seed,
+        width,
+        height,
+        asdict(gen_params),
+    ]
+    return hashlib.sha256(json.dumps(ingredients, sort_keys=True).encode()).hexdigest()
+
+
+class MapCache:
+    """
+    One cached map, in a compressed .npz. A map made in regions keeps a seed per town and wilds.
+
+    A map generated whole has to keep the RNG state each was made from instead, about 5KB apiece: tens of megabytes
+    on disk for a few hundred tiles square, and more time writing the cache than it saves. Those are only cached
+    given whole_maps, and otherwise generated as if there were no cache.
+    """
+
+    def __init__(self, path: Path | str, whole_maps: bool = False):
+        self.path = Path(path)
+        self.whole_maps = whole_maps
+
+    def world(
+        self,
+        name: str,
+        width: int,
+        height: int,
+        gen_params: WorldGenerationParameters,
+        seed: int,
+        **options,
+    ) -> GameSpace.World:
+        """
+        The World this seed makes: replayed from the cache if it has it, else generated and cached. Options are
+        passed on to World.
+        """
+        args = (name, width, height, gen_params, seed)
+        if gen_params.chunk_size:
+            # Chunked maps are only ever generated as they're explored; there's nothing up front to cache
+            return GameSpace.World(*args, **options)
+        if not gen_params.region_size and not self.whole_maps:
+            return GameSpace.World(*args, **options)
+
+        key = cache_key(seed, width, height, gen_params)
+        record = self.read(key)
+        if record is not None:
+            return GameSpace.World(*args, replay=record, **options)
+        world = GameSpace.World(*args, record=True, **options)
+        self.write(key, world.map_record)
+        world.map_record = None  # the world has no use for it once it's on disk
+        return world
+
+    def read(self, key: str) -> GameSpace.MapRecord | None:
+        if not self.path.exists():
+            return None
+        try:
+            with np.load(self.path) as cached:
+                if str(cached["key"]) != key:
+                    LOG.info(f"Map cache {self.path} is for another map, regenerating")
+                    return None
+                return _unpack(cached)
+        except (OSError, KeyError, ValueError, zipfile.BadZipFile) as e:
+            LOG.warning(f"Map cache {self.path} is unreadable ({e}), regenerating")
+            return None
+
+    def write(self, key: str, record: GameSpace.MapRecord):
+        # Written to the side and swapped in, so a crash mid-write never leaves half a cache to load
+        temporary = self.path.with_name(self.path.name + ".tmp")
+        with open(temporary, "wb") as file:
+            np.savez_compressed(file, key=np.array(key), **_pack(record))
+        os.replace(temporary, self.path)
+        LOG.info(f"Cached map to {self.path}")
+
+
+def _pack(record: GameSpace.MapRecord) -> dict:
+    origins = [origin for *_, origin in record.features]
+    seeded = not origins or not isinstance(origins[0], RNGState)
+    # One row per feature's RNG state, if that's what they were made from, with the state generation finished in as
+    # the last row. A map made in regions or chunks only needs its features' seeds, and the final state.
+    states = ([] if seeded else origins) + [record.final_state]
+    packed = dict(
+        terrain=record.terrain,
+        orientation=record.orientation,
+        features=np.array(
+            [feature[:3] for feature in record.features], dtype=np.int64
+        ).reshape(-1, 3),
+        starting_town=np.array(record.starting_town),
+        mt=np.stack([state.mt for state in states]),
+        gauss=np.array([np.nan if s.gauss is None else s.gauss for s in states]),
+        np_mt=np.stack([state.np_mt for state in states]),
+        np_pos=np.array([state.np_pos for state in states], dtype=np.int64),
+        np_gauss=np.array(
+            [np.nan if s.np_gauss is None else s.np_gauss for s in states]
+        ),
+    )
+    if seeded:
+        packed["seeds"] = np.array(origins, dtype=np.int64)
+    return packed
+
+
+def _unpack(cached) -> GameSpace.MapRecord:
+    gauss, np_gauss = cached["gauss"].tolist(), cached["np_gauss"].tolist()
+    mt, np_mt, np_pos = cached["mt"], cached["np_mt"], cached["np_pos"].tolist()
+    states = [
+        RNGState(
+            mt[i],
+            None if np.isnan(gauss[i]) else gauss[i],
+            np_mt[i],
+            np_pos[i],
+            None if np.isnan(np_gauss[i]) else np_gauss[i],
+        )
+        for i in range(len(mt))
+    ]
+    origins = cached["seeds"].tolist() if "seeds" in cached.files else states[:-1]
+    return GameSpace.MapRecord(
+        cached["terrain"],
+        cached["orientation"],
+        [
+            (x, y, level, origin)
+            for (x, y, level), origin in zip(cached["features"].tolist(), origins)
+        ],
+        int(cached["starting_town"]),
+        states[-1],
+    )
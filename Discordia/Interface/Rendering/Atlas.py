@@ -0,0 +1,116 @@
+"""
+Every sprite the world is drawn with, packed into one array, and drawing tiles out of it with NumPy.
+
+What's on each tile is a stack of layers, each an array of atlas indices: the ground, then the town or wilds on it,
+then whoever's standing there. Drawing any number of tiles is one gather from the atlas per layer, and one blend
+over the tiles that layer has anything on, so it costs by the pixel rather than by the tile. Index 0 is a
+transparent sprite, which is how a layer says there's nothing on a tile.
+
+An entry can be several sprites stacked into one, bottom first, worked out the first time it's asked for: water
+under a shoreline, say, or everyone sharing a tile.
+"""
+
+from __future__ import annotations
+
+from typing import Any, Callable, Tuple
+
+import numpy as np
+import pixelhouse as ph
+
+
+class keydefaultdict(dict):
+    """dict that fills a missing entry by calling factory(key). defaultdict can't: its factory takes no arguments."""
+
+    def __init__(self, factory: Callable[[Any], Any]):
+        super().__init__()
+        self.factory = factory
+        self._miss_count = 0
+
+    def __missing__(self, key):
+        self._miss_count += 1
+        ret = self[key] = self.factory(key)
+        return ret
+
+    @property
+    def miss_count(self):
+        return self._miss_count
+
+
+# What layers of atlas indices are kept in: they're a whole world's worth for WindowRenderer
+INDEX_DTYPE = np.uint16
+
+
+class SpriteAtlas:
+    def __init__(self):
+        # Every entry, all the same size. Only ever grown, so an index once handed out means the same sprite for good.
+        self.sprites: np.ndarray = np.zeros((0, 0, 0, 4), dtype=np.uint8)
+        self._indices = keydefaultdict(self._add)
+
+    @property
+    def cell_width(self) -> int:
+        return self.sprites.shape[2]
+
+    @property
+    def cell_height(self) -> int:
+        return self.sprites.shape[1]
+
+    @property
+    def miss_count(self) -> int:
+        return self._indices.miss_count
+
+    def index(self, *paths: str) -> int:
+        """The entry for the sprites at paths stacked bottom first, added if it's new. 0, the blank one, for none."""
+        if not paths:
+            return 0
+        return self._indices[paths]
+
+    def _add(self, paths: Tuple[str, ...]) -> int:
+        if len(paths) == 1:
+            sprite = ph.Canvas().load(paths[0]).img
+        else:
+            # Indexes first: adding one replaces self.sprites
+            indices = [self.index(path) for path in paths]
+            sprite = self.sprites[indices[0]]
+            for index in indices[1:]:
+                sprite = _blend(sprite, self.sprites[index])
+        if len(self.sprites) > np.iinfo(INDEX_DTYPE).max:
+            raise OverflowError(f"More sprites than {INDEX_DTYPE.__name__} indices")
+        if not len(self.sprites):
+            # The first sprite settles the size, and the blank one goes in ahead of it
+            self.sprites = np.zeros((1, *sprite.shape), dtype=np.uint8)
+        # A new array rather than resized in place: one handed out is never written to again, so it's safe to draw
+        # from on any thread
+        self.sprites = np.concatenate([self.sprites, sprite[np.newaxis]])
+        return len(self.sprites) - 1
+
+    def draw(self, *layers: np.ndarray) -> np.ndarray:
+        return draw(self.sprites, *layers)
+
+    def image(self, *layers: np.ndarray) -> np.ndarray:
+        return image(self.sprites, *layers)
+
+
+def draw(sprites: np.ndarray, *layers: np.ndarray) -> np.ndarray:
+    """
+    The tiles the layers describe, bottom first, out of an atlas's sprites. Layers all have the same shape; what
+    comes back has that shape too, with a sprite-sized RGBA image in each place.
+    """
+    tiles = sprites[layers[0]]
+    for layer in layers[1:]:
+        drawn = layer != 0
+        if drawn.any():
+            tiles[drawn] = _blend(tiles[drawn], sprites[layer[drawn]])
+    return tiles
+
+
+def image(sprites: np.ndarray, *layers: np.ndarray) -> np.ndarray:
+    """As draw, for layers that are grids of tiles, laid out as the one image."""
+    tiles = draw(sprites, *layers)
+    rows, columns, height, width, channels = tiles.shape
+    return tiles.swapaxes(1, 2).reshape(rows * height, columns * width, channels)
+
+
+def _blend(under: np.ndarray, over: np.ndarray) -> np.ndarray:
+    # Canvas.blend's sums, in integers: over, as opaque as its alpha says, on under
+    alpha = over[..., 3:].astype(np.uint16)
+    return ((under * (255 - alpha) + over * alpha) // 255).astype(np.uint8)
@@ -8,84 +8,73 @@ from __future__ import annotations
 
 import logging
 import time
-from typing import Any, Callable
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Tuple
 
+import cv2
+import numpy as np
 import pixelhouse as ph
 
 
 from Discordia.GameLogic import Actors, GameSpace
+from Discordia.Interface.Rendering import Atlas
+from Discordia.Interface.Rendering.Atlas import INDEX_DTYPE, SpriteAtlas
 from Discordia.Interface.WorldAdapter import WorldAdapter
 
 LOG = logging.getLogger("Discordia.Interface.DesktopApp")
 WINDOW_NAME = "Discordia"
+# Encoded player views kept for the next /look of the same patch of map; see get_player_view
+VIEW_CACHE_SIZE = 256
+# Threads drawing and encoding player views, off whichever thread asked for them
+RENDER_THREADS = 2
+# Frames a second update_display draws at most
+FPS = 10.0
 
 
-class keydefaultdict(dict):
-    """dict that fills a missing entry by calling factory(key). defaultdict can't: its factory takes no arguments."""
+class ViewRenderer:
+    """
+    Players' views, drawn straight from the world as they're asked for. Only the tiles in view are ever looked at,
+    so it costs the same however big the world is: what a chunked one gets, where WindowRenderer's whole-world
+    layers and framebuffer would run to gigabytes.
+    """
 
-    def __init__(self, factory: Callable[[Any], Any]):
-        super().__init__()
-        self.factory = factory
-        self._miss_count = 0
-
-    def __missing__(self, key):
-        self._miss_count += 1
-        ret = self[key] = self.factory(key)
-        return ret
-
-    @property
-    def miss_count(self):
-        return self._miss_count
-
-
-class WindowRenderer:
     def __init__(self, world_adapter: WorldAdapter):
         self.world_adapter = world_adapter
         self.world_adapter.add_renderer(self)
 
-        self.terrain_map = [
+        self.atlas = SpriteAtlas()
+        water = GameSpace.WaterTerrain().sprite_path_string
+        self._water = self.atlas.index(water)
+        # Each terrain over water, by terrain code then orientation code, like the map's arrays
+        self._ground_lut = np.array(
             [
-                ph.Canvas().load(GameSpace.WaterTerrain().sprite_path_string)
-                for x in range(self.world_adapter.width)
-            ]
-            for y in range(self.world_adapter.height)
-        ]
-
-        self.rendered_canvas = ph.gridstack(self.terrain_map)
-        self.rendered_canvas.name = WINDOW_NAME
-
-        self.base_cell_width = self.terrain_map[0][0].width
-        self.base_cell_height = self.terrain_map[0][0].height
+                [
+                    self.atlas.index(water, terrain.sprite_path_string)
+                    for terrain in tiles
+                ]
+                for tiles in GameSpace.TERRAIN_TILES
+            ],
+            dtype=INDEX_DTYPE,
+        )
+        self.base_cell_width = self.atlas.cell_width
+        self.base_cell_height = self.atlas.cell_height
 
-        self._sprite_cache = keydefaultdict(lambda k: ph.Canvas().load(k))
+        # Threads are enough: drawing is NumPy and encoding is OpenCV, and both let go of the GIL while they work
+        self._render_pool = ThreadPoolExecutor(
+            max_workers=RENDER_THREADS, thread_name_prefix="Render"
+        )
 
-    def on_draw(self, show_window=False) -> int | ph.Canvas:
-        for y, row in enumerate(self.terrain_map):
-            for x, cnv in enumerate(row):
-                with cnv.layer() as layer:
-                    layer += self._sprite_cache[
-                        self.world_adapter.world.map[y][x].terrain.sprite_path_string
-                    ]
-        for town in self.world_adapter.world.towns:
-            with self.terrain_map[town.y][town.x].layer() as layer:
-                layer += self._sprite_cache[town.sprite_path_string]
-        for wilds in self.world_adapter.world.wilds:
-            with self.terrain_map[wilds.y][wilds.x].layer() as layer:
-                layer += self._sprite_cache[wilds.sprite_path_string]
-        for player in self.world_adapter.iter_players():
-            x, y = player.location.x, player.location.y
-            with self.terrain_map[y][x].layer() as layer:
-                layer += self._sprite_cache[player.sprite_path_string]
-
-        self.rendered_canvas: ph.Canvas = ph.gridstack(self.terrain_map)
-        self.rendered_canvas.name = WINDOW_NAME
+    def get_player_view(self, character: Actors.PlayerCharacter) -> Future[bytes]:
+        """What the character can see, as a PNG, drawn and encoded on one of the render threads."""
+        x1, y1, x2, y2 = self._view_bounds(character)
+        LOG.debug(f"Rendering PlayerView: {character.name} {x1} {y1} {x2} {y2}")
+        return self._render_pool.submit(self.snapshot(x1, y1, x2, y2).png)
 
-        if show_window:
-            return self.rendered_canvas.show(1, return_status=True)
-        else:
-            return -1
-
-    def get_player_view(self, character: Actors.PlayerCharacter) -> str:
+    def _view_bounds(
+        self, character: Actors.PlayerCharacter
+    ) -> Tuple[int, int, int, int]:
         # Need to find top left coordinate
         # Find tile first
         top_left_tile: GameSpace.Space = character.location - (
@@ -100,15 +89,165 @@ class WindowRenderer:
         width = height = (character.fov * 2) + 1
         x2 = min(max(top_left_tile.x + width, 0), self.world_adapter.width)
         y2 = min(max(top_left_tile.y + height, 0), self.world_adapter.height)
+        return x1, y1, x2, y2
 
-        # Debugging
-        LOG.info(f"Getting PlayerView: {character.name} {x1} {y1} {x2} {y2}")
+    def snapshot(self, x1: int, y1: int, x2: int, y2: int) -> ViewSnapshot:
+        """
+        What's on the tiles from (x1, y1) up to (x2, y2), read off the world, so it can be drawn while the world
+        moves on. On the world's own thread: a chunk in view that isn't loaded yet is generated.
+        """
+        shape = (y2 - y1, x2 - x1)
+        ground = np.empty(shape, dtype=self._ground_lut.dtype)
+        structures = np.zeros(shape, dtype=ground.dtype)
+        occupants = np.zeros(shape, dtype=ground.dtype)
+        for y in range(y1, y2):
+            for x in range(x1, x2):
+                ground[y - y1, x - x1], structures[y - y1, x - x1] = self._ground_at(
+                    x, y
+                )
+                occupants[y - y1, x - x1] = self._occupants_at(x, y)
+        return ViewSnapshot(self.atlas.sprites, (ground, structures, occupants))
 
-        view = [self.terrain_map[i][x1:x2] for i in range(y1, y2)]
-        img = ph.gridstack(view)
-        img_path = f"./Discordia/PlayerViews/{character.name}_screenshot.png"
-        img.save(img_path)
-        return str(img_path)
+    def _ground_at(self, x: int, y: int) -> Tuple[int, int]:
+        """The atlas indices of the terrain at (x, y), and of the town or wilds there, 0 if there's none."""
+        world_map = self.world_adapter.world.map
+        terrain = world_map.terrain_at(x, y)
+        space = world_map.spaces.get((x, y))
+        return (
+            self._ground_lut[terrain.code, terrain.orientation_code],
+            self.atlas.index(space.sprite_path_string) if space is not None else 0,
+        )
+
+    def _occupants_at(self, x: int, y: int) -> int:
+        """The atlas index of everyone standing on (x, y), stacked in the order they arrived."""
+        players = self.world_adapter.world.occupancy.at(x, y, Actors.PlayerCharacter)
+        return self.atlas.index(*(player.sprite_path_string for player in players))
+
+    def close(self):
+        """Finish the views being drawn, and stop the render threads."""
+        self._render_pool.shutdown(wait=True)
+
+
+class WindowRenderer(ViewRenderer):
+    """
+    The whole world drawn into one framebuffer, rendered_canvas, that's touched up tile by tile as things change
+    rather than drawn again every frame.
+
+    What's on each tile is kept as SpriteAtlas indices, a grid per layer: ground, structures, occupants. They're
+    updated as the map and the players' whereabouts say tiles have changed, and the tiles that did are drawn out
+    of the atlas into the framebuffer together. A frame nothing happened in costs nothing.
+
+    All of that is the size of the whole world. For a chunked one, use a ViewRenderer.
+    """
+
+    def __init__(self, world_adapter: WorldAdapter):
+        super().__init__(world_adapter)
+        world = self.world_adapter.world
+        shape = (self.world_adapter.height, self.world_adapter.width)
+
+        # Unless it's loaded, drawing it would generate it; nobody's been there to see it yet
+        self.ground = np.full(shape, self._water, dtype=INDEX_DTYPE)
+        self.structures = np.zeros(shape, dtype=self.ground.dtype)
+        self.occupants = np.zeros(shape, dtype=self.ground.dtype)
+
+        # Hear about everything that changes from here on, then fill in what's there already
+        with world.map.lock:
+            world.map.watch()
+            for x0, y0, terrain, orientation in world.map.loaded_blocks():
+                height, width = terrain.shape
+                self.ground[y0 : y0 + height, x0 : x0 + width] = self._ground_lut[
+                    terrain, orientation
+                ]
+            for (x, y), space in world.map.spaces.items():
+                self.structures[y, x] = self.atlas.index(space.sprite_path_string)
+        with world.occupancy.lock:
+            world.occupancy.watch(Actors.PlayerCharacter)
+            for player in self.world_adapter.iter_players():
+                if player.location is not None:
+                    self._set_occupants(player.location.x, player.location.y)
+
+        self.rendered_canvas = ph.Canvas()
+        self.rendered_canvas.img = self.render(0, 0, shape[1], shape[0])
+        self.rendered_canvas.name = WINDOW_NAME
+        # The same pixels, indexed by tile: [y, x] is that tile's image
+        self._framebuffer_tiles = self.rendered_canvas.img.reshape(
+            shape[0], self.base_cell_height, shape[1], self.base_cell_width, -1
+        ).swapaxes(1, 2)
+
+        # How many times each tile has been drawn. A view's pixels can only have changed if the versions of the tiles
+        # in it have.
+        self.tile_versions = np.zeros(shape, dtype=np.uint32)
+        # PNGs, drawn or on their way, by (x1, y1, x2, y2, sum of the tile versions in there), least recently looked at
+        # first. Only ever touched from the thread asking for views.
+        self._views: OrderedDict[Tuple[int, int, int, int, int], Future[bytes]] = (
+            OrderedDict()
+        )
+
+    def on_draw(self, show_window=False) -> int | ph.Canvas:
+        world = self.world_adapter.world
+        # Each held from taking the changes to reading what's there now, so a change on the world's thread is
+        # either in this frame or the next, and never half in this one
+        with world.map.lock:
+            repainted = world.map.take_changed()
+            for x, y in repainted:
+                self._set_ground(x, y)
+        with world.occupancy.lock:
+            moved = world.occupancy.take_changed()
+            for x, y in moved:
+                self._set_occupants(x, y)
+
+        changed = repainted | moved
+        if changed:
+            xs, ys = np.array(list(changed)).T
+            self._framebuffer_tiles[ys, xs] = self.atlas.draw(
+                self.ground[ys, xs], self.structures[ys, xs], self.occupants[ys, xs]
+            )
+            self.tile_versions[ys, xs] += 1
+
+        if show_window:
+            return self.rendered_canvas.show(1, return_status=True)
+        else:
+            return -1
+
+    def render(self, x1: int, y1: int, x2: int, y2: int) -> np.ndarray:
+        """The tiles from (x1, y1) up to (x2, y2) as an RGBA image, drawn afresh from the layers."""
+        return self.snapshot(x1, y1, x2, y2).image()
+
+    def _set_ground(self, x: int, y: int):
+        self.ground[y, x], self.structures[y, x] = self._ground_at(x, y)
+
+    def _set_occupants(self, x: int, y: int):
+        self.occupants[y, x] = self._occupants_at(x, y)
+
+    def get_player_view(self, character: Actors.PlayerCharacter) -> Future[bytes]:
+        """
+        As ViewRenderer's, only once per look at a patch of map that has changed since the last: idle players
+        looking around the same spot again are handed the one they were last time, and players looking at the same
+        spot at once share the one being drawn.
+        """
+        x1, y1, x2, y2 = self._view_bounds(character)
+        key = (x1, y1, x2, y2, int(self.tile_versions[y1:y2, x1:x2].sum()))
+        view = self._views.get(key)
+        # One that failed is tried again rather than handed out forever
+        if view is None or (view.done() and view.exception() is not None):
+            view = super().get_player_view(character)
+            self._views[key] = view
+            if len(self._views) > VIEW_CACHE_SIZE:
+                self._views.popitem(last=False)
+        else:
+            self._views.move_to_end(key)
+        return view
+
+    def snapshot(self, x1: int, y1: int, x2: int, y2: int) -> ViewSnapshot:
+        """What's on the tiles from (x1, y1) up to (x2, y2), copied out of the layers; see ViewRenderer's."""
+        layers = (
+            self.ground[y1:y2, x1:x2].copy(),
+            self.structures[y1:y2, x1:x2].copy(),
+            self.occupants[y1:y2, x1:x2].copy(),
+        )
+        # Only now the sprites: the display thread adds a sprite to the atlas before it puts its index in a layer,
+        # so these have every index just copied. Taken first, a sprite added in between would be missing from them.
+        return ViewSnapshot(self.atlas.sprites, layers)
 
     def get_world_view(self, title: str | None = None) -> str:
         if title is None:
@@ -118,7 +257,33 @@ class WindowRenderer:
         return str(img_path)
 
 
-def update_display(display: WindowRenderer, show_window=False):
+@dataclass(frozen=True)
+class ViewSnapshot:
+    """A patch of the renderer's layers, and the atlas sprites they index, as they were when it was taken."""
+
+    sprites: np.ndarray
+    layers: Tuple[np.ndarray, ...]
+
+    def image(self) -> np.ndarray:
+        return Atlas.image(self.sprites, *self.layers)
+
+    def png(self) -> bytes:
+        return _encode_png(self.image())
+
+
+def _encode_png(img: np.ndarray) -> bytes:
+    # As Canvas.save writes it, only to memory
+    encoded, png = cv2.imencode(".png", cv2.cvtColor(img, cv2.COLOR_RGB2BGR))
+    if not encoded:
+        raise ValueError(f"Couldn't encode a {img.shape} image as a PNG")
+    return png.tobytes()
+
+
+def update_display(display: WindowRenderer, show_window=False, fps: float = FPS):
+    """Redraws display at most fps times a second, sleeping out the rest of each frame, until ESC is pressed."""
+    frame_seconds = 1 / fps
     k = -1  # Placeholder
     while k != 27:  # 27 is key-id of ESC
+        started = time.monotonic()
         k = display.on_draw(show_window=show_window)
+        time.sleep(max(0.0, started + frame_seconds - time.monotonic()))
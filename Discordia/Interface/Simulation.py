@@ -0,0 +1,69 @@
+"""
+The world, ticking on a thread of its own instead of on the bot's event loop.
+
+DiscordInterface hands each tick's orders over as one batch, and gets back what came of them plus what the world
+did to players. While the tick runs, the event loop is free for Discord: heartbeats, DMs, and acknowledging
+interactions, which expire after 3 seconds.
+
+The world isn't thread-safe, so anything else that touches it takes `lock` first. The tick only holds it one order
+or one step of World.tick_in_steps at a time, so nobody waits on it for longer than that.
+"""
+
+from __future__ import annotations
+
+import logging
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, List, Sequence, Tuple
+
+from Discordia.GameLogic.GameSpace import PlayerActionResponse, World
+
+LOG = logging.getLogger("Discordia.Interface.Simulation")
+
+# What came of one order: its result, or the exception it raised
+Outcome = Tuple[Any, BaseException | None]
+
+
+class Simulation:
+    def __init__(self, world: World):
+        self.world = world
+        # Reentrant, so an order that calls something else that takes it doesn't deadlock itself
+        self.lock = threading.RLock()
+        # One worker: ticks queue up behind each other and run in the order they were asked for
+        self._thread = ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix="Simulation"
+        )
+
+    def tick(
+        self, orders: Sequence[Tuple[Callable[[], Any], int]]
+    ) -> Future[Tuple[List[Outcome], List[PlayerActionResponse]]]:
+        """
+        Queue a tick: resolve `orders`, (action, seed) pairs from World.order_turns, in the order given, then let
+        the world act.
+        """
+        return self._thread.submit(self._tick, list(orders))
+
+    def _tick(
+        self, orders: List[Tuple[Callable[[], Any], int]]
+    ) -> Tuple[List[Outcome], List[PlayerActionResponse]]:
+        outcomes: List[Outcome] = []
+        for action, seed in orders:
+            with self.lock:
+                try:
+                    outcomes.append((self.world.run_order(action, seed), None))
+                except Exception as exc:
+                    outcomes.append((None, exc))
+
+        events: List[PlayerActionResponse] = []
+        steps = self.world.tick_in_steps(events)
+        while True:
+            with self.lock:
+                try:
+                    next(steps)
+                except StopIteration:
+                    break
+        return outcomes, events
+
+    def close(self):
+        """Finish whatever tick is running, and stop the thread."""
+        self._thread.shutdown(wait=True)
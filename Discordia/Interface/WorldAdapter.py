@@ -1,8 +1,8 @@
 # Note: NEVER EVER import Discord here, this defeats the whole point of an ADAPTER
 from __future__ import annotations
 
-from itertools import chain
-from typing import Dict, Tuple, List, Iterator
+from concurrent.futures import Future
+from typing import Dict, Tuple, List, Iterable, Iterator
 
 from Discordia.GameLogic import Actors
 from Discordia.GameLogic.GameSpace import (
@@ -15,6 +15,9 @@ from Discordia.GameLogic.GameSpace import (
 )
 from Discordia.GameLogic.Weapons import RangedWeapon
 
+# What register_player strips out of names, as a str.translate table
+_EVIL_CHARACTERS = str.maketrans("", "", "<>\\/")
+
 
 class NullWorldException(Exception):
     pass
@@ -63,6 +66,8 @@ class WorldAdapter:
         self.world: World = gameworld
         self._renderer = None
         self._discord_player_map: Dict[int, Actors.PlayerCharacter] = {}
+        # The same registry the other way round, so finding who plays a character isn't a search
+        self._member_ids: Dict[Actors.Actor, int] = {}
 
     @property
     def width(self):
@@ -84,13 +89,12 @@ class WorldAdapter:
             raise AlreadyRegisteredException("Member is already registered!")
 
         # Forcibly strip evil characters
-        player_name = "".join(
-            [c for c in player_name if c not in ["<", ">", "\\", "/"]]
-        )
+        player_name = player_name.translate(_EVIL_CHARACTERS)
 
         # Create new PlayerCharacter and add him into the existing world
         new_player = Actors.PlayerCharacter(parent_world=self.world, name=player_name)
         self._discord_player_map[member_id] = new_player
+        self._member_ids[new_player] = member_id
         self.world.add_actor(new_player, self.world.starting_town)
 
     def is_registered(self, member_id: int) -> bool:
@@ -107,14 +111,18 @@ class WorldAdapter:
 
     def get_member_id(self, character: Actors.Actor) -> int | None:
         """Who plays this character, or None if it isn't a registered player's."""
-        return next(
-            (
-                member_id
-                for member_id, player in self._discord_player_map.items()
-                if player is character
-            ),
-            None,
-        )
+        return self._member_ids.get(character)
+
+    def get_member_ids(
+        self, characters: Iterable[Actors.Actor]
+    ) -> Dict[Actors.Actor, int]:
+        """Who plays each of these characters. The ones that aren't registered players' are left out."""
+        member_ids = self._member_ids
+        return {
+            character: member_ids[character]
+            for character in characters
+            if character in member_ids
+        }
 
     def is_town(self, location: Space) -> bool:
         return isinstance(self.world.map[location.y][location.x], Town)
@@ -162,8 +170,9 @@ class WorldAdapter:
         return response
 
     def iter_spaces(self) -> Iterator[Space]:
-        for space in list(chain.from_iterable(self.world.map)):
-            yield space
+        # Row by row, never the whole map at once: most of these spaces only exist while they're being looked at
+        for row in self.world.map:
+            yield from row
 
     def iter_players(self) -> Iterator[Actors.PlayerCharacter]:
         for player in self._discord_player_map.values():
@@ -172,8 +181,10 @@ class WorldAdapter:
     def iter_registered(self) -> Iterator[Tuple[int, Actors.PlayerCharacter]]:
         yield from self._discord_player_map.items()
 
-    def get_player_screenshot(self, character: Actors.PlayerCharacter) -> str:
+    def get_player_screenshot(
+        self, character: Actors.PlayerCharacter
+    ) -> Future[bytes] | None:
+        """What the character can see, as a PNG on its way, or None without a renderer."""
         if self._renderer is not None:
-            path = self._renderer.get_player_view(character)
-            return path
-        return "<No Renderer>"
+            return self._renderer.get_player_view(character)
+        return None
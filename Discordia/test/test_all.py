@@ -1,21 +1,33 @@
+import io
+import json
 import logging
 import os
 import random
+import sqlite3
 import tempfile
+import threading
 import unittest
+from dataclasses import asdict
 from pathlib import Path
 from typing import Iterator, List
 
+import numpy as np
+import pixelhouse as ph
 from PIL import Image
 
 from Discordia.GameLogic import GameSpace, Actors, Weapons, Armor
 from Discordia.GameLogic.Actors import PlayerCharacter, PlayerClass
 from Discordia.GameLogic.GameSpace import MountainTerrain, PlayerActionResponse
 from Discordia.GameLogic.Weapons import Jezail
-from Discordia.Interface.Database import Database
-from Discordia.Interface.Rendering.DesktopApp import WindowRenderer
+from Discordia.Interface.Database import Database, _class_path
+from Discordia.Interface.Rendering.DesktopApp import (
+    ViewRenderer,
+    ViewSnapshot,
+    WindowRenderer,
+)
 from Discordia.Interface.WorldAdapter import WorldAdapter
 from Discordia.GameLogic.Items import Equipment, EquipmentSet, OffHandEquipment
+from Discordia.GameLogic.Procedural import WorldGenerationParameters
 
 Armor.random()  # Keep Armor import; we need the namespace
 
@@ -112,10 +124,9 @@ class TestGeneral(unittest.TestCase):
         self.display.on_draw()
         for idx in range(self.NUM_USERS):
             player = self.adapter.get_player(idx)
-            self.adapter.get_player_screenshot(player)
-            img: Image.Image = Image.open(
-                Path(f"./Discordia/PlayerViews/User{idx}_screenshot.png")
-            )
+            screenshot = self.adapter.get_player_screenshot(player)
+            assert screenshot is not None  # for the type checker
+            img: Image.Image = Image.open(io.BytesIO(screenshot.result()))
             self.assertFalse(
                 all(p == (0, 0, 0, 255) for p in img.getdata()),
                 "Black screenshot taken",
@@ -127,6 +138,231 @@ class TestGeneral(unittest.TestCase):
             self.assertGreater(img.height, 1)
             self.assertGreater(img.width, 1)
 
+    def test_a_repeat_look_at_an_unchanged_view_is_the_cached_one(self):
+        """
+        Views are encoded in memory, and only again once something in them has changed
+        """
+        player = self.adapter.get_player(0)
+        player.fov = 2
+        player.location = self.world.map[10][10]
+        self.display.on_draw()
+        first = self.adapter.get_player_screenshot(player)
+        assert first is not None  # for the type checker
+        cached = len(self.display._views)
+        self.display.on_draw()  # nothing moved
+        again = self.adapter.get_player_screenshot(player)
+        assert again is not None  # for the type checker
+        self.assertIs(again, first)
+        self.assertEqual(len(self.display._views), cached)
+
+        self.adapter.get_player(1).location = self.world.map[11][11]
+        self.display.on_draw()
+        moved = self.adapter.get_player_screenshot(player)
+        assert moved is not None  # for the type checker
+        self.assertEqual(len(self.display._views), cached + 1)
+        self.assertNotEqual(moved.result(), first.result())
+        self.assertFalse(
+            Path("./Discordia/PlayerViews/User0_screenshot.png").exists()
+        )  # nothing on disk
+
+    def test_looks_at_the_same_view_at_once_share_one_render(self):
+        """
+        Players asking to see the same patch of map while it's being drawn get the one drawing
+        """
+        started, go = threading.Event(), threading.Event()
+        renders = []
+
+        def png(snapshot):
+            renders.append(snapshot)
+            started.set()
+            go.wait(10)
+            return b"view"
+
+        first, second = self.adapter.get_player(0), self.adapter.get_player(1)
+        first.location = second.location = self.world.map[10][10]
+        self.display.on_draw()
+        self.addCleanup(setattr, ViewSnapshot, "png", ViewSnapshot.png)
+        ViewSnapshot.png = png  # type: ignore
+        looks = [self.adapter.get_player_screenshot(p) for p in (first, second)]
+        self.assertTrue(started.wait(10))
+        self.assertFalse(looks[0].done())  # drawn off the asking thread
+        go.set()
+        self.assertEqual([look.result(10) for look in looks], [b"view", b"view"])
+        self.assertEqual(len(renders), 1)
+
+    def test_a_view_taken_while_the_atlas_grows_has_every_sprite_it_uses(self):
+        """
+        A sprite the display thread adds while a view's layers are being copied is in the sprites it's drawn with
+        """
+        atlas = self.display.atlas
+        sprite = self.world.map[0][0].terrain.sprite_path_string
+
+        class GrowsTheAtlasWhenCopied(np.ndarray):
+            def copy(self, *args, **kwargs):
+                # What the display thread does, between the view's copying of one layer and the next
+                self[0, 0] = atlas.index(sprite, sprite, sprite)
+                return super().copy(*args, **kwargs)
+
+        self.display.occupants = self.display.occupants.view(GrowsTheAtlasWhenCopied)
+        snapshot = self.display.snapshot(0, 0, 3, 3)
+        self.assertEqual(
+            snapshot.image().shape[:2], (3 * atlas.cell_height, 3 * atlas.cell_width)
+        )
+
+    def test_a_view_drawn_from_the_world_is_the_one_the_framebuffer_shows(self):
+        """
+        A ViewRenderer, drawing straight from the world, shows a player what a WindowRenderer does
+        """
+        for _ in range(5):
+            for _ in self._move_randomly():
+                pass
+        player = self.adapter.get_player(0)
+        player.location = self.world.map[20][20]
+        self.display.on_draw()
+        framebuffer_view = self.display.get_player_view(player).result(10)
+        views = ViewRenderer(self.adapter)
+        self.addCleanup(views.close)
+        self.assertEqual(views.get_player_view(player).result(10), framebuffer_view)
+
+    def test_a_vast_chunked_world_draws_views_without_whole_world_buffers(self):
+        """
+        Looking around a chunked world only generates the chunks in view, and keeps nothing the size of the world
+        """
+        world = GameSpace.World(
+            "Vast",
+            100_000,
+            100_000,
+            WorldGenerationParameters(chunk_size=16),
+            seed=self.random_seed,
+        )
+        adapter = WorldAdapter(world)
+        views = ViewRenderer(adapter)
+        self.addCleanup(views.close)
+        adapter.register_player(0, player_name="Explorer")
+        player = adapter.get_player(0)
+        player.location = world.map[64][64]
+        img = Image.open(io.BytesIO(views.get_player_view(player).result(10)))
+        side = 2 * player.fov + 1
+        self.assertEqual(
+            img.size, (side * views.base_cell_width, side * views.base_cell_height)
+        )
+        self.assertLess(world.map.nbytes, 100_000)
+
+    def test_a_frame_redraws_only_the_tiles_that_changed(self):
+        """
+        A player's step redraws where they were and where they are, and nothing else
+        """
+        player = self.adapter.get_player(0)
+        player.location = self.world.map[10][10]
+        self.display.on_draw()
+        before = self.display.tile_versions.copy()
+        self.display.on_draw()  # nothing moved
+        self.assertTrue((self.display.tile_versions == before).all())
+
+        player.location = self.world.map[10][11]
+        self.display.on_draw()
+        redrawn = np.argwhere(self.display.tile_versions != before)
+        self.assertEqual(sorted(map(tuple, redrawn)), [(10, 10), (10, 11)])
+
+    def test_a_move_made_while_a_frame_is_drawn_is_not_lost(self):
+        """
+        A frame drawn on the display thread just as a player moves on another either draws the move or leaves it
+        for the next frame
+        """
+        display = self.display
+        frames: List[threading.Thread] = []
+
+        class DrawsAFrameFirst(set):
+            def add(self, tile):
+                if (
+                    not frames
+                ):  # the display thread's turn, right in the middle of the move
+                    frames.append(threading.Thread(target=display.on_draw))
+                    frames[0].start()
+                    frames[0].join(0.5)
+                super().add(tile)
+
+        player = self.adapter.get_player(0)
+        player.location = self.world.map[10][10]  # on their own, so leaving shows
+        display.on_draw()
+        self.world.occupancy._changed = DrawsAFrameFirst()
+        player.location = self.world.map[10][11]
+        frames[0].join(10)
+        display.on_draw()
+
+        afresh = WindowRenderer(self.adapter)
+        self.assertTrue(
+            (display.rendered_canvas.img == afresh.rendered_canvas.img).all()
+        )
+
+    def test_the_framebuffer_matches_drawing_the_world_afresh(self):
+        """
+        However it got there one tile at a time, the framebuffer is what drawing everything from scratch gives
+        """
+        for _ in range(5):
+            for _ in self._move_randomly():
+                pass
+        self.adapter.get_player(0).player_class = Actors.Soldier()
+        self.world.map[3][4].terrain = GameSpace.NullTerrain()
+        self.display.on_draw()
+
+        afresh = WindowRenderer(self.adapter)
+        self.assertTrue(
+            (self.display.rendered_canvas.img == afresh.rendered_canvas.img).all()
+        )
+
+    def test_the_layers_take_a_few_bytes_a_tile(self):
+        """
+        The whole-world grids are kept in the smallest types that hold them, like the map's own arrays
+        """
+        for layer in (
+            self.display.ground,
+            self.display.structures,
+            self.display.occupants,
+        ):
+            self.assertEqual(layer.dtype, np.uint16)
+        self.assertEqual(self.display.tile_versions.dtype, np.uint32)
+
+    def test_any_viewport_renders_as_the_framebuffer_shows_it(self):
+        """
+        Drawing a patch of map straight from the atlas gives the same pixels the framebuffer has for it
+        """
+        for _ in range(5):
+            for _ in self._move_randomly():
+                pass
+        self.display.on_draw()
+        cell_width, cell_height = (
+            self.display.base_cell_width,
+            self.display.base_cell_height,
+        )
+        x1, y1, x2, y2 = 3, 5, 40, 17
+        self.assertTrue(
+            (
+                self.display.render(x1, y1, x2, y2)
+                == self.display.rendered_canvas.img[
+                    y1 * cell_height : y2 * cell_height,
+                    x1 * cell_width : x2 * cell_width,
+                ]
+            ).all()
+        )
+
+    def test_a_stacked_sprite_is_the_sprites_layered_as_canvases(self):
+        """
+        The atlas blends a stack the way layering pixelhouse canvases does
+        """
+        paths = [
+            GameSpace.WaterTerrain().sprite_path_string,
+            GameSpace.SandTerrain("ne").sprite_path_string,
+            self.adapter.get_player(0).sprite_path_string,
+        ]
+        canvas = ph.Canvas().load(paths[0])
+        for path in paths[1:]:
+            with canvas.layer() as layer:
+                layer += ph.Canvas().load(path)
+        atlas = self.display.atlas
+        index = atlas.index(*paths)
+        self.assertTrue((atlas.sprites[index] == canvas.img).all())
+
     def test_store_purchasing(self):
         """
         Have randomly moving users buy weapons from towns they encounter
@@ -208,6 +444,7 @@ class TestGeneral(unittest.TestCase):
         player.inventory.append(Armor.Helmet())
         for _ in self._move_randomly():
             pass
+        self.world.tick_number = 12
 
         path = Path(self.temp_dir.name) / "roundtrip.db"
         database = Database(path)
@@ -221,6 +458,7 @@ class TestGeneral(unittest.TestCase):
         loaded.close()
 
         self.assertEqual(adapter.world.seed, self.world.seed)
+        self.assertEqual(adapter.world.tick_number, 12)
         self.assertEqual(
             [str(space.terrain) for space in adapter.iter_spaces()],
             [str(space.terrain) for space in self.adapter.iter_spaces()],
@@ -239,6 +477,284 @@ class TestGeneral(unittest.TestCase):
             (player.location.x, player.location.y),
         )
 
+    def test_saves_after_the_first_only_write_what_changed(self):
+        """
+        A save with nothing changed writes the world row and nothing else; one item bought is one item row
+        """
+        path = Path(self.temp_dir.name) / "incremental.db"
+        database = Database(path)
+        database.save(self.adapter)
+
+        changes = database.connection.total_changes
+        database.save(self.adapter)
+        self.assertEqual(
+            database.connection.total_changes - changes, 1
+        )  # the world row
+
+        player = self.adapter.get_player(4)
+        player.inventory.append(Armor.Helmet())
+        changes = database.connection.total_changes
+        database.save(self.adapter)
+        self.assertEqual(
+            database.connection.total_changes - changes, 3
+        )  # world, character, item
+
+        player.inventory.clear()
+        player.currency = 1
+        database.save(self.adapter)
+        database.close()
+
+        loaded = Database(path)
+        adapter = loaded.load()
+        assert adapter is not None  # for the type checker
+        restored = adapter.get_player(4)
+        self.assertEqual(restored.inventory, [])
+        self.assertEqual(restored.currency, 1)
+        self.assertEqual(
+            [type(item) for item in restored.equipment_set],
+            [type(item) for item in player.equipment_set],
+        )
+        loaded.close()
+
+    def test_load_gives_each_character_their_own_items_in_order(self):
+        """
+        Items come back from one query over every character; each still gets theirs, in the order they had them
+        """
+        first, second = self.adapter.get_player(5), self.adapter.get_player(6)
+        first.inventory.append(Armor.Helmet())
+        second.inventory.append(Jezail())
+        first.inventory.append(Jezail())
+        second.inventory.append(Armor.Helmet())
+
+        path = Path(self.temp_dir.name) / "items.db"
+        database = Database(path)
+        database.save(self.adapter)
+        database.close()
+
+        loaded = Database(path)
+        adapter = loaded.load()
+        assert adapter is not None  # for the type checker
+        loaded.close()
+        self.assertEqual(
+            [type(item) for item in adapter.get_player(5).inventory],
+            [Armor.Helmet, Jezail],
+        )
+        self.assertEqual(
+            [type(item) for item in adapter.get_player(6).inventory],
+            [Jezail, Armor.Helmet],
+        )
+
+    def test_an_inventory_changed_in_the_middle_reloads_in_the_same_order(self):
+        """
+        Items taken out of the middle, or put back at the end, come back from a save where they are in memory
+        """
+        player = self.adapter.get_player(7)
+        player.inventory.extend([Armor.Helmet(), Jezail(), Armor.Helmet()])
+        path = Path(self.temp_dir.name) / "order.db"
+        database = Database(path)
+        database.save(self.adapter)
+
+        rifle = player.inventory.pop(1)
+        database.save(self.adapter)
+        player.inventory.append(rifle)
+        player.inventory[0] = Jezail()
+        database.save(self.adapter)
+        database.close()
+
+        loaded = Database(path)
+        adapter = loaded.load()
+        assert adapter is not None  # for the type checker
+        loaded.close()
+        self.assertEqual(
+            [type(item) for item in adapter.get_player(7).inventory],
+            [type(item) for item in player.inventory],
+        )
+
+    def test_changed_towns_and_wilds_survive_a_restart(self):
+        """
+        Only the stores and wilds play has changed get saved; loading puts them back over what the seed makes
+        """
+        town, wilds = self.world.towns[1], self.world.wilds[1]
+        path = Path(self.temp_dir.name) / "spaces.db"
+        journal_path = Path(self.temp_dir.name) / "spaces.db.journal"
+        database = Database(path, journal_path=journal_path)
+        database.save(self.adapter)
+        self.assertEqual(
+            database.connection.execute("SELECT COUNT(*) FROM space").fetchone()[0], 0
+        )  # nobody has touched anything yet
+
+        player = self.adapter.get_player(1)
+        player.currency = 10_000
+        self.assertTrue(town.store.sell_item(0, player))
+        stock = [type(item) for item in town.store.inventory]
+        database.save(self.adapter)
+        odds = [0.0] * (len(wilds.events) - 1) + [1.0]
+        wilds.reweigh(odds)
+        self.world.tick()
+        database.record_tick(self.adapter, [], [])
+        database.close()  # the wilds are only in the journal
+
+        loaded = Database(path, journal_path=journal_path)
+        adapter = loaded.load()
+        assert adapter is not None  # for the type checker
+        loaded.close()
+        restored_town = adapter.world.map[town.y][town.x]
+        restored_wilds = adapter.world.map[wilds.y][wilds.x]
+        self.assertEqual([type(item) for item in restored_town.store.inventory], stock)
+        self.assertEqual([event.probability for event in restored_wilds.events], odds)
+        self.assertEqual(
+            len(adapter.get_player(1).inventory), len(player.inventory)
+        )  # bought once, not duplicated
+
+    def test_journal_recovers_what_changed_since_the_snapshot(self):
+        """
+        Snapshot, play a couple of ticks, crash without saving: loading gets the ticks back from the journal
+        """
+        path = Path(self.temp_dir.name) / "journaled.db"
+        journal_path = Path(self.temp_dir.name) / "journaled.db.journal"
+        database = Database(path, journal_path=journal_path)
+        database.save(self.adapter)
+
+        player = self.adapter.get_player(3)
+        player.currency = 77
+        player.inventory.append(Armor.Helmet())
+        self.world.tick()
+        database.record_tick(self.adapter, [(player, ("move", "n"))], [])
+        player.currency = 78
+        self.world.tick()
+        database.record_tick(self.adapter, [], [])
+        database.close()  # no save: this is the crash
+
+        recovered = Database(path, journal_path=journal_path)
+        adapter = recovered.load()
+        assert adapter is not None  # for the type checker
+        restored = adapter.get_player(3)
+        self.assertEqual(restored.currency, 78)
+        self.assertEqual([type(item) for item in restored.inventory], [Armor.Helmet])
+        self.assertEqual(adapter.world.tick_number, 2)
+        self.assertEqual(len(list(adapter.iter_registered())), self.NUM_USERS)
+
+        recovered.save(adapter)
+        self.assertEqual(journal_path.read_text(), "")  # the snapshot has it all now
+        recovered.close()
+
+    def test_journal_drops_a_half_written_last_line(self):
+        """
+        A crash in the middle of an append loses that tick, not the journal
+        """
+        journal_path = Path(self.temp_dir.name) / "torn.journal"
+        database = Database(
+            Path(self.temp_dir.name) / "torn.db", journal_path=journal_path
+        )
+        database.save(self.adapter)
+        self.adapter.get_player(0).currency = 5
+        self.world.tick()
+        database.record_tick(self.adapter, [], [])
+        database.close()
+        with open(journal_path, "a") as journal:
+            journal.write('{"tick": 2, "orders": [')
+
+        recovered = Database(
+            Path(self.temp_dir.name) / "torn.db", journal_path=journal_path
+        )
+        adapter = recovered.load()
+        assert adapter is not None  # for the type checker
+        self.assertEqual(adapter.get_player(0).currency, 5)
+        self.assertEqual(adapter.world.tick_number, 1)
+        recovered.close()
+
+    def test_background_writes_are_all_in_once_closed(self):
+        """
+        A background Database writes on its own thread, in WAL mode; close() waits for whatever's still queued
+        """
+        path = Path(self.temp_dir.name) / "background.db"
+        journal_path = Path(self.temp_dir.name) / "background.db.journal"
+        database = Database(path, journal_path=journal_path, background=True)
+        database.save(self.adapter)
+        database.flush()
+        self.assertEqual(
+            database.connection.execute("SELECT COUNT(*) FROM character").fetchone()[0],
+            self.NUM_USERS,
+        )
+        self.assertEqual(
+            database.connection.execute("PRAGMA journal_mode").fetchone()[0], "wal"
+        )
+
+        player = self.adapter.get_player(2)
+        for currency in range(1, 51):
+            player.currency = currency
+            self.world.tick()
+            database.record_tick(self.adapter, [], [])
+        database.save(self.adapter)
+        player.currency = 99
+        self.world.tick()
+        database.record_tick(self.adapter, [], [])
+        database.close()
+
+        recovered = Database(path, journal_path=journal_path)
+        adapter = recovered.load()
+        assert adapter is not None  # for the type checker
+        self.assertEqual(adapter.get_player(2).currency, 99)
+        self.assertEqual(adapter.world.tick_number, 51)
+        self.assertEqual(
+            len(journal_path.read_text().splitlines()), 1
+        )  # only the tick after the last save
+        recovered.close()
+
+    def test_database_from_before_tick_numbers_still_loads(self):
+        """
+        A save made before the world table had a tick column gets one, and starts counting from 0
+        """
+        path = Path(self.temp_dir.name) / "old.db"
+        old = sqlite3.connect(path)
+        old.executescript(
+            "CREATE TABLE world (id INTEGER PRIMARY KEY CHECK (id = 0), name TEXT NOT NULL, width INTEGER NOT NULL, "
+            "height INTEGER NOT NULL, seed INTEGER NOT NULL, gen_params TEXT NOT NULL);"
+        )
+        old.execute(
+            "INSERT INTO world VALUES (0, 'Old', 20, 20, 0, ?)",
+            (json.dumps(asdict(WorldGenerationParameters())),),
+        )
+        old.commit()
+        old.close()
+
+        database = Database(path)
+        adapter = database.load()
+        assert adapter is not None  # for the type checker
+        self.assertEqual(adapter.world.tick_number, 0)
+        database.save(adapter)
+        database.close()
+
+    def test_database_from_before_item_positions_keeps_the_item_order(self):
+        """
+        A save made before items had positions gets them, in the order their rows were made
+        """
+        path = Path(self.temp_dir.name) / "unpositioned.db"
+        database = Database(path)
+        database.save(self.adapter)
+        database.close()
+        old = sqlite3.connect(path)
+        old.executescript(
+            "DROP INDEX item_position; ALTER TABLE item DROP COLUMN position;"
+        )
+        old.executemany(
+            "INSERT INTO item (discord_id, class_path, slot) VALUES (8, ?, NULL)",
+            [(_class_path(Jezail()),), (_class_path(Armor.Helmet()),)],
+        )
+        old.commit()
+        old.close()
+
+        database = Database(path)
+        adapter = database.load()
+        assert adapter is not None  # for the type checker
+        self.assertEqual(
+            [type(item) for item in adapter.get_player(8).inventory],
+            [Jezail, Armor.Helmet],
+        )
+        adapter.get_player(8).inventory.pop(0)
+        database.save(adapter)
+        database.close()
+
     def test_database_starts_empty(self):
         """
         A database nobody has saved to yet has no world to hand back
@@ -314,6 +830,6 @@ class TestGeneral(unittest.TestCase):
     """
 
     def tearDown(self) -> None:
-        LOG.info(f"Sprite-Miss Count: {self.display._sprite_cache.miss_count}")
+        LOG.info(f"Sprite-Miss Count: {self.display.atlas.miss_count}")
         # self.display.on_draw()
         # self.display.get_world_view()
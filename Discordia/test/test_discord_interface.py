@@ -1,4 +1,7 @@
 import asyncio
+import threading
+import time
+from concurrent.futures import Future
 from types import SimpleNamespace
 from typing import cast
 
@@ -6,8 +9,10 @@ import discord
 import pytest
 from discord import app_commands
 
-from Discordia.GameLogic import Actors, GameSpace
+from Discordia.GameLogic import Actors, GameSpace, Weapons
 from Discordia.Interface.DiscordInterface import SUPERSEDED, DiscordInterface
+from Discordia.Interface.Mailbox import Mailbox
+from Discordia.Interface.Simulation import Simulation
 from Discordia.Interface.WorldAdapter import (
     InvalidSpaceException,
     NotRegisteredException,
@@ -128,15 +133,131 @@ def test_space_check_passes_inside_a_town():
     assert run_checks(command, interaction)
 
 
+class PendingRenderer:
+    """Stands in for WindowRenderer: every view is one the test finishes drawing, on another thread, when it likes."""
+
+    def __init__(self):
+        self.view: Future[bytes] = Future()
+
+    def get_player_view(self, character):
+        return self.view
+
+
+def test_look_uploads_its_view_once_drawn_without_holding_up_the_loop():
+    adapter = WorldAdapter(GameSpace.World("Lookout", 20, 20, seed=0))
+    adapter.register_player(1, "Looker")
+    renderer = PendingRenderer()
+    adapter.add_renderer(renderer)
+    interface = loaded_cog(adapter)
+    sent = []
+
+    async def defer():
+        pass
+
+    async def send(msg, files):
+        sent.append((msg, files))
+
+    interaction = SimpleNamespace(
+        user=SimpleNamespace(id=1),
+        response=SimpleNamespace(defer=defer),
+        followup=SimpleNamespace(send=send),
+    )
+
+    async def scenario():
+        look = asyncio.create_task(
+            command_named(interface, "look").callback(interface, interaction)  # type: ignore[arg-type]
+        )
+        await asyncio.sleep(0.05)  # the loop gets on with other things meanwhile
+        assert not look.done() and not sent
+        threading.Thread(target=renderer.view.set_result, args=(b"view",)).start()
+        await asyncio.wait_for(look, 5)
+
+    asyncio.run(scenario())
+    ((msg, files),) = sent
+    assert "Your coordinates are" in msg
+    assert files[0].fp.read() == b"view"
+
+
+class HeldLock:
+    """Stands in for Simulation.lock, and says whether it's held."""
+
+    def __init__(self):
+        self.held = False
+
+    def __enter__(self):
+        self.held = True
+
+    def __exit__(self, *exc_info):
+        self.held = False
+
+
+def test_with_a_simulation_commands_read_what_they_change_holding_the_world(
+    monkeypatch,
+):
+    adapter = WorldAdapter(GameSpace.World("Shop", 20, 20, seed=0))
+    adapter.register_player(1, "Shopper")
+    character = adapter.get_player(1)
+    character.location = adapter.world.starting_town
+    character.inventory.append(Weapons.Jezail())
+    interface = loaded_cog(adapter)
+    lock = HeldLock()
+    interface.simulation = cast(Simulation, SimpleNamespace(lock=lock))
+
+    held_for = []
+    for cls, name in [
+        (Actors.Inventory, "__getitem__"),
+        (Actors.Inventory, "__iter__"),
+        (GameSpace.Store, "get_price"),
+    ]:
+        original = getattr(cls, name)
+        monkeypatch.setattr(
+            cls,
+            name,
+            lambda *args, _original=original: held_for.append(lock.held)
+            or _original(*args),
+        )
+
+    sent = []
+
+    async def send_message(content, **kwargs):
+        sent.append(content)
+
+    interaction = SimpleNamespace(
+        user=SimpleNamespace(id=1),
+        response=SimpleNamespace(is_done=lambda: False, send_message=send_message),
+    )
+    for name, args in [
+        ("inventory equip", (0,)),
+        ("inventory unequip", (0,)),
+        ("town status", ()),
+        ("town store list", ()),
+        ("town store sell", (0,)),
+    ]:
+        command = command_named(interface, name)
+        asyncio.run(command.callback(interface, interaction, *args))  # type: ignore[arg-type]
+    assert len(sent) == 5 and "Successfully sold Jezail" in sent[-1]
+    assert held_for and all(held_for)
+
+
 PLAYER = cast(Actors.PlayerCharacter, "a player")  # orders only ever key on identity
 
 
-def ticking_interface(on_world_tick=lambda: []) -> DiscordInterface:
+def ticking_interface(on_world_tick=lambda: [], **options) -> DiscordInterface:
     """A cog whose world does nothing but record that it ticked and report its events."""
+
+    def tick_in_steps(events):
+        events.extend(on_world_tick())
+        yield
+
     adapter = SimpleNamespace(
-        world=SimpleNamespace(tick=on_world_tick), get_member_id=lambda character: 7
+        world=SimpleNamespace(
+            tick_in_steps=tick_in_steps,
+            order_turns=lambda count: [(index, 0) for index in range(count)],
+            run_order=lambda action, seed: action(),
+        ),
+        get_member_ids=lambda characters: {character: 7 for character in characters},
     )
-    return DiscordInterface(world_adapter=cast(WorldAdapter, adapter))
+    return DiscordInterface(world_adapter=cast(WorldAdapter, adapter), **options)
 
 
 def test_orders_wait_for_the_tick_instead_of_resolving_when_typed():
@@ -196,6 +317,25 @@ def test_a_rejected_order_raises_in_the_command_that_asked_for_it():
     asyncio.run(scenario())
 
 
+def test_after_tick_hears_which_orders_resolved_and_what_happened():
+    heard = []
+    interface = ticking_interface(
+        on_world_tick=hit_by_an_npc,
+        after_tick=lambda orders, events: heard.append((orders, events)),
+    )
+    stub_user(interface, [])
+
+    async def scenario():
+        future = interface.order(PLAYER, lambda: None, ("move", "n"))
+        await interface.tick()
+        await future
+
+    asyncio.run(scenario())
+    ((orders, events),) = heard
+    assert orders == [(PLAYER, ("move", "n"))]
+    assert [event.text for event in events] == ["A raider hits you."]
+
+
 def stub_user(interface: DiscordInterface, sent: list, raises=None):
     """Point the bot's user lookup at a recorder, so a DM lands in `sent` instead of on Discord."""
 
@@ -207,6 +347,16 @@ def stub_user(interface: DiscordInterface, sent: list, raises=None):
     interface.bot.get_user = lambda member_id: SimpleNamespace(send=send)  # type: ignore[method-assign]
 
 
+def tick_and_deliver(interface: DiscordInterface):
+    """Tick, then wait for the DMs it posted: the mailbox sends them after the tick returns."""
+
+    async def scenario():
+        await interface.tick()
+        await interface.mailbox.drain()
+
+    asyncio.run(scenario())
+
+
 def hit_by_an_npc():
     return [
         GameSpace.PlayerActionResponse(
@@ -220,7 +370,7 @@ def test_a_player_gets_dmd_about_what_happened_while_they_werent_looking():
     interface = ticking_interface(on_world_tick=hit_by_an_npc)
     stub_user(interface, sent)
 
-    asyncio.run(interface.tick())
+    tick_and_deliver(interface)
     assert sent == ["A raider hits you."]
 
 
@@ -234,7 +384,7 @@ def test_a_tick_full_of_npcs_is_one_dm_not_ten():
     )
     stub_user(interface, sent)
 
-    asyncio.run(interface.tick())
+    tick_and_deliver(interface)
     assert len(sent) == 1
     assert sent[0].splitlines() == [f"Raider {i} hits you." for i in range(10)]
 
@@ -249,7 +399,7 @@ def test_an_oversized_batch_is_split_to_discords_limit():
     )
     stub_user(interface, sent)
 
-    asyncio.run(interface.tick())
+    tick_and_deliver(interface)
     assert [len(chunk) for chunk in sent] == [2000, 1001]  # 1500 + "\n" + 1500
 
 
@@ -259,10 +409,183 @@ def test_a_closed_dm_doesnt_take_the_tick_down():
     closed_dms = SimpleNamespace(status=403, reason="Forbidden")
     stub_user(interface, sent, raises=discord.HTTPException(closed_dms, "DMs closed"))  # type: ignore[arg-type]
 
-    asyncio.run(interface.tick())  # the exception stays inside _dm
+    tick_and_deliver(interface)  # the exception stays inside _dm
     assert sent == []
 
 
+def test_a_tick_doesnt_wait_for_its_dms_to_go_out():
+    sent = []
+    interface = ticking_interface(on_world_tick=hit_by_an_npc)
+    stub_user(interface, sent)
+
+    async def scenario():
+        await interface.tick()
+        assert sent == []  # posted, not sent
+        await interface.mailbox.drain()
+        assert sent == ["A raider hits you."]
+
+    asyncio.run(scenario())
+
+
+def test_a_fetched_user_is_only_fetched_once():
+    fetched = []
+    interface = ticking_interface(on_world_tick=hit_by_an_npc)
+
+    async def fetch_user(member_id):
+        fetched.append(member_id)
+        return SimpleNamespace(send=lambda text: asyncio.sleep(0))
+
+    interface.bot.get_user = lambda member_id: None  # type: ignore[method-assign]
+    interface.bot.fetch_user = fetch_user  # type: ignore[method-assign]
+
+    tick_and_deliver(interface)
+    tick_and_deliver(interface)
+    assert fetched == [7]
+
+
+def test_the_mailbox_sends_to_players_side_by_side_but_no_more_than_it_may():
+    in_flight, most_in_flight, sent = [0], [0], []
+
+    async def send(member_id, text):
+        in_flight[0] += 1
+        most_in_flight[0] = max(most_in_flight[0], in_flight[0])
+        await asyncio.sleep(0.01)
+        in_flight[0] -= 1
+        sent.append(member_id)
+
+    async def scenario():
+        mailbox = Mailbox(send, concurrency=3)
+        for member_id in range(10):
+            mailbox.post(member_id, ["Hit."])
+        await mailbox.drain()
+
+    asyncio.run(scenario())
+    assert sorted(sent) == list(range(10))
+    assert most_in_flight == [3]  # side by side, but capped
+
+
+def test_news_for_a_player_still_waiting_on_a_dm_goes_in_that_dm():
+    sent = []
+
+    async def send(member_id, text):
+        await asyncio.sleep(0.01)
+        sent.append((member_id, text))
+
+    async def scenario():
+        mailbox = Mailbox(send, concurrency=1)
+        mailbox.post(1, ["Tick 1, for one."])
+        mailbox.post(2, ["Tick 1, for two."])
+        await asyncio.sleep(0)  # one is sending, two is waiting its turn
+        mailbox.post(2, ["Tick 2, for two."])
+        mailbox.post(1, ["Tick 2, for one."])
+        await mailbox.drain()
+
+    asyncio.run(scenario())
+    assert sent == [
+        (1, "Tick 1, for one."),
+        (2, "Tick 1, for two.\nTick 2, for two."),
+        (1, "Tick 2, for one."),
+    ]
+
+
+def slow_world(interface: DiscordInterface, steps: int, seconds_per_step: float):
+    """Swap the stub world's tick for one that blocks the event loop a little at every step."""
+
+    def tick_in_steps(events):
+        for _ in range(steps):
+            time.sleep(seconds_per_step)
+            yield
+
+    interface.world_adapter.world.tick_in_steps = tick_in_steps
+
+
+def test_a_long_tick_lets_commands_in_between_slices():
+    interface = ticking_interface(slice_seconds=0.005)
+    slow_world(interface, steps=10, seconds_per_step=0.005)
+    tick_done_when_answered = []
+
+    async def scenario():
+        tick = asyncio.ensure_future(interface.tick())
+        await asyncio.sleep(0)  # the tick starts, and runs for its first slice
+        tick_done_when_answered.append(tick.done())  # ...then a command gets a word in
+        await tick
+
+    asyncio.run(scenario())
+    assert tick_done_when_answered == [False]
+
+
+def test_a_tick_longer_than_the_interval_is_counted_as_an_overrun():
+    interface = ticking_interface(tick_seconds=0.01, slice_seconds=0.005)
+    slow_world(interface, steps=4, seconds_per_step=0.005)
+
+    asyncio.run(interface.tick())
+    assert interface.overruns == 1
+
+    interface.tick_seconds = 5.0
+    asyncio.run(interface.tick())
+    assert interface.overruns == 1
+
+
+def simulated_interface(on_world_tick=lambda: []) -> DiscordInterface:
+    """ticking_interface, with its world ticking on a Simulation thread."""
+    interface = ticking_interface(on_world_tick)
+    interface.simulation = Simulation(interface.world_adapter.world)
+    return interface
+
+
+def test_a_simulation_resolves_orders_on_its_own_thread():
+    threads = []
+    interface = simulated_interface()
+
+    async def scenario():
+        moved = interface.order(
+            PLAYER, lambda: threads.append(threading.current_thread()) or "arrived"
+        )
+
+        def blocked():
+            raise InvalidSpaceException("You can't go that way.")
+
+        rejected = interface.order(cast(Actors.PlayerCharacter, "another"), blocked)
+        await interface.tick()
+        assert await moved == "arrived"
+        with pytest.raises(InvalidSpaceException):
+            await rejected
+
+    asyncio.run(scenario())
+    interface.simulation.close()
+    assert threads and threads[0] is not threading.main_thread()
+
+
+def test_a_simulated_tick_leaves_the_event_loop_free():
+    interface = simulated_interface()
+    slow_world(interface, steps=1, seconds_per_step=0.1)
+    answered = []
+
+    async def commands_while_ticking():
+        while len(answered) < 5:
+            await asyncio.sleep(0.001)
+            answered.append("command")
+
+    async def scenario():
+        tick = asyncio.ensure_future(interface.tick())
+        await commands_while_ticking()
+        assert not tick.done()
+        await tick
+
+    asyncio.run(scenario())
+    interface.simulation.close()
+
+
+def test_a_simulated_tick_still_dms_what_happened():
+    sent = []
+    interface = simulated_interface(on_world_tick=hit_by_an_npc)
+    stub_user(interface, sent)
+
+    tick_and_deliver(interface)
+    interface.simulation.close()
+    assert sent == ["A raider hits you."]
+
+
 def test_jobs_run_on_the_bots_event_loop():
     ticks = []
     interface = DiscordInterface(
@@ -5,7 +5,11 @@ equipment, stores, events, and the adapter's error contract.
 test_all.py already drives a full 100x100 world; these stay small and fast on purpose.
 """
 
+import random
+
+import numpy as np
 import pytest
+from noise import pnoise3
 
 from Discordia.GameLogic import (
     Actors,
@@ -14,6 +18,7 @@ from Discordia.GameLogic import (
     Events,
     GameSpace,
     Items,
+    Procedural,
     Weapons,
 )
 from Discordia.GameLogic.GameSpace import (
@@ -34,6 +39,7 @@ from Discordia.GameLogic.Items import (
     EquipmentSet,
     MainHandEquipment,
 )
+from Discordia.Interface.MapCache import MapCache
 from Discordia.Interface.WorldAdapter import (
     AlreadyRegisteredException,
     CombatException,
@@ -205,17 +211,22 @@ def test_bitmask_picks_the_tile_orientation(bits, expected):
 
 
 def test_orientation_must_be_a_known_direction():
-    terrain = GrassTerrain()
-    terrain.orientation = "NE"  # case-insensitive
+    terrain = GrassTerrain().oriented("NE")  # case-insensitive
     assert terrain.orientation == "ne"
     with pytest.raises(ValueError):
-        terrain.orientation = "up"
+        GrassTerrain("up")
 
 
 def test_water_ignores_orientation_because_it_has_one_tile():
-    water = WaterTerrain()
-    water.orientation = "n"
-    assert water.orientation == "center"
+    assert WaterTerrain("n").orientation == "center"
+
+
+def test_terrain_is_shared_and_immutable():
+    assert SandTerrain() is SandTerrain("center")
+    assert SandTerrain("n") is SandTerrain().oriented("n")
+    assert SandTerrain("n") is not SandTerrain("s")
+    with pytest.raises(AttributeError):
+        SandTerrain().orientation = "n"  # would turn every sand tile on the map at once
 
 
 def test_terrain_cost_ranks_the_going_underfoot():
@@ -232,9 +243,325 @@ def test_terrain_cost_ranks_the_going_underfoot():
 
 
 def test_sprite_path_follows_name_and_orientation():
-    terrain = SandTerrain()
-    terrain.orientation = "se"
-    assert terrain.sprite_path.name == "sand_se.png"
+    assert SandTerrain("se").sprite_path.name == "sand_se.png"
+
+
+# --- World generation: a save file is just a seed, so the same seed must always build the same map ----
+
+
+def test_the_noise_grid_is_bit_identical_to_the_scalar_noise():
+    xs, ys = np.linspace(-3, 40, 37), np.linspace(0, 9, 23)
+    grid = Procedural.pnoise3_grid(xs, ys, 0.37)
+    assert grid.shape == (len(ys), len(xs))
+    assert grid.tolist() == [[pnoise3(x, y, 0.37) for x in xs] for y in ys]
+
+
+@pytest.mark.parametrize("seed", [0, 1, 2])
+def test_the_terrain_pass_matches_thresholding_noise_tile_by_tile(seed):
+    width, height = (
+        WORLD_SIZE,
+        WORLD_SIZE // 2 + 3,
+    )  # not square, so rows and columns can't be swapped
+    world = GameSpace.World("Test World", width, height, seed=seed)
+
+    params = world.gen_params
+    resolution = params.resolution_constant * ((width + height) / 2)
+    slices = random.Random(seed)
+    sand, mountain, grass = slices.random(), slices.random(), slices.random()
+
+    def expected(x, y):
+        x, y = x / resolution, y / resolution
+        if abs(pnoise3(x, y, grass)) > params.grass:
+            return "GrassTerrain"
+        if abs(pnoise3(x, y, mountain)) > params.mountains:
+            return "MountainTerrain"
+        return (
+            "SandTerrain" if abs(pnoise3(x, y, sand)) > params.water else "WaterTerrain"
+        )
+
+    assert [
+        [str(world.map[y][x].terrain) for x in range(width)] for y in range(height)
+    ] == [[expected(x, y) for x in range(width)] for y in range(height)]
+
+
+def _autotile_one_tile_at_a_time(terrain_codes):
+    """The orientation pass as generate_map used to run it, kept as the reference autotile must agree with."""
+    tiles = [
+        [Space(x, y, GameSpace.TERRAIN_TYPES[code]()) for x, code in enumerate(row)]
+        for y, row in enumerate(terrain_codes.tolist())
+    ]
+    height, width = terrain_codes.shape
+    expected = [["center"] * width for _ in range(height)]
+    for x in range(1, width - 1):
+        for y in range(1, height - 1):
+            space = tiles[y][x]
+            value = 0
+            for bit, neighbor in enumerate(
+                [
+                    DIRECTION_VECTORS.get(key)
+                    for key in ["nw", "n", "ne", "w", "e", "sw", "s", "se"]
+                ]
+            ):
+                ix, iy = space + neighbor
+                if tiles[iy][ix].terrain.layer == space.terrain.layer:
+                    value += pow(2, bit)
+            if value != 0:
+                terrain = space.terrain.oriented(bitmask_to_orientation(value))
+                expected[y][x] = terrain.orientation
+    return expected
+
+
+@pytest.mark.parametrize("seed", range(8))
+def test_autotiling_the_whole_grid_matches_tiling_it_one_tile_at_a_time(seed):
+    rng = np.random.default_rng(seed)
+    height, width = rng.integers(1, 40, size=2)
+    noisy = rng.integers(len(GameSpace.TERRAIN_TYPES), size=(height, width))
+    blocky = np.kron(
+        noisy, np.ones((3, 2), dtype=int)
+    )  # coast-like runs, not just speckle
+    for terrain_codes in (noisy, blocky):
+        orientation = GameSpace.autotile(terrain_codes)
+        assert [
+            [GameSpace.ORIENTATIONS[code] for code in row]
+            for row in orientation.tolist()
+        ] == _autotile_one_tile_at_a_time(terrain_codes)
+
+
+# --- The map: terrain lives in arrays, only towns and wilds are objects --------------------------------
+
+
+def test_map_tiles_are_made_on_demand_but_terrain_edits_stick(adapter):
+    world_map = adapter.world.map
+    tile = world_map[0][0]
+    tile.terrain = MountainTerrain()
+    assert isinstance(world_map[0][0].terrain, MountainTerrain)
+    assert world_map[0][0] == tile and hash(world_map[0][0]) == hash(tile)
+
+
+def test_towns_and_wilds_are_the_only_spaces_kept_as_objects(adapter):
+    world = adapter.world
+    assert all(world.map[town.y][town.x] is town for town in world.towns)
+    assert all(world.map[wilds.y][wilds.x] is wilds for wilds in world.wilds)
+    assert set(world.map.spaces.values()) == set(world.towns) | set(world.wilds)
+
+
+def test_the_map_indexes_like_the_list_of_lists_it_replaced(adapter):
+    world_map = adapter.world.map
+    assert (len(world_map), len(world_map[0])) == (adapter.height, adapter.width)
+    assert world_map[-1][-1] == (adapter.width - 1, adapter.height - 1)
+    assert world_map[2][1:4] == [(1, 2), (2, 2), (3, 2)]
+    with pytest.raises(IndexError):
+        world_map[adapter.height]
+    with pytest.raises(IndexError):
+        world_map[0][adapter.width]
+
+
+def test_a_map_kept_in_a_file_is_shared_with_whoever_opens_it(tmp_path):
+    path = tmp_path / "terrain.npy"
+    world = GameSpace.World(
+        "Mapped", WORLD_SIZE, WORLD_SIZE, seed=WORLD_SEED, map_path=path
+    )
+    reader = GameSpace.WorldMap.open(path)
+    assert (len(reader), len(reader[0])) == (WORLD_SIZE, WORLD_SIZE)
+    assert np.array_equal(reader.terrain, world.map.terrain)
+    assert reader[5][7].terrain is world.map[5][7].terrain
+
+    world.map[5][7].terrain = MountainTerrain("n")
+    assert reader[5][7].terrain is MountainTerrain(
+        "n"
+    )  # one copy, shared; not a snapshot
+    with pytest.raises(ValueError):
+        reader[5][7].terrain = SandTerrain()  # read-only unless opened writable
+
+
+# --- Chunked maps: generated a square at a time, as they're explored ------------------------------
+
+
+def _chunked_world(seed=0, size=40, chunk_size=8):
+    return GameSpace.World(
+        "Chunky",
+        size,
+        size,
+        Procedural.WorldGenerationParameters(chunk_size=chunk_size),
+        seed=seed,
+    )
+
+
+def test_a_chunked_map_has_the_same_terrain_as_one_generated_whole():
+    for seed in (0, 1, 2):
+        whole = GameSpace.World("Whole", 40, 40, seed=seed)
+        chunked = _chunked_world(seed)
+        for y in range(40):
+            for x in range(40):
+                assert chunked.map[y][x].terrain is whole.map[y][x].terrain, (
+                    seed,
+                    x,
+                    y,
+                )
+
+
+def test_a_chunked_map_only_generates_what_has_been_looked_at():
+    world = _chunked_world()
+    loaded = len(world.map.chunks)
+    assert loaded < 25
+    assert world.map[39][39] and len(world.map.chunks) == loaded + 1
+    assert world.map.nbytes < 40 * 40 * 2
+
+
+def test_loading_a_chunk_leaves_the_global_rngs_alone():
+    world = _chunked_world()
+    state, np_state = random.getstate(), np.random.get_state()
+    world.map[39][39]
+    assert random.getstate() == state
+    assert np.array_equal(np.random.get_state()[1], np_state[1])
+
+
+def test_an_evicted_chunk_comes_back_the_same():
+    world = _chunked_world()
+    before = [
+        (space.x, space.y, space.terrain, type(space)) for space in world.map[39][32:40]
+    ]
+    towns_and_wilds = len(world.towns) + len(world.wilds)
+    assert world.map.collect([], [], idle_seconds=0) > 0
+    assert not world.map.is_loaded(39, 39)
+    assert world.map.is_loaded(world.starting_town.x, world.starting_town.y)  # pinned
+    after = [
+        (space.x, space.y, space.terrain, type(space)) for space in world.map[39][32:40]
+    ]
+    assert after == before
+    assert len(world.towns) + len(world.wilds) <= towns_and_wilds
+
+
+def test_chunks_that_are_occupied_or_changed_are_not_evicted():
+    world = _chunked_world()
+    world.map[39][39].terrain = MountainTerrain()
+    player = Actors.PlayerCharacter(parent_world=world, name="Tester")
+    world.add_actor(player)
+    player.location = world.map[39][0]
+    world.map.collect([player], [], idle_seconds=0)
+    assert world.map.is_loaded(39, 39) and world.map.is_loaded(0, 39)
+    assert isinstance(world.map[39][39].terrain, MountainTerrain)
+    player.location = world.starting_town
+    world.map.collect([player], [], idle_seconds=0)
+    # Only walked through; nothing there has changed
+    assert not world.map.is_loaded(0, 39)
+    assert world.map.is_loaded(39, 39)
+
+
+def test_a_chunk_whose_store_has_changed_is_not_evicted():
+    world = _chunked_world()
+    for y in range(0, 40, 8):
+        for x in range(0, 40, 8):
+            world.map.chunk_at(x, y)
+    pinned = world.map.chunk_key(world.starting_town.x, world.starting_town.y)
+    town = next(
+        town for town in world.towns if world.map.chunk_key(town.x, town.y) != pinned
+    )
+    town.store.inventory.clear()
+    world.map.collect([], [], idle_seconds=0)
+    assert world.map.is_loaded(town.x, town.y)
+    assert world.map[town.y][town.x].store.inventory == []
+
+
+def _world_fingerprint(world):
+    return (
+        world.map.terrain.tobytes(),
+        world.map.orientation.tobytes(),
+        [(town.x, town.y, town.name) for town in world.towns],
+        [(wilds.x, wilds.y, wilds.name) for wilds in world.wilds],
+        (world.starting_town.x, world.starting_town.y),
+    )
+
+
+def test_a_map_generated_in_regions_is_the_same_for_any_number_of_workers():
+    params = Procedural.WorldGenerationParameters(region_size=16)
+    one = GameSpace.World("Regions", 40, 40, params, seed=0)
+    two = GameSpace.World("Regions", 40, 40, params, seed=0, workers=2)
+    assert _world_fingerprint(one) == _world_fingerprint(two)
+
+
+def test_a_map_generated_in_regions_matches_a_chunked_one():
+    regions = GameSpace.World(
+        "Regions", 40, 40, Procedural.WorldGenerationParameters(region_size=8), seed=0
+    )
+    chunked = _chunked_world()
+    for y in range(40):
+        for x in range(40):
+            assert chunked.map[y][x].terrain is regions.map[y][x].terrain
+            assert type(chunked.map[y][x]) is type(regions.map[y][x])
+
+
+def _events(world):
+    return [
+        [(type(event).__name__, event.probability) for event in wilds.events]
+        for wilds in world.wilds
+    ]
+
+
+@pytest.mark.parametrize("region_size", [0, 16])
+def test_a_replayed_map_is_the_map_that_was_recorded(region_size):
+    params = Procedural.WorldGenerationParameters(region_size=region_size)
+    recorded = GameSpace.World("Recorded", 40, 40, params, seed=0, record=True)
+    after_recording = (random.random(), np.random.random())
+    replayed = GameSpace.World(
+        "Replayed", 40, 40, params, seed=0, replay=recorded.map_record
+    )
+    assert (random.random(), np.random.random()) == after_recording
+    assert _world_fingerprint(replayed) == _world_fingerprint(recorded)
+    assert _events(replayed) == _events(recorded)
+
+
+def test_the_map_cache_replays_a_matching_map_and_regenerates_anything_else(tmp_path):
+    params = Procedural.WorldGenerationParameters()
+    cache = MapCache(tmp_path / "map.npz", whole_maps=True)
+    generated = cache.world("Cached", 40, 40, params, seed=0)
+    assert cache.path.exists() and generated.map_record is None
+    replayed = cache.world("Cached", 40, 40, params, seed=0)
+    assert _world_fingerprint(replayed) == _world_fingerprint(generated)
+    # Made then and there, rather than holding on to the RNG state they were made from until someone looks
+    assert not any("_ungenerated" in vars(wilds) for wilds in replayed.wilds)
+    assert _events(replayed) == _events(generated)
+
+    other_seed = cache.world("Cached", 40, 40, params, seed=1)
+    assert _world_fingerprint(other_seed) == _world_fingerprint(
+        GameSpace.World("Fresh", 40, 40, params, seed=1)
+    )
+    cache.path.write_bytes(b"not a map")
+    assert _world_fingerprint(cache.world("Cached", 40, 40, params, seed=1)) == (
+        _world_fingerprint(other_seed)
+    )
+
+
+def test_a_map_cache_leaves_maps_generated_whole_alone_unless_asked(tmp_path):
+    cache = MapCache(tmp_path / "map.npz")
+    world = cache.world("Uncached", 40, 40, Procedural.WorldGenerationParameters(), 0)
+    assert not cache.path.exists() and world.map_record is None
+
+
+def test_a_map_cache_keeps_a_seed_for_each_feature_of_a_map_made_in_regions(tmp_path):
+    params = Procedural.WorldGenerationParameters(region_size=16)
+    cache = MapCache(tmp_path / "map.npz")
+    generated = cache.world("Cached", 40, 40, params, seed=0)
+    # Not the RNG state each town and wilds was made from
+    with np.load(cache.path) as cached:
+        assert len(cached["seeds"]) == len(cached["features"])
+    assert cache.path.stat().st_size < 20_000
+    replayed = cache.world("Cached", 40, 40, params, seed=0)
+    assert _world_fingerprint(replayed) == _world_fingerprint(generated)
+    assert _events(replayed) == _events(generated)
+
+
+def test_a_map_generated_whole_is_the_map_its_seed_always_made():
+    # Saves are only a seed and what's changed since: they have to come back to the same world
+    world = GameSpace.World("Pinned", 50, 50, seed=1234)
+    assert [town.name for town in world.towns] == [
+        "Braxbrooke",
+        "Hallsbrooke",
+        "Old Roddertown",
+        "Old Aldston",
+        "Rodderborough",
+    ]
+    assert (world.starting_town.x, world.starting_town.y) == (39, 46)
 
 
 # --- Equipment ------------------------------------------------------------------------------------
@@ -460,6 +787,15 @@ def test_registering_the_same_member_twice_raises(adapter):
         adapter.register_player(1, "Impostor")
 
 
+def test_characters_lead_back_to_who_plays_them(adapter):
+    adapter.register_player(2, "Second")
+    first, second = adapter.get_player(1), adapter.get_player(2)
+    npc = Actors.Raider(adapter.world, 50, "Mugger")
+    assert adapter.get_member_id(second) == 2
+    assert adapter.get_member_id(npc) is None
+    assert adapter.get_member_ids([second, npc, first]) == {second: 2, first: 1}
+
+
 def test_asking_for_a_stranger_raises(adapter):
     assert not adapter.is_registered(999)
     with pytest.raises(NotRegisteredException):
@@ -551,7 +887,7 @@ def test_a_player_sees_their_own_neighbourhood(adapter):
 
 
 def test_screenshots_degrade_gracefully_without_a_renderer(adapter):
-    assert adapter.get_player_screenshot(adapter.get_player(1)) == "<No Renderer>"
+    assert adapter.get_player_screenshot(adapter.get_player(1)) is None
 
 
 # --- World tick: NPCs act on real time, not on player input ------------------------------------
@@ -595,6 +931,39 @@ def test_a_tick_lets_an_npc_hit_a_player_sharing_its_space(adapter):
     assert player.hit_points < player.hit_points_max
 
 
+def test_npcs_take_their_turns_in_order_and_can_catch_a_player_sent_home(adapter):
+    world = adapter.world
+    player = adapter.get_player(1)
+    away = next(town for town in world.towns if town is not world.starting_town)
+    player.location = away
+    player.hit_points = 1
+    idler = Actors.Raider(world, 50, "Idler")  # nobody home yet when its turn comes
+    world.add_actor(idler, world.starting_town)
+    mugger = Actors.Raider(world, 50, "Mugger")
+    world.add_actor(mugger, away)
+    waiting = Actors.Raider(world, 50, "Waiting")
+    world.add_actor(waiting, world.starting_town)
+
+    events = world.tick()
+    assert [event.source for event in events] == [mugger, waiting]
+    assert "You black out" in events[0].text
+    assert player.location is world.starting_town
+
+
+def test_a_player_who_registers_between_steps_of_a_tick_can_be_fought(adapter):
+    world = adapter.world
+    for i in range(3):
+        world.add_actor(Actors.Raider(world, 50, f"Raider {i}"), world.starting_town)
+    events = []
+    steps = world.tick_in_steps(events, batch_size=1)
+    next(steps)
+    adapter.register_player(2, "Latecomer")
+    for _ in steps:
+        pass
+    assert world.tick_number == 1
+    assert any(event.target is adapter.get_player(2) for event in events)
+
+
 def test_dead_npcs_are_dropped_on_the_next_tick(adapter):
     world = adapter.world
     npc = Actors.Raider(world, 1, "Doomed")
@@ -605,6 +974,181 @@ def test_dead_npcs_are_dropped_on_the_next_tick(adapter):
     assert npc not in world.npcs
 
 
+def test_npcs_wandering_together_end_up_where_they_would_one_at_a_time():
+    worlds = [GameSpace.World("Wander", 20, 20, seed=WORLD_SEED) for _ in range(2)]
+    rng = np.random.default_rng(0)
+    spots = [(0, 0), (19, 19), (0, 19), (19, 0)] + [
+        tuple(xy) for xy in rng.integers(20, size=(60, 2)).tolist()
+    ]
+    directions = rng.integers(len(GameSpace.WANDER_DIRECTIONS), size=len(spots))
+    crowds = []
+    for world in worlds:
+        crowd = [Actors.Raider(world, 50, f"Raider {i}") for i in range(len(spots))]
+        for npc, (x, y) in zip(crowd, spots):
+            npc.location = world.map[y][x]  # anywhere, walkable or not
+        crowds.append(crowd)
+
+    one_at_a_time, together = crowds
+    for npc, direction in zip(one_at_a_time, directions):
+        npc.attempt_move(GameSpace.WANDER_DIRECTIONS[direction])
+    worlds[1]._wander(together, directions)
+    assert [tuple(npc.location) for npc in together] == [
+        tuple(npc.location) for npc in one_at_a_time
+    ]
+
+
+def test_every_saved_change_to_a_character_moves_its_revision_on(adapter):
+    player = adapter.get_player(1)
+    rifle = Weapons.AK47()
+    changes = [
+        lambda: setattr(player, "currency", 5),
+        lambda: setattr(player, "hit_points", player.hit_points - 1),
+        lambda: setattr(player, "location", adapter.world.starting_town),
+        lambda: setattr(player, "player_class", Actors.RaiderClass()),
+        lambda: player.inventory.append(rifle),
+        lambda: player.equip(rifle),
+        lambda: player.unequip(rifle),
+        lambda: player.inventory.remove(rifle),
+    ]
+    for change in changes:
+        revision = player.revision
+        change()
+        assert player.revision > revision
+
+
+def test_towns_and_wilds_start_at_revision_0_and_move_on_when_played_with(adapter):
+    world = adapter.world
+    town, wilds = world.towns[0], world.wilds[0]
+    assert town.revision == 0 and wilds.revision == 0
+
+    player = adapter.get_player(1)
+    player.currency = 10_000
+    assert town.store.sell_item(0, player)
+    assert town.revision == 1
+    town.store.price_ratio = 2.0
+    assert town.revision == 2
+
+    wilds.reweigh([1.0] + [0.0] * (len(wilds.events) - 1))
+    assert wilds.revision > 0
+    revision = wilds.revision
+    wilds.events[-1].probability = 0.5  # straight onto the event, not through the wilds
+    assert wilds.revision > revision
+    with pytest.raises(ValueError):
+        wilds.reweigh([1.0, 0.0] * len(wilds.events))
+
+
+def test_a_tick_taken_in_steps_ends_where_a_whole_tick_does():
+    outcomes = []
+    for batch_size in (None, 7):
+        world = GameSpace.World("Sliced", 20, 20, seed=WORLD_SEED)
+        player = Actors.PlayerCharacter(parent_world=world, name="Tester")
+        world.add_actor(player)
+        player.location = world.starting_town
+        for i in range(40):
+            world.add_actor(
+                Actors.Raider(world, 50, f"Raider {i}"), world.starting_town
+            )
+        random.seed(1)
+        np.random.seed(1)
+        if batch_size is None:
+            events = world.tick()
+        else:
+            events = []
+            steps = sum(1 for _ in world.tick_in_steps(events, batch_size))
+            assert steps > 1
+        outcomes.append(
+            (
+                [event.text for event in events],
+                [tuple(npc.location) for npc in world.npcs],
+            )
+        )
+    assert outcomes[0] == outcomes[1]
+
+
+def test_a_tick_draws_the_same_whatever_ran_before_it(adapter):
+    """Replaying from (seed, tick number, orders) works because nothing else feeds a tick's randomness."""
+
+    def tick_from(world, history):
+        random.seed(history)
+        np.random.seed(history)
+        world.tick_number = 5
+        for i in range(30):
+            world.add_actor(
+                Actors.Raider(world, 50, f"Raider {i}"), world.starting_town
+            )
+        world.tick()
+        return [(npc.name, tuple(npc.location)) for npc in world.npcs]
+
+    worlds = [GameSpace.World("Replay", 20, 20, seed=WORLD_SEED) for _ in range(2)]
+    assert tick_from(worlds[0], 1) == tick_from(worlds[1], 2)
+    assert worlds[0].tick_number == 6
+
+
+def test_ticking_leaves_the_global_rngs_alone(adapter):
+    world = adapter.world
+    world.add_actor(Actors.Raider(world, 50, "Mugger"), adapter.get_player(1).location)
+    state, np_state = random.getstate(), np.random.get_state()
+    world.tick()
+    assert random.getstate() == state
+    assert np.array_equal(np.random.get_state()[1], np_state[1])
+
+
+def test_skipping_an_order_doesnt_change_the_ones_after_it():
+    world = GameSpace.World("Orders", 20, 20, seed=WORLD_SEED)
+    turns = world.order_turns(4)
+    assert sorted(index for index, _ in turns) == [0, 1, 2, 3]
+
+    rolls = [world.run_order(random.random, seed) for _, seed in turns]
+    skipped = [world.run_order(random.random, seed) for _, seed in turns[1:]]
+    assert skipped == rolls[1:]
+    assert world.order_turns(4) != turns  # the orders stream moves on within a tick
+
+
+def _occupants(world, space):
+    return world.occupancy.at(space.x, space.y)
+
+
+def test_the_occupancy_index_follows_actors_wherever_they_go(adapter):
+    world = adapter.world
+    player = adapter.get_player(1)
+    home = world.starting_town
+    assert _occupants(world, home) == [player]
+
+    direction = next(
+        d
+        for d in DIRECTION_VECTORS.values()
+        if d != (0, 0) and world.is_coords_valid(home.x + d[0], home.y + d[1])
+    )
+    player.attempt_move(direction)
+    assert _occupants(world, home) == [] and _occupants(world, player.location) == [
+        player
+    ]
+
+    npc = Actors.Raider(world, 1, "Doomed")
+    world.add_actor(npc, player.location)
+    assert _occupants(world, player.location) == [player, npc]
+    npc.take_damage(10)
+    assert _occupants(world, player.location) == [player]
+
+    player.take_damage(
+        10 * player.hit_points_max
+    )  # handle_player_death sends them home
+    assert _occupants(world, home) == [player]
+    assert len(world.occupancy) == 1
+
+
+def test_region_queries_only_count_who_is_in_the_region(adapter):
+    world = adapter.world
+    player = adapter.get_player(1)
+    npc = Actors.Raider(world, 50, "Lurker")
+    world.add_actor(npc, player.location)
+    nearby = world.get_adjacent_spaces(player.location)
+    assert world.get_players_in_region(nearby) == [player]
+    assert world.get_npcs_in_region(nearby) == [npc]
+    far_corner = [world.map[WORLD_SIZE - 1][WORLD_SIZE - 1]]
+    assert world.get_players_in_region(far_corner) == []
+
+
 # --- Names: the word lists are data, so the loader is what needs guarding ------------------------
 
 
@@ -0,0 +1,78 @@
+"""
+Memory held by a world map's tiles: the old layout (one Space per tile, each with its own Terrain) against WorldMap's
+(one terrain code and one orientation code per tile).
+
+    python -m benchmarks.map_memory
+
+Towns and wilds are objects in either layout, so they're left out of both. The old layout is measured on a band of
+rows and scaled up to the full height: at 5000x5000 it doesn't fit in memory to be measured whole.
+"""
+
+import tracemalloc
+
+import numpy as np
+
+from Discordia.GameLogic.GameSpace import (
+    ORIENTATIONS,
+    TERRAIN_TYPES,
+    Space,
+    WorldMap,
+)
+
+SIZES = [500, 2000, 5000]
+BAND_ROWS = 50
+
+
+def _measure(build) -> int:
+    tracemalloc.start()
+    build()  # let go of as soon as it's built, so it's the peak that counts it
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return peak
+
+
+def list_of_spaces_bytes(codes: np.ndarray, orientations: np.ndarray) -> int:
+    band = min(BAND_ROWS, codes.shape[0])
+
+    def build():
+        rows = []
+        for y in range(band):
+            row = []
+            for x, (code, orientation) in enumerate(zip(codes[y], orientations[y])):
+                # Terrain is shared now; the old layout gave every tile an instance holding its orientation
+                terrain = object.__new__(TERRAIN_TYPES[code])
+                terrain._orientation = ORIENTATIONS[orientation]
+                row.append(Space(x, y, terrain))
+            rows.append(row)
+        return rows
+
+    return _measure(build) * codes.shape[0] // band
+
+
+def world_map_bytes(codes: np.ndarray, orientations: np.ndarray) -> int:
+    def build():
+        world_map = WorldMap(codes.shape[1], codes.shape[0])
+        world_map.terrain[:] = codes
+        world_map.orientation[:] = orientations
+        return world_map
+
+    return _measure(build)
+
+
+def main():
+    rng = np.random.default_rng(0)
+    print(f"{'size':>11} {'List[List[Space]]':>18} {'WorldMap':>10} {'ratio':>7}")
+    for size in SIZES:
+        codes = rng.integers(len(TERRAIN_TYPES), size=(size, size), dtype=np.uint8)
+        orientations = rng.integers(
+            len(ORIENTATIONS), size=(size, size), dtype=np.uint8
+        )
+        old = list_of_spaces_bytes(codes, orientations)
+        new = world_map_bytes(codes, orientations)
+        print(
+            f"{size:>5}x{size:<5} {old / 2**20:>15.1f} MB {new / 2**20:>7.1f} MB {old / new:>6.0f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""
+Time taken by World.tick against how many NPCs and players there are, next to the tick it replaced (every NPC
+scanning every player for someone to hit, and drawing its own direction to wander in).
+
+    python -m benchmarks.tick
+
+Players and NPCs are scattered over the walkable tiles of one generated world. NPCs get enough hit points to
+survive the run, so every tick has the same number of them.
+"""
+
+import random
+import time
+
+import numpy as np
+
+from Discordia.GameLogic import Actors
+from Discordia.GameLogic.GameSpace import DIRECTION_VECTORS, World
+
+WORLD_SIZE = 200
+NPC_COUNTS = [100, 1000, 10000]
+PLAYER_COUNTS = [1, 10, 100]
+TICKS = 5
+
+
+def scanning_tick(world: World):
+    """The old tick: O(NPCs x players)."""
+    world.npcs = [npc for npc in world.npcs if not npc.is_dead]
+    for npc in world.npcs:
+        targets = [p for p in world.players if p.location == npc.location]
+        if not targets:
+            npc.attempt_move(random.choice(list(DIRECTION_VECTORS.values())))
+            continue
+        npc.brain.update(random.choice(targets))
+
+
+def populate(npcs: int, players: int) -> World:
+    world = World("Benchmark", WORLD_SIZE, WORLD_SIZE, seed=0)
+    walkable = [
+        space
+        for row in world.map
+        for space in row
+        if space.terrain.walkable and world.is_space_valid(space)
+    ]
+    for i in range(players):
+        player = Actors.PlayerCharacter(parent_world=world, name=f"Player {i}")
+        world.add_actor(player)
+        player.location = random.choice(walkable)
+    for i in range(npcs):
+        world.add_actor(
+            Actors.Raider(world, 10**6, f"Raider {i}"), random.choice(walkable)
+        )
+    return world
+
+
+def seconds_per_tick(tick, world: World) -> float:
+    start = time.perf_counter()
+    for _ in range(TICKS):
+        tick(world)
+    return (time.perf_counter() - start) / TICKS
+
+
+def main():
+    random.seed(0)
+    np.random.seed(0)
+    print(
+        f"{'NPCs':>6} {'players':>8} {'scanning':>10} {'World.tick':>11} {'ratio':>6}"
+    )
+    for npcs in NPC_COUNTS:
+        for players in PLAYER_COUNTS:
+            old = seconds_per_tick(scanning_tick, populate(npcs, players))
+            new = seconds_per_tick(World.tick, populate(npcs, players))
+            print(
+                f"{npcs:>6} {players:>8} {old * 1000:>7.1f} ms {new * 1000:>8.1f} ms {old / new:>5.1f}x"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -1,50 +1,98 @@
+import contextlib
 import logging
 import threading
 import argparse
 
 import ConfigParser
 from Discordia.GameLogic import GameSpace
+from Discordia.GameLogic.Procedural import WorldGenerationParameters
 from Discordia.Interface.Database import Database, DEFAULT_PATH
+from Discordia.Interface.MapCache import MapCache
 from Discordia.Interface.DiscordInterface import DiscordInterface
-from Discordia.Interface.Rendering.DesktopApp import WindowRenderer, update_display
+from Discordia.Interface.Simulation import Simulation
+from Discordia.Interface.Rendering.DesktopApp import ViewRenderer, WindowRenderer, update_display
 from Discordia.Interface.WorldAdapter import WorldAdapter
 
 LOG = logging.getLogger("Discordia")
 logging.basicConfig(level=logging.INFO)
 
 AUTOSAVE_SECONDS = 60
+# Between snapshots, the journal keeps what each tick changed, so they can be further apart; see Database
+JOURNALED_AUTOSAVE_SECONDS = 600
 TICK_SECONDS = 5
+# Longest the tick holds the event loop at a time; commands get answered in between
+TICK_SLICE_SECONDS = 0.05
 
 
 def main():
     parser = argparse.ArgumentParser(description="Run an instance of a Discordia server",
                                      prog="Discordia")
     parser.add_argument('-W --show_window', dest='show_window', action='store_const', const=True, default=False,
-                        help="Show a window containing a live view of the entire world. WARNING: CPU-intensive.")
+                        help="Show a window containing a live view of the entire world, redrawn at most FPS times a "
+                             "second (see [Display] in config.ini). Not for chunked worlds.")
     parser.add_argument('--database', default=DEFAULT_PATH, help="Path to the server's SQLite save file.")
+    parser.add_argument('--map-cache', default=None,
+                        help="Path to cache the generated map at, so restarts don't regenerate it. Defaults to next to "
+                             "the save file, for maps made in regions; pass a path to cache a map generated whole too, "
+                             "or an empty string to not cache it.")
+    parser.add_argument('--journal', default=None,
+                        help="Path to journal each tick's changes at, so a crash loses a tick rather than everything "
+                             "since the last save. Defaults to next to the save file; pass an empty string to not "
+                             "keep one.")
     args = parser.parse_args()
 
     if not ConfigParser.DISCORD_TOKEN:
         raise SystemExit("No Discord token: set DISCORD_TOKEN or fill in Token under [Discord] in config.ini")
 
-    database = Database(args.database)
-    adapter = database.load()
+    journal_path = f"{args.database}.journal" if args.journal is None else args.journal
+    database = Database(args.database, journal_path=journal_path or None, background=True)
+    map_cache_path = f"{args.database}.map.npz" if args.map_cache is None else args.map_cache
+    map_cache = MapCache(map_cache_path, whole_maps=args.map_cache is not None) if map_cache_path else None
+    adapter = database.load(map_cache=map_cache,
+                            workers=ConfigParser.WORLD_WORKERS,
+                            map_path=ConfigParser.WORLD_MAP_FILE)
     if adapter is None:
         LOG.info("No save found, generating a new world")
         adapter = WorldAdapter(GameSpace.World(ConfigParser.WORLD_NAME,
                                                ConfigParser.WORLD_WIDTH,
-                                               ConfigParser.WORLD_HEIGHT))
+                                               ConfigParser.WORLD_HEIGHT,
+                                               WorldGenerationParameters(chunk_size=ConfigParser.WORLD_CHUNK_SIZE,
+                                                                         region_size=ConfigParser.WORLD_REGION_SIZE),
+                                               workers=ConfigParser.WORLD_WORKERS,
+                                               map_path=ConfigParser.WORLD_MAP_FILE))
         database.save(adapter)
 
-    display = WindowRenderer(adapter)
-
-    threading.Thread(target=update_display, args=(display, args.show_window), daemon=True).start()
+    if adapter.world.gen_params.chunk_size:
+        # A framebuffer of the whole world would be gigabytes; players' views are drawn straight from the chunks
+        display = ViewRenderer(adapter)
+        if args.show_window:
+            LOG.warning("A chunked world has no window to show; only players' views are drawn")
+    else:
+        display = WindowRenderer(adapter)
+        threading.Thread(target=update_display, args=(display, args.show_window, ConfigParser.DISPLAY_FPS),
+                         daemon=True).start()
     # The tick and the autosave run on the bot's event loop, in lockstep with the commands: no locking
-    # needed, and a crash loses at most AUTOSAVE_SECONDS of play.
+    # needed, and with the journal a crash loses at most a tick of play. Neither waits on the disk; the
+    # database's own thread does the writing, and close() finishes it. The tick gives way to commands every
+    # TICK_SLICE_SECONDS. With a simulation thread the tick runs there instead, and the rest take its lock.
+    simulation = Simulation(adapter.world) if ConfigParser.WORLD_SIMULATION_THREAD else None
+    world_lock = simulation.lock if simulation else contextlib.nullcontext()
+
+    def autosave():
+        with world_lock:
+            database.save(adapter)
+
+    def journal_tick(orders, events):
+        with world_lock:
+            database.record_tick(adapter, orders, events)
+
     discord_interface = DiscordInterface(
         adapter,
-        jobs=[(AUTOSAVE_SECONDS, lambda: database.save(adapter), "Autosave")],
+        jobs=[(JOURNALED_AUTOSAVE_SECONDS if journal_path else AUTOSAVE_SECONDS, autosave, "Autosave")],
         tick_seconds=TICK_SECONDS,
+        slice_seconds=TICK_SLICE_SECONDS,
+        simulation=simulation,
+        after_tick=journal_tick,
     )
     # discord_interface.bot.loop.create_task(update_display(display))
     # threading.Thread(target=discord_interface.bot.run, args=(ConfigParser.DISCORD_TOKEN,), daemon=True).start()
@@ -52,6 +100,9 @@ def main():
     try:
         discord_interface.bot.run(ConfigParser.DISCORD_TOKEN)
     finally:
+        if simulation:
+            simulation.close()
+        display.close()
         database.save(adapter)
         database.close()
         LOG.info("World saved.")